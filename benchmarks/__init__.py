@@ -0,0 +1,6 @@
+"""benchmark suite of powerstrip"""
+
+from benchmarks.fleet import generate_fleet
+from benchmarks.suite import (
+    run_benchmarks, save_results, load_results, compare, format_results
+)
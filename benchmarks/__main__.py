@@ -0,0 +1,95 @@
+import sys
+import logging
+import argparse
+
+from benchmarks.memory import run_memory_benchmark
+from benchmarks.suite import (
+    DEFAULT_SCALES, run_benchmarks, save_results, load_results, compare,
+    format_results
+)
+
+
+def main(argv: list = None) -> int:
+    """
+    run the benchmarks and compare them with the baseline
+
+    :param argv: command line arguments, defaults to None
+    :type argv: list, optional
+    :return: exit code, i.e., 1 if any operation regressed
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark powerstrip with a synthetic plugin fleet."
+    )
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+        help="numbers of plugins"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="measurements per operation"
+    )
+    parser.add_argument(
+        "--files", type=int, default=1,
+        help="additional modules per plugin"
+    )
+    parser.add_argument(
+        "--file-size", type=int, default=1024,
+        help="size of each additional module in bytes"
+    )
+    parser.add_argument(
+        "--categories", type=int, default=4, help="number of categories"
+    )
+    parser.add_argument(
+        "--output", "-o", help="JSON file the results are saved to"
+    )
+    parser.add_argument(
+        "--baseline", "-b", help="JSON file with the baseline results"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="tolerated relative slowdown compared to the baseline"
+    )
+    parser.add_argument(
+        "--memory", type=int, metavar="COUNT",
+        help="measure the memory of COUNT metadata instances and records"
+    )
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARN)
+    if args.memory:
+        memory = run_memory_benchmark(args.memory)
+        for name in ("Metadata", "MetadataRecord"):
+            print(
+                f"{name:<20}{memory[name] / 2 ** 20:>10.2f}MiB per "
+                f"{args.memory} ({memory[name] / args.memory:.0f} bytes each)"
+            )
+
+        return 0
+
+    results = run_benchmarks(
+        args.scales, args.repeat, args.files, args.file_size, args.categories
+    )
+    print(format_results(results))
+    if args.output:
+        save_results(results, args.output)
+
+    if not args.baseline:
+        return 0
+
+    regressions = 0
+    for c in compare(results, load_results(args.baseline), args.threshold):
+        regressions += c["regression"]
+        print(
+            f"{'REGRESSION' if c['regression'] else 'ok':<12}"
+            f"{c['operation']:<20}{c['scale']:>8} plugins "
+            f"{c['baseline'] * 1000:>10.2f}ms -> "
+            f"{c['current'] * 1000:>10.2f}ms ({c['change']:+.1%})"
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
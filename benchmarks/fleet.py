@@ -0,0 +1,147 @@
+import random
+import logging
+from pathlib import Path
+from typing import Union
+
+from powerstrip.utils.utils import ensure_path
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# metadata file of a synthetic plugin
+METADATA_TEMPLATE = """---
+hash: {hash}
+name: {name}
+description: Synthetic plugin {index} for benchmarks.
+license: MIT
+version: {version}
+author: Bench Mark <bench@example.com>
+url: https://www.example.com
+category: {category}
+tags: {tags}
+"""
+
+# main module of a synthetic plugin
+PLUGIN_TEMPLATE = """
+from powerstrip import Plugin
+
+class {name}(Plugin):
+    def init(self, **kwargs):
+        pass
+
+    def run(self, item=None):
+        return item
+
+    def shutdown(self):
+        pass
+"""
+
+# tags assigned to the synthetic plugins
+TAGS = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta"]
+
+
+def generate_plugin(
+    directory: Path,
+    index: int,
+    files: int = 1,
+    file_size: int = 1024,
+    categories: int = 4,
+    prefix: str = "BenchPlugin",
+    rng: random.Random = None
+) -> Path:
+    """
+    generate the source directory of a synthetic plugin
+
+    :param directory: directory in which the plugin directory is created
+    :type directory: Path
+    :param index: index of the plugin
+    :type index: int
+    :param files: number of additional modules, defaults to 1
+    :type files: int, optional
+    :param file_size: size of each additional module in bytes,
+                      defaults to 1024
+    :type file_size: int, optional
+    :param categories: number of categories, defaults to 4
+    :type categories: int, optional
+    :param prefix: prefix of the plugin name, defaults to "BenchPlugin"
+    :type prefix: str, optional
+    :param rng: random generator, defaults to None
+    :type rng: random.Random, optional
+    :return: plugin directory
+    :rtype: Path
+    """
+    rng = rng or random.Random(index)
+    name = f"{prefix}{index:05d}"
+    plugin_dir = directory.joinpath(name)
+    plugin_dir.mkdir(parents=True, exist_ok=True)
+
+    plugin_dir.joinpath("metadata.yml").write_text(
+        METADATA_TEMPLATE.format(
+            hash=f"{rng.getrandbits(128):032x}",
+            name=name,
+            index=index,
+            version=f"{rng.randint(0, 3)}.{rng.randint(0, 9)}.{index % 10}",
+            category=f"category{index % max(categories, 1)}",
+            tags=", ".join(rng.sample(TAGS, 2))
+        )
+    )
+    plugin_dir.joinpath("plugin.py").write_text(
+        PLUGIN_TEMPLATE.format(name=name)
+    )
+
+    for i in range(files):
+        # module with constant data of the given size
+        line = f"DATA_{i} = {'x' * 64!r}\n"
+        plugin_dir.joinpath(f"module{i:03d}.py").write_text(
+            line * max(1, file_size // len(line))
+        )
+
+    return plugin_dir
+
+
+def generate_fleet(
+    directory: Union[str, Path],
+    count: int,
+    files: int = 1,
+    file_size: int = 1024,
+    categories: int = 4,
+    prefix: str = "BenchPlugin",
+    seed: int = 0
+) -> list:
+    """
+    generate the source directories of a fleet of synthetic plugins
+
+    :param directory: directory in which the plugin directories are created
+    :type directory: Union[str, Path]
+    :param count: number of plugins
+    :type count: int
+    :param files: number of additional modules per plugin, defaults to 1
+    :type files: int, optional
+    :param file_size: size of each additional module in bytes,
+                      defaults to 1024
+    :type file_size: int, optional
+    :param categories: number of categories, defaults to 4
+    :type categories: int, optional
+    :param prefix: prefix of the plugin names, defaults to "BenchPlugin"
+    :type prefix: str, optional
+    :param seed: seed of the random generator, defaults to 0
+    :type seed: int, optional
+    :return: plugin directories
+    :rtype: list
+    """
+    assert isinstance(count, int) and (count >= 0)
+    assert isinstance(files, int) and (files >= 0)
+
+    directory = ensure_path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    log.debug(f"Generating {count} plugins in '{directory}'...")
+
+    return [
+        generate_plugin(
+            directory, index, files, file_size, categories, prefix, rng
+        )
+        for index in range(count)
+    ]
@@ -0,0 +1,82 @@
+import gc
+import tracemalloc
+
+from powerstrip.models.metadata import Metadata
+from powerstrip.models.metadatarecord import MetadataRecord
+
+
+def get_metadata_dicts(count: int, categories: int = 16) -> list:
+    """
+    returns validated metadata values of synthetic plugins
+
+    :param count: number of plugins
+    :type count: int
+    :param categories: number of categories, defaults to 16
+    :type categories: int, optional
+    :return: metadata values in the format of Metadata.dict
+    :rtype: list
+    """
+    return [
+        {
+            "name": f"BenchPlugin{index:06d}",
+            "author": "Bench Mark <bench@example.com>",
+            "description": f"Synthetic plugin {index} for benchmarks.",
+            "hash": f"{index:064x}",
+            "license": "MIT",
+            "version": f"{index % 4}.{index % 10}.{index % 7}",
+            # values read from files are not interned by default
+            "category": "".join(["category", str(index % categories)]),
+            "url": "https://www.example.com",
+            "tags": ", ".join(["alpha", "beta", str(index % 5)])
+        }
+        for index in range(count)
+    ]
+
+
+def measure_memory(factory: callable, dicts: list) -> int:
+    """
+    returns the memory allocated for the objects created from the dicts
+
+    :param factory: creates an object from a metadata dictionary
+    :type factory: callable
+    :param dicts: metadata values
+    :type dicts: list
+    :return: allocated bytes
+    :rtype: int
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = [factory(d) for d in dicts]
+        size = tracemalloc.get_traced_memory()[0]
+
+    finally:
+        tracemalloc.stop()
+
+    del objects
+
+    return size
+
+
+def run_memory_benchmark(count: int = 100000) -> dict:
+    """
+    measure the memory of Metadata and MetadataRecord instances
+
+    :param count: number of instances, defaults to 100000
+    :type count: int, optional
+    :return: allocated bytes per class for the given count
+    :rtype: dict
+    """
+    dicts = get_metadata_dicts(count)
+
+    def create_metadata(d: dict) -> Metadata:
+        md = Metadata()
+        md.from_dict(d, validate=False)
+
+        return md
+
+    return {
+        "count": count,
+        "Metadata": measure_memory(create_metadata, dicts),
+        "MetadataRecord": measure_memory(MetadataRecord.from_dict, dicts)
+    }
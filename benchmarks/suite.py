@@ -0,0 +1,307 @@
+import gc
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import statistics
+import tempfile
+import datetime
+from pathlib import Path
+from typing import Union, Iterable
+
+import powerstrip
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.models.metadata import Metadata
+from powerstrip.utils.utils import ensure_path
+
+from benchmarks.fleet import generate_fleet
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# default numbers of plugins
+DEFAULT_SCALES = (10, 100, 1000, 10000)
+
+# benchmarked operations in the order they are run
+OPERATIONS = (
+    "metadata", "pack", "info", "install", "discover", "get_plugin_classes"
+)
+
+
+def measure(
+    func: callable,
+    repeat: int = 3,
+    setup: callable = None,
+    teardown: callable = None
+) -> dict:
+    """
+    measure the duration of the given function
+
+    :param func: function to measure
+    :type func: callable
+    :param repeat: number of measurements, defaults to 3
+    :type repeat: int, optional
+    :param setup: called before each measurement, defaults to None
+    :type setup: callable, optional
+    :param teardown: called after each measurement, defaults to None
+    :type teardown: callable, optional
+    :return: minimum, median and maximum duration in seconds
+    :rtype: dict
+    """
+    assert isinstance(repeat, int) and (repeat > 0)
+
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+        if teardown is not None:
+            teardown()
+
+    return {
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "max": max(durations),
+        "repeat": repeat
+    }
+
+
+def run_scale(
+    directory: Path,
+    count: int,
+    repeat: int = 3,
+    files: int = 1,
+    file_size: int = 1024,
+    categories: int = 4
+) -> dict:
+    """
+    run all benchmarks with a fleet of the given number of plugins
+
+    :param directory: empty working directory
+    :type directory: Path
+    :param count: number of plugins
+    :type count: int
+    :param repeat: number of measurements, defaults to 3
+    :type repeat: int, optional
+    :param files: number of additional modules per plugin, defaults to 1
+    :type files: int, optional
+    :param file_size: size of each additional module in bytes,
+                      defaults to 1024
+    :type file_size: int, optional
+    :param categories: number of categories, defaults to 4
+    :type categories: int, optional
+    :return: measurements by operation
+    :rtype: dict
+    """
+    log.info(f"Benchmarking {count} plugins...")
+    sources = generate_fleet(
+        directory.joinpath("src"), count, files, file_size, categories
+    )
+    repo_directory = directory.joinpath("repo")
+    repo_directory.mkdir()
+    plugins_directory = directory.joinpath("plugins")
+    plugins_directory.mkdir()
+
+    pm = PluginManager(
+        plugins_directory, plugins_repo_directory=repo_directory,
+        auto_discover=False
+    )
+    results, packages = {}, []
+
+    def pack():
+        packages[:] = [pm.pack(source, force=True) for source in sources]
+
+    def clear_plugins():
+        shutil.rmtree(plugins_directory)
+        plugins_directory.mkdir()
+
+    def unload_plugins():
+        # execute the modules again in the next measurement, while
+        # their bytecode is kept
+        for module_name in list(sys.modules):
+            if module_name.startswith("BenchPlugin"):
+                del sys.modules[module_name]
+
+    results["metadata"] = measure(
+        lambda: [Metadata.create_from_directory(s) for s in sources], repeat
+    )
+    results["pack"] = measure(pack, repeat)
+    results["info"] = measure(
+        lambda: [pm.info(package) for package in packages], repeat
+    )
+    results["install"] = measure(
+        lambda: [pm.install(package) for package in packages], repeat,
+        setup=clear_plugins
+    )
+
+    managers = []
+    results["discover"] = measure(
+        lambda: managers.append(PluginManager(
+            plugins_directory, plugins_repo_directory=repo_directory
+        )),
+        repeat,
+        setup=unload_plugins
+    )
+    results["get_plugin_classes"] = measure(
+        managers[-1].get_plugin_classes, repeat
+    )
+    unload_plugins()
+
+    return results
+
+
+def run_benchmarks(
+    scales: Iterable[int] = DEFAULT_SCALES,
+    repeat: int = 3,
+    files: int = 1,
+    file_size: int = 1024,
+    categories: int = 4,
+    directory: Union[str, Path] = None
+) -> dict:
+    """
+    run all benchmarks at the given scales
+
+    :param scales: numbers of plugins, defaults to DEFAULT_SCALES
+    :type scales: Iterable[int], optional
+    :param repeat: number of measurements, defaults to 3
+    :type repeat: int, optional
+    :param files: number of additional modules per plugin, defaults to 1
+    :type files: int, optional
+    :param file_size: size of each additional module in bytes,
+                      defaults to 1024
+    :type file_size: int, optional
+    :param categories: number of categories, defaults to 4
+    :type categories: int, optional
+    :param directory: working directory, defaults to a temporary directory
+    :type directory: Union[str, Path], optional
+    :return: environment and measurements by scale and operation
+    :rtype: dict
+    """
+    results = {
+        "meta": {
+            "powerstrip": powerstrip.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now().isoformat(),
+            "repeat": repeat,
+            "files": files,
+            "file_size": file_size,
+            "categories": categories
+        },
+        "results": {}
+    }
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for count in scales:
+            scale_directory = Path(tmp).joinpath(str(count))
+            scale_directory.mkdir()
+            results["results"][str(count)] = run_scale(
+                scale_directory, count, repeat, files, file_size, categories
+            )
+            shutil.rmtree(scale_directory)
+
+    return results
+
+
+def save_results(results: dict, filename: Union[str, Path]) -> None:
+    """
+    save the results as JSON file
+
+    :param results: benchmark results
+    :type results: dict
+    :param filename: JSON filename
+    :type filename: Union[str, Path]
+    """
+    with ensure_path(filename).open("w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(filename: Union[str, Path]) -> dict:
+    """
+    load results from JSON file
+
+    :param filename: JSON filename
+    :type filename: Union[str, Path]
+    :return: benchmark results
+    :rtype: dict
+    """
+    with ensure_path(filename, must_exist=True).open() as f:
+        return json.load(f)
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    threshold: float = 0.1,
+    key: str = "min"
+) -> list:
+    """
+    compare the results with the baseline, i.e., operations slower than
+    the baseline by more than the threshold are regressions
+
+    :param results: benchmark results
+    :type results: dict
+    :param baseline: benchmark results of the baseline
+    :type baseline: dict
+    :param threshold: relative slowdown that is tolerated, defaults to 0.1
+    :type threshold: float, optional
+    :param key: compared statistic, defaults to "min"
+    :type key: str, optional
+    :return: comparisons with scale, operation, baseline, current,
+             change and regression flag
+    :rtype: list
+    """
+    assert threshold >= 0
+
+    comparisons = []
+    for scale, operations in results["results"].items():
+        for operation, measurement in operations.items():
+            base = baseline["results"].get(scale, {}).get(operation)
+            if base is None:
+                # not measured in the baseline
+                continue
+
+            change = (
+                (measurement[key] - base[key]) / base[key]
+                if base[key] > 0 else
+                0.0
+            )
+            comparisons.append({
+                "scale": int(scale),
+                "operation": operation,
+                "baseline": base[key],
+                "current": measurement[key],
+                "change": change,
+                "regression": change > threshold
+            })
+
+    return comparisons
+
+
+def format_results(results: dict) -> str:
+    """
+    format the results as table
+
+    :param results: benchmark results
+    :type results: dict
+    :return: table with the minimum duration in milliseconds
+    :rtype: str
+    """
+    scales = list(results["results"])
+    lines = [
+        f"{'operation':<20}" + "".join(f"{s:>12}" for s in scales)
+    ]
+    for operation in OPERATIONS:
+        lines.append(f"{operation:<20}" + "".join(
+            f"{results['results'][s][operation]['min'] * 1000:>10.2f}ms"
+            for s in scales
+        ))
+
+    return "\n".join(lines)
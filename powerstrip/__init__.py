@@ -4,5 +4,28 @@ __author__ = "Ansgar Kellner"
 __email__ = "akellner@gmx.de"
 __version__ = "0.0.7"
 
-from powerstrip.models import Plugin
-from powerstrip.pluginmanager import PluginManager
+from typing import TYPE_CHECKING
+
+from powerstrip.models import Plugin, AsyncPlugin
+
+if TYPE_CHECKING:
+    from powerstrip.pluginmanager import PluginManager
+
+__all__ = ["Plugin", "AsyncPlugin", "PluginManager"]
+
+
+def __getattr__(name: str):
+    """
+    import the plugin manager on first use, so that plugins, which only
+    subclass Plugin, do not pay for importing it
+    """
+    if name == "PluginManager":
+        from powerstrip.pluginmanager import PluginManager
+
+        return PluginManager
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + ["PluginManager"])
@@ -0,0 +1,227 @@
+import time
+import logging
+import threading
+import concurrent.futures
+from concurrent.futures import Future
+
+from powerstrip.models.plugin import Plugin
+from powerstrip.models.asyncplugin import AsyncPlugin
+from powerstrip.exceptions import PluginManagerException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+class _Batch:
+    """
+    pending items of a plugin
+    """
+    def __init__(self, plugin: Plugin, deadline: float):
+        self.plugin = plugin
+        self.deadline = deadline
+        self.items = []
+        self.futures = []
+
+
+class BatchDispatcher:
+    """
+    dispatcher that groups submitted items into micro-batches per plugin,
+    i.e., run_batch() of the plugin is called, when either the maximum
+    batch size is reached or the oldest item has waited for the maximum
+    latency; batches are executed in the dispatcher's thread, so it is
+    used with synchronous plugins
+    """
+    def __init__(self, max_batch_size: int = 64, max_latency: float = 0.01):
+        """
+        initialize the batch dispatcher
+
+        :param max_batch_size: maximum number of items per batch,
+                               defaults to 64
+        :type max_batch_size: int, optional
+        :param max_latency: maximum time in seconds an item waits for its
+                            batch to be dispatched, defaults to 0.01
+        :type max_latency: float, optional
+        """
+        assert isinstance(max_batch_size, int) and (max_batch_size > 0)
+        assert max_latency >= 0
+
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._batches = {}
+        self._full = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, plugin: Plugin, item) -> Future:
+        """
+        submit an item to be processed by the given plugin
+
+        :param plugin: plugin instance
+        :type plugin: Plugin
+        :param item: item to process
+        :raises PluginManagerException: if dispatcher is closed or the
+                                        plugin is asynchronous
+        :return: future of the item's result
+        :rtype: Future
+        """
+        if isinstance(plugin, AsyncPlugin):
+            # run_batch() returns a coroutine
+            raise PluginManagerException(
+                f"Asynchronous plugin {plugin!r} cannot be batched by the "
+                f"dispatcher!"
+            )
+
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise PluginManagerException("The dispatcher is closed!")
+
+            batch = self._batches.get(id(plugin))
+            if batch is None:
+                # first item of a new batch
+                batch = _Batch(plugin, time.monotonic() + self.max_latency)
+                self._batches[id(plugin)] = batch
+                self._cond.notify()
+
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_batch_size:
+                # batch is full, i.e., next item starts a new batch
+                del self._batches[id(plugin)]
+                self._full.append(batch)
+                self._cond.notify()
+
+        return future
+
+    def _pop_ready(self, now: float) -> list:
+        """
+        remove and return all batches that are due
+
+        :param now: current time
+        :type now: float
+        :return: due batches
+        :rtype: list
+        """
+        ready = [
+            batch
+            for batch in self._batches.values()
+            if self._closed or (batch.deadline <= now)
+        ]
+        for batch in ready:
+            del self._batches[id(batch.plugin)]
+
+        ready, self._full = self._full + ready, []
+
+        return ready
+
+    def _execute(self, batch: _Batch) -> None:
+        """
+        call run_batch() of the plugin and resolve the futures
+
+        :param batch: batch to execute
+        :type batch: _Batch
+        """
+        # items whose futures have been cancelled are not processed
+        pending = [
+            (item, future)
+            for item, future in zip(batch.items, batch.futures)
+            if future.set_running_or_notify_cancel()
+        ]
+        if not pending:
+            return
+
+        items = [item for item, _ in pending]
+        try:
+            results = batch.plugin.run_batch(items)
+            if len(results) != len(items):
+                raise PluginManagerException(
+                    f"run_batch() of {batch.plugin!r} returned "
+                    f"{len(results)} results for {len(items)} items!"
+                )
+
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+
+            return
+
+        for (_, future), result in zip(pending, results):
+            future.set_result(result)
+
+    def _loop(self) -> None:
+        """
+        dispatch the batches when they are due
+        """
+        while True:
+            with self._cond:
+                while True:
+                    ready = self._pop_ready(time.monotonic())
+                    if ready or self._closed:
+                        break
+
+                    timeout = None
+                    if self._batches:
+                        # wait until the oldest batch is due
+                        timeout = max(0, min(
+                            batch.deadline
+                            for batch in self._batches.values()
+                        ) - time.monotonic())
+
+                    self._cond.wait(timeout)
+
+            for batch in ready:
+                self._execute(batch)
+
+            if self._closed and not ready:
+                break
+
+    def flush(self, timeout: float = None) -> None:
+        """
+        dispatch all pending batches immediately and wait for them
+
+        :param timeout: timeout in seconds, defaults to None
+        :type timeout: float, optional
+        """
+        with self._cond:
+            futures = []
+            for batch in self._full + list(self._batches.values()):
+                batch.deadline = 0
+                futures.extend(batch.futures)
+
+            self._cond.notify()
+
+        concurrent.futures.wait(futures, timeout)
+
+    def close(self, timeout: float = None) -> None:
+        """
+        dispatch all pending batches and stop the dispatcher
+
+        :param timeout: timeout in seconds, defaults to None
+        :type timeout: float, optional
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "BatchDispatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        """
+        string representation of the batch dispatcher
+
+        :return: string representation of the batch dispatcher
+        :rtype: str
+        """
+        return (
+            f"<BatchDispatcher(max_batch_size={self.max_batch_size}, "
+            f"max_latency={self.max_latency})>"
+        )
@@ -72,3 +72,17 @@ class CustomValidator(Validator):
         li = value.split(",")
         if not all(li):
             self._error(field, f"Invalid list '{value}'!")
+
+    def _check_with_is_capability_list(self, field: str, value: str):
+        """
+        checks if value is a list of capabilities, i.e., alphanumeric
+        names separated by ":", e.g., "exporter:csv, reader"
+        """
+        if value in ("", None):
+            # ignore not set list
+            return
+
+        pattern = re.compile(r"^[A-Za-z0-9._-]+(:[A-Za-z0-9._-]+)*$")
+        for capability in value.split(","):
+            if not pattern.match(capability.strip()):
+                self._error(field, f"Invalid capability '{capability}'!")
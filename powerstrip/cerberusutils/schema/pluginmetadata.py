@@ -45,4 +45,14 @@ plugin_metadata_schema = {
         "required": False,
         "check_with": "is_list"
     },
+    "provides": {
+        "type": "string",
+        "required": False,
+        "check_with": "is_capability_list"
+    },
+    "requires": {
+        "type": "string",
+        "required": False,
+        "check_with": "is_capability_list"
+    },
 }
@@ -16,3 +16,19 @@ class PluginPackageException(Exception):
 
 class PluginManagerException(Exception):
     pass
+
+
+class PluginProcessPoolException(Exception):
+    pass
+
+
+class PluginQueryException(Exception):
+    pass
+
+
+class FileLockException(Exception):
+    pass
+
+
+class RepositoryException(Exception):
+    pass
@@ -0,0 +1,333 @@
+import time
+import bisect
+import inspect
+import logging
+import functools
+import threading
+
+from powerstrip.models.plugin import Plugin
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# upper bounds of the latency buckets in seconds
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# plugin methods that are instrumented
+INSTRUMENTED_METHODS = ("init", "run", "run_batch", "shutdown")
+
+
+class Histogram:
+    """
+    latency histogram with fixed buckets, i.e., an observation costs a
+    binary search and an increment
+    """
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        initialize the histogram
+
+        :param buckets: sorted upper bounds of the buckets in seconds,
+                        defaults to DEFAULT_BUCKETS
+        :type buckets: tuple, optional
+        """
+        assert list(buckets) == sorted(buckets)
+
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        add an observation
+
+        :param value: observed value in seconds
+        :type value: float
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """
+        returns the cumulative counts per upper bound, including +Inf
+
+        :return: list of (upper bound, count)
+        :rtype: list
+        """
+        res, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            res.append((bound, total))
+
+        return res
+
+    def quantile(self, q: float) -> float:
+        """
+        returns the upper bound of the bucket containing the quantile
+
+        :param q: quantile between 0 and 1
+        :type q: float
+        :return: upper bound in seconds or None without observations
+        :rtype: float
+        """
+        assert 0 <= q <= 1
+
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+
+    def dict(self) -> dict:
+        """
+        returns the histogram as dictionary
+
+        :return: histogram
+        :rtype: dict
+        """
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {
+                str(bound): count for bound, count in self.cumulative()
+            }
+        }
+
+
+class MethodMetrics:
+    """
+    call count, error count and latency histogram of a plugin method
+    """
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(buckets)
+        self._lock = threading.Lock()
+
+    def record(self, duration: float, error: bool) -> None:
+        """
+        record a finished call
+
+        :param duration: duration in seconds
+        :type duration: float
+        :param error: True, if the call raised an exception
+        :type error: bool
+        """
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.latency.observe(duration)
+
+    def dict(self) -> dict:
+        """
+        returns the metrics as dictionary
+
+        :return: metrics
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "error_rate": self.errors / self.calls if self.calls else 0.0,
+                "p50": self.latency.quantile(0.5),
+                "p99": self.latency.quantile(0.99),
+                "latency": self.latency.dict()
+            }
+
+
+class MetricsRegistry:
+    """
+    runtime metrics of all instrumented plugins
+    """
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        initialize the metrics registry
+
+        :param buckets: sorted upper bounds of the latency buckets in
+                        seconds, defaults to DEFAULT_BUCKETS
+        :type buckets: tuple, optional
+        """
+        self.buckets = tuple(buckets)
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def get(self, plugin: str, category: str, method: str) -> MethodMetrics:
+        """
+        returns the metrics of the given plugin method
+
+        :param plugin: plugin name
+        :type plugin: str
+        :param category: plugin category
+        :type category: str
+        :param method: method name
+        :type method: str
+        :return: metrics of the method
+        :rtype: MethodMetrics
+        """
+        key = (plugin, category, method)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self._metrics.setdefault(
+                    key, MethodMetrics(self.buckets)
+                )
+
+        return metrics
+
+    def instrument(self, plugin: Plugin) -> Plugin:
+        """
+        instrument the methods of the given plugin instance, i.e., the
+        methods are wrapped by instance attributes measuring each call
+
+        :param plugin: plugin instance
+        :type plugin: Plugin
+        :return: instrumented plugin instance
+        :rtype: Plugin
+        """
+        assert isinstance(plugin, Plugin)
+
+        name = plugin.metadata.name or plugin.__class__.__name__
+        category = plugin.metadata.category
+        for method in INSTRUMENTED_METHODS:
+            func = getattr(plugin, method)
+            metrics = self.get(name, category, method)
+            wrapper = (
+                self._wrap_async(func, metrics)
+                if inspect.iscoroutinefunction(func) else
+                self._wrap(func, metrics)
+            )
+            setattr(plugin, method, wrapper)
+
+        return plugin
+
+    @staticmethod
+    def _wrap(func: callable, metrics: MethodMetrics) -> callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = True
+            try:
+                res = func(*args, **kwargs)
+                error = False
+                return res
+
+            finally:
+                metrics.record(time.perf_counter() - start, error)
+
+        return wrapper
+
+    @staticmethod
+    def _wrap_async(func: callable, metrics: MethodMetrics) -> callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = True
+            try:
+                res = await func(*args, **kwargs)
+                error = False
+                return res
+
+            finally:
+                metrics.record(time.perf_counter() - start, error)
+
+        return wrapper
+
+    def snapshot(self) -> dict:
+        """
+        returns the metrics of all plugins, e.g., to be serialized as JSON
+
+        :return: metrics by category, plugin name and method
+        :rtype: dict
+        """
+        res = {}
+        for (plugin, category, method), metrics in sorted(
+            list(self._metrics.items()), key=lambda item: str(item[0])
+        ):
+            res.setdefault(category, {}).setdefault(plugin, {})[method] = (
+                metrics.dict()
+            )
+
+        return res
+
+    def to_prometheus(self, prefix: str = "powerstrip_plugin") -> str:
+        """
+        returns the metrics of all plugins in the Prometheus text format
+
+        :param prefix: prefix of the metric names,
+                       defaults to "powerstrip_plugin"
+        :type prefix: str, optional
+        :return: metrics in the Prometheus text format
+        :rtype: str
+        """
+        lines = [
+            f"# HELP {prefix}_calls_total Number of plugin method calls.",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        calls, errors, latencies = [], [], []
+        for (plugin, category, method), metrics in sorted(
+            list(self._metrics.items()), key=lambda item: str(item[0])
+        ):
+            labels = (
+                f'plugin="{plugin}",category="{category or ""}",'
+                f'method="{method}"'
+            )
+            with metrics._lock:
+                calls.append(f"{prefix}_calls_total{{{labels}}} "
+                             f"{metrics.calls}")
+                errors.append(f"{prefix}_errors_total{{{labels}}} "
+                              f"{metrics.errors}")
+                for bound, count in metrics.latency.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    latencies.append(
+                        f"{prefix}_latency_seconds_bucket"
+                        f"{{{labels},le=\"{le}\"}} {count}"
+                    )
+
+                latencies.append(
+                    f"{prefix}_latency_seconds_sum{{{labels}}} "
+                    f"{metrics.latency.sum}"
+                )
+                latencies.append(
+                    f"{prefix}_latency_seconds_count{{{labels}}} "
+                    f"{metrics.latency.count}"
+                )
+
+        lines.extend(calls)
+        lines.extend([
+            f"# HELP {prefix}_errors_total Number of failed plugin "
+            f"method calls.",
+            f"# TYPE {prefix}_errors_total counter",
+        ])
+        lines.extend(errors)
+        lines.extend([
+            f"# HELP {prefix}_latency_seconds Latency of plugin method "
+            f"calls.",
+            f"# TYPE {prefix}_latency_seconds histogram",
+        ])
+        lines.extend(latencies)
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """
+        remove all metrics
+        """
+        with self._lock:
+            self._metrics = {}
+
+    def __repr__(self) -> str:
+        """
+        string representation of the metrics registry
+
+        :return: string representation of the metrics registry
+        :rtype: str
+        """
+        return f"<MetricsRegistry(metrics={len(self._metrics)})>"
@@ -1,2 +1,5 @@
 from powerstrip.models.metadata import Metadata
+from powerstrip.models.metadatarecord import MetadataRecord
 from powerstrip.models.plugin import Plugin
+from powerstrip.models.asyncplugin import AsyncPlugin
+from powerstrip.models.pluginentry import PluginEntry
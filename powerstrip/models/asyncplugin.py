@@ -0,0 +1,33 @@
+import abc
+
+from powerstrip.models.plugin import Plugin
+
+
+class AsyncPlugin(Plugin):
+    """
+    abstract class from which all asyncio-based plugins
+    must derived, i.e., with coroutine lifecycle methods
+    """
+    @abc.abstractmethod
+    async def init(self, **kwargs):
+        pass
+
+    @abc.abstractmethod
+    async def run(self):
+        pass
+
+    @abc.abstractmethod
+    async def shutdown(self):
+        pass
+
+    async def run_batch(self, items: list) -> list:
+        """
+        process a batch of items; the default awaits run() for each item,
+        plugins can override it with a vectorized implementation
+
+        :param items: items to process
+        :type items: list
+        :return: results in the order of the items
+        :rtype: list
+        """
+        return [await self.run(item) for item in items]
@@ -1,27 +1,55 @@
+import os
+import hashlib
 import logging
 from pathlib import Path
 from typing import Union
 from io import TextIOWrapper
 
-import yaml
-
-from powerstrip.cerberusutils.customvalidator import CustomValidator
 from powerstrip.cerberusutils.schema import plugin_metadata_schema
 from powerstrip.exceptions import MetadataException
 from powerstrip.utils.semver import SemVer
 from powerstrip.utils.utils import ensure_path
+from powerstrip.tracing import tracer
 
 
 # prepare logger
 log = logging.getLogger(__name__)
 
 
+def get_yaml_loader():
+    """
+    returns the libyaml-backed safe loader, if available, otherwise the
+    pure-Python safe loader
+
+    :return: YAML loader class
+    """
+    import yaml
+
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def get_yaml_dumper():
+    """
+    returns the libyaml-backed safe dumper, if available, otherwise the
+    pure-Python safe dumper
+
+    :return: YAML dumper class
+    """
+    import yaml
+
+    return getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
 class Metadata:
     """
     metadata class
     """
     METADATA_FILENAME = "metadata.yml"
 
+    # cache of the validated metadata, used while the digest of the
+    # metadata file matches
+    SIDECAR_FILENAME = ".metadata.json"
+
     def __init__(self):
         """
         initialize the Metadata class
@@ -35,6 +63,8 @@ class Metadata:
         self.category = None
         self.url = None
         self.tags = None
+        self.provides = None
+        self.requires = None
 
     @property
     def hash(self) -> str:
@@ -203,6 +233,65 @@ class Metadata:
                 if s.strip() != ""
             ]
 
+    @staticmethod
+    def _split_list(value: str) -> list:
+        """
+        returns the lower-case items of the comma separated string
+        """
+        if value in (None, ""):
+            return []
+
+        return [
+            s.strip().lower()
+            for s in value.split(",")
+            if s.strip() != ""
+        ]
+
+    @property
+    def provides(self) -> list:
+        """
+        returns the list of capabilities provided by the plugin,
+        e.g., "exporter:csv"
+
+        :return: list of provided capabilities
+        :rtype: list
+        """
+        return self._provides
+
+    @provides.setter
+    def provides(self, value: str) -> None:
+        """
+        set list of provided capabilities by comma separated string
+
+        :param value: comma separated string
+        :type value: str
+        """
+        assert (value is None) or isinstance(value, str)
+
+        self._provides = self._split_list(value)
+
+    @property
+    def requires(self) -> list:
+        """
+        returns the list of capabilities required by the plugin
+
+        :return: list of required capabilities
+        :rtype: list
+        """
+        return self._requires
+
+    @requires.setter
+    def requires(self, value: str) -> None:
+        """
+        set list of required capabilities by comma separated string
+
+        :param value: comma separated string
+        :type value: str
+        """
+        assert (value is None) or isinstance(value, str)
+
+        self._requires = self._split_list(value)
+
     @property
     def category(self) -> str:
         """
@@ -265,7 +354,7 @@ class Metadata:
         :return: dictionary of metadata
         :rtype: dict
         """
-        return {
+        d = {
             "name": self.name,
             "author": self.author,
             "description": self.description,
@@ -277,21 +366,40 @@ class Metadata:
             "tags": ", ".join(self.tags)
         }
 
-    def from_dict(self, d: dict):
+        # capabilities are only written, if given, since older releases
+        # reject unknown fields
+        if self.provides:
+            d["provides"] = ", ".join(self.provides)
+
+        if self.requires:
+            d["requires"] = ", ".join(self.requires)
+
+        return d
+
+    def from_dict(self, d: dict, validate: bool = True):
         """
         set Metadata properties by given dict
 
         :param d: metadata values in dictionary
         :type d: dict
+        :param validate: if False, the values have already been validated,
+                         defaults to True
+        :type validate: bool, optional
         :raises MetadataException: if invalid values in dictionary
         """
         assert isinstance(d, dict)
 
-        # validate given dictionary
-        validator = CustomValidator(plugin_metadata_schema)
-        if not validator.validate(d):
-            # invalid content => raise exception with errors
-            raise MetadataException(validator.errors)
+        if validate:
+            # validate given dictionary; cerberus is imported on first use
+            from powerstrip.cerberusutils.customvalidator import (
+                CustomValidator
+            )
+
+            with tracer.span("Metadata.validate"):
+                validator = CustomValidator(plugin_metadata_schema)
+                if not validator.validate(d):
+                    # invalid content => raise exception with errors
+                    raise MetadataException(validator.errors)
 
         # set internal properties based on dictionary
         for k, v in d.items():
@@ -314,15 +422,20 @@ class Metadata:
 
     @staticmethod
     def create_from_directory(
-        plugin_directory: Union[str, Path] = "."
+        plugin_directory: Union[str, Path] = ".",
+        use_sidecar: bool = True
     ) -> "Metadata":
         """
-        create an instance of Metadata from given directory
+        create an instance of Metadata from given directory; the sidecar
+        file is preferred, if its digest matches the metadata file
 
         :param plugin_directory: plugin directory, defaults to "."
         :type plugin_directory: Union[str, Path], optional
-        :return: [description]
-        :rtype: [type]
+        :param use_sidecar: if True, the sidecar file is used, if it is
+                            valid, defaults to True
+        :type use_sidecar: bool, optional
+        :return: instance of the Metadata
+        :rtype: Metadata
         """
         assert isinstance(plugin_directory, (str, Path))
 
@@ -333,8 +446,18 @@ class Metadata:
         ensure_path(filename, must_exist=True)
 
         # load content from metadata file
-        with filename.open("r") as f:
-            md.load(f)
+        data = filename.read_bytes()
+        d = (
+            Metadata.load_sidecar(filename.parent, data)
+            if use_sidecar else
+            None
+        )
+        if d is not None:
+            # already validated
+            md.from_dict(d, validate=False)
+
+        else:
+            md.loads(data.decode())
 
         return md
 
@@ -378,7 +501,9 @@ class Metadata:
         """
         assert isinstance(f, TextIOWrapper)
 
-        yaml.safe_dump(self.dict, f, sort_keys=False)
+        import yaml
+
+        yaml.dump(self.dict, f, Dumper=get_yaml_dumper(), sort_keys=False)
 
     def save_to_directory(
         self,
@@ -406,8 +531,96 @@ class Metadata:
         """
         assert isinstance(f, TextIOWrapper)
 
-        y = yaml.safe_load(f) or {}
-        self.from_dict(y)
+        self.loads(f.read())
+
+    def loads(self, s: str):
+        """
+        load YAML from string, validate the input
+        and set internal properties of Metadata class
+
+        :param s: YAML string
+        :type s: str
+        :raises MetadataException: if YAML cannot be parsed
+        """
+        assert isinstance(s, str)
+
+        import yaml
+
+        with tracer.span("Metadata.load"):
+            with tracer.span("yaml.safe_load"):
+                y = yaml.load(s, Loader=get_yaml_loader()) or {}
+
+            self.from_dict(y)
+
+    @staticmethod
+    def get_digest(data: bytes) -> str:
+        """
+        returns the digest of the metadata file's content
+
+        :param data: content of the metadata file
+        :type data: bytes
+        :return: hex digest
+        :rtype: str
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def load_sidecar(plugin_directory: Path, data: bytes) -> dict:
+        """
+        returns the validated metadata values of the sidecar file, if its
+        digest matches the given content of the metadata file
+
+        :param plugin_directory: plugin directory
+        :type plugin_directory: Path
+        :param data: content of the metadata file
+        :type data: bytes
+        :return: metadata values or None, if sidecar is missing or stale
+        :rtype: dict
+        """
+        import json
+
+        try:
+            with plugin_directory.joinpath(
+                Metadata.SIDECAR_FILENAME
+            ).open() as f:
+                sidecar = json.load(f)
+
+            if sidecar["digest"] == Metadata.get_digest(data):
+                return sidecar["metadata"]
+
+        except (OSError, ValueError, KeyError, TypeError):
+            # missing or broken sidecar
+            pass
+
+        return None
+
+    def save_sidecar(self, plugin_directory: Union[str, Path] = "."):
+        """
+        save the validated metadata as sidecar file next to the
+        metadata file in the given directory
+
+        :param plugin_directory: plugin directory, defaults to "."
+        :type plugin_directory: Union[str, Path], optional
+        """
+        assert isinstance(plugin_directory, (str, Path))
+
+        import json
+
+        filename = self.get_filename(plugin_directory)
+        sidecar = {
+            "digest": self.get_digest(filename.read_bytes()),
+            "metadata": self.dict
+        }
+
+        # replace the sidecar at once
+        sidecar_filename = filename.with_name(self.SIDECAR_FILENAME)
+        tmp_filename = sidecar_filename.with_name(
+            f"{self.SIDECAR_FILENAME}.{os.getpid()}.tmp"
+        )
+        with tmp_filename.open("w") as f:
+            json.dump(sidecar, f, separators=(",", ":"))
+
+        os.replace(tmp_filename, sidecar_filename)
 
     def __repr__(self) -> str:
         """
@@ -0,0 +1,243 @@
+import sys
+import functools
+from typing import Iterable
+
+from powerstrip.models.metadata import Metadata
+from powerstrip.utils.semver import SemVer
+
+
+@functools.lru_cache(maxsize=4096)
+def _intern_tags(tags: tuple) -> frozenset:
+    """
+    returns the shared frozenset of the given sorted tags or capabilities,
+    since most records share a few combinations
+
+    :param tags: sorted tags or capabilities
+    :type tags: tuple
+    :return: frozenset of interned tags
+    :rtype: frozenset
+    """
+    return frozenset(map(sys.intern, tags))
+
+
+class MetadataRecord:
+    """
+    compact immutable metadata record, e.g., to hold the metadata of many
+    repository packages in memory; the category, license and tags are
+    interned and tags are stored as shared frozenset
+    """
+    __slots__ = (
+        "name", "version", "hash", "author", "description", "license",
+        "category", "url", "tags", "provides", "requires"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        hash: str = "",
+        author: str = "",
+        description: str = "",
+        license: str = "",
+        category: str = "default",
+        url: str = "",
+        tags: Iterable[str] = (),
+        provides: Iterable[str] = (),
+        requires: Iterable[str] = ()
+    ):
+        """
+        initialize the metadata record
+
+        :param name: plugin name
+        :type name: str
+        :param version: semantic version string
+        :type version: str
+        :param hash: plugin hash, defaults to ""
+        :type hash: str, optional
+        :param author: plugin author, defaults to ""
+        :type author: str, optional
+        :param description: plugin description, defaults to ""
+        :type description: str, optional
+        :param license: plugin license, defaults to ""
+        :type license: str, optional
+        :param category: plugin category, defaults to "default"
+        :type category: str, optional
+        :param url: plugin url, defaults to ""
+        :type url: str, optional
+        :param tags: lower-case tags, defaults to ()
+        :type tags: Iterable[str], optional
+        :param provides: lower-case provided capabilities, defaults to ()
+        :type provides: Iterable[str], optional
+        :param requires: lower-case required capabilities, defaults to ()
+        :type requires: Iterable[str], optional
+        """
+        setattr_ = object.__setattr__
+        setattr_(self, "name", name)
+        setattr_(self, "version", str(version))
+        setattr_(self, "hash", hash or "")
+        setattr_(self, "author", author or "")
+        setattr_(self, "description", description or "")
+        setattr_(self, "license", sys.intern(license or ""))
+        setattr_(self, "category", sys.intern(category or "default"))
+        setattr_(self, "url", url or "")
+        setattr_(self, "tags", _intern_tags(tuple(sorted(set(tags)))))
+        setattr_(
+            self, "provides", _intern_tags(tuple(sorted(set(provides))))
+        )
+        setattr_(
+            self, "requires", _intern_tags(tuple(sorted(set(requires))))
+        )
+
+    def __setattr__(self, key: str, value) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is immutable!")
+
+    def __delattr__(self, key: str) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is immutable!")
+
+    @property
+    def semver(self) -> SemVer:
+        """
+        returns the semantic version of the plugin
+
+        :return: semantic version
+        :rtype: SemVer
+        """
+        return SemVer.create_from_str(self.version)
+
+    @property
+    def plugin_name(self) -> str:
+        """
+        returns the plugin filename derived from name and version
+
+        :return: plugin name
+        :rtype: str
+        """
+        return f"{self.name}-{self.version}"
+
+    @property
+    def dict(self) -> dict:
+        """
+        returns metadata representation as dictionary, like Metadata.dict
+
+        :return: dictionary of metadata
+        :rtype: dict
+        """
+        d = {
+            "name": self.name,
+            "author": self.author,
+            "description": self.description,
+            "hash": self.hash,
+            "license": self.license,
+            "version": self.version,
+            "category": self.category,
+            "url": self.url,
+            "tags": ", ".join(sorted(self.tags))
+        }
+        if self.provides:
+            d["provides"] = ", ".join(sorted(self.provides))
+
+        if self.requires:
+            d["requires"] = ", ".join(sorted(self.requires))
+
+        return d
+
+    @staticmethod
+    def from_metadata(md: Metadata) -> "MetadataRecord":
+        """
+        create a record from the given metadata
+
+        :param md: metadata
+        :type md: Metadata
+        :return: metadata record
+        :rtype: MetadataRecord
+        """
+        assert isinstance(md, Metadata)
+
+        return MetadataRecord(
+            name=md.name,
+            version=md.version,
+            hash=md.hash,
+            author=md.author,
+            description=md.description,
+            license=md.license,
+            category=md.category,
+            url=md.url,
+            tags=md.tags,
+            provides=md.provides,
+            requires=md.requires
+        )
+
+    @staticmethod
+    def from_dict(d: dict) -> "MetadataRecord":
+        """
+        create a record from the given dictionary in the format of
+        Metadata.dict, which has already been validated
+
+        :param d: metadata values in dictionary
+        :type d: dict
+        :return: metadata record
+        :rtype: MetadataRecord
+        """
+        assert isinstance(d, dict)
+
+        def split(key: str) -> list:
+            return [
+                item.strip().lower()
+                for item in (d.get(key) or "").split(",")
+                if item.strip() != ""
+            ]
+
+        return MetadataRecord(
+            name=d["name"],
+            version=d["version"],
+            hash=d.get("hash"),
+            author=d.get("author"),
+            description=d.get("description"),
+            license=d.get("license"),
+            category=d.get("category"),
+            url=d.get("url"),
+            tags=split("tags"),
+            provides=split("provides"),
+            requires=split("requires")
+        )
+
+    def to_metadata(self) -> Metadata:
+        """
+        returns the record as Metadata instance
+
+        :return: metadata
+        :rtype: Metadata
+        """
+        md = Metadata()
+        md.from_dict(self.dict, validate=False)
+
+        return md
+
+    def _key(self) -> tuple:
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MetadataRecord):
+            return NotImplemented
+
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __reduce__(self):
+        return (self.__class__, self._key())
+
+    def __repr__(self) -> str:
+        """
+        string representation of the metadata record
+
+        :return: string representation of the metadata record
+        :rtype: str
+        """
+        return (
+            f"<MetadataRecord(name='{self.name}', "
+            f"version='{self.version}', "
+            f"category='{self.category}', "
+            f"tags={sorted(self.tags)})>"
+        )
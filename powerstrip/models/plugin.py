@@ -11,6 +11,9 @@ class Plugin(abc.ABC):
     abstract class from which all plugins
     must derived
     """
+    # metadata of the plugin class, set by the plugin manager on discovery
+    _cached_metadata = None
+
     def __init__(self, auto_load_metadata: bool = True):
         # get plugin path from module file
         self.plugin_path = Path(
@@ -20,8 +23,11 @@ class Plugin(abc.ABC):
 
         self.metadata = Metadata()
         if auto_load_metadata:
-            # get plugin's metadata from directory
-            self.metadata = Metadata.create_from_directory(self.plugin_path)
+            # get plugin's metadata from discovery or from directory
+            self.metadata = (
+                vars(self.__class__).get("_cached_metadata") or
+                Metadata.create_from_directory(self.plugin_path)
+            )
 
     @abc.abstractmethod
     def init(self, **kwargs):
@@ -35,6 +41,18 @@ class Plugin(abc.ABC):
     def shutdown(self):
         pass
 
+    def run_batch(self, items: list) -> list:
+        """
+        process a batch of items; the default calls run() for each item,
+        plugins can override it with a vectorized implementation
+
+        :param items: items to process
+        :type items: list
+        :return: results in the order of the items
+        :rtype: list
+        """
+        return [self.run(item) for item in items]
+
     def __repr__(self) -> str:
         return (
             f"<{self.__class__.__name__}(metadata='{self.metadata}')>"
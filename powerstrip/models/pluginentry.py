@@ -0,0 +1,220 @@
+import threading
+from pathlib import Path
+from typing import Callable
+
+from powerstrip.models.metadata import Metadata
+
+
+class PluginEntry:
+    """
+    registry entry of a discovered plugin, i.e., its directory,
+    metadata, loaded modules and plugin classes; the modules of a lazy
+    entry are loaded on first access of its modules or classes
+    """
+    def __init__(
+        self,
+        directory: Path,
+        metadata: Metadata,
+        modules: list = None,
+        classes: list = None,
+        loader: Callable[["PluginEntry"], tuple] = None
+    ):
+        """
+        initialize the plugin entry
+
+        :param directory: plugin directory
+        :type directory: Path
+        :param metadata: metadata of the plugin
+        :type metadata: Metadata
+        :param modules: names of the plugin's modules, defaults to None
+                        for a lazy entry
+        :type modules: list, optional
+        :param classes: plugin classes defined in the plugin's modules,
+                        defaults to None for a lazy entry
+        :type classes: list, optional
+        :param loader: loads the modules of a lazy entry and returns the
+                       module names and plugin classes, defaults to None
+        :type loader: Callable[[PluginEntry], tuple], optional
+        """
+        assert (classes is not None) or (loader is not None)
+
+        self.directory = directory
+        self.metadata = metadata
+        self._modules = modules
+        self._classes = classes
+        self.loader = loader
+        self.scopes = {}
+        self._lock = threading.Lock()
+        self._users = 0
+        self._retired = False
+
+    @property
+    def loaded(self) -> bool:
+        """
+        returns whether the modules of the plugin have been loaded
+
+        :return: True, if the modules have been loaded
+        :rtype: bool
+        """
+        return self._classes is not None
+
+    def load(self) -> "PluginEntry":
+        """
+        load the modules of a lazy entry, if not yet loaded
+
+        :return: the plugin entry
+        :rtype: PluginEntry
+        """
+        if self._classes is None:
+            with self._lock:
+                if self._classes is None:
+                    self._modules, self._classes = self.loader(self)
+
+        return self
+
+    @property
+    def modules(self) -> list:
+        """
+        returns the names of the plugin's modules, which are loaded first
+
+        :return: module names
+        :rtype: list
+        """
+        return self.load()._modules
+
+    @property
+    def classes(self) -> list:
+        """
+        returns the plugin classes, whose modules are loaded first
+
+        :return: plugin classes
+        :rtype: list
+        """
+        return self.load()._classes
+
+    @property
+    def name(self) -> str:
+        """
+        returns the plugin name
+
+        :return: plugin name
+        :rtype: str
+        """
+        return self.metadata.name
+
+    @property
+    def category(self) -> str:
+        """
+        returns the plugin category
+
+        :return: plugin category
+        :rtype: str
+        """
+        return self.metadata.category
+
+    @property
+    def instances(self) -> list:
+        """
+        returns the managed instances of all scopes
+
+        :return: plugin instances
+        :rtype: list
+        """
+        return [
+            plugin
+            for scope in list(self.scopes.values())
+            for plugin in scope.instances
+        ]
+
+    def drop(self) -> list:
+        """
+        drop the modules and classes of the entry, whose registry entry
+        has been removed, i.e., a lazy entry is never loaded anymore
+
+        :return: names of the modules that have been loaded
+        :rtype: list
+        """
+        with self._lock:
+            modules = self._modules or []
+            self._modules, self._classes = [], []
+
+        return modules
+
+    def close(self) -> None:
+        """
+        shutdown the managed instances of all scopes
+        """
+        scopes, self.scopes = list(self.scopes.values()), {}
+        for scope in scopes:
+            scope.close()
+
+    def retain(self) -> bool:
+        """
+        count a caller that uses an instance of the entry, e.g., a
+        checked-out instance or an instance returned by get_plugin(),
+        until it calls release()
+
+        :return: False, if the entry has been retired and must not be
+                 used anymore
+        :rtype: bool
+        """
+        with self._lock:
+            if self._retired:
+                return False
+
+            self._users += 1
+
+        return True
+
+    def release(self) -> bool:
+        """
+        release a caller counted by retain(); the last caller of a retired
+        entry shuts down its instances
+
+        :return: True, if the instances have been shut down
+        :rtype: bool
+        """
+        with self._lock:
+            self._users -= 1
+            close = self._retired and (self._users == 0)
+
+        if close:
+            self.close()
+
+        return close
+
+    def retire(self) -> bool:
+        """
+        shutdown the managed instances of an entry that has been replaced
+        or removed from the registry, i.e., once the last caller counted
+        by retain() has released the entry
+
+        :return: True, if the instances have been shut down at once
+        :rtype: bool
+        """
+        with self._lock:
+            self._retired = True
+            close = self._users == 0
+
+        if close:
+            self.close()
+
+        return close
+
+    def __repr__(self) -> str:
+        """
+        string representation of the plugin entry
+
+        :return: string representation of the plugin entry
+        :rtype: str
+        """
+        classes = (
+            [cls.__name__ for cls in self._classes]
+            if self.loaded else
+            "not loaded"
+        )
+        return (
+            f"<PluginEntry(name='{self.name}', "
+            f"directory='{self.directory}', "
+            f"classes={classes})>"
+        )
@@ -1,13 +1,12 @@
 import io
 import logging
-import shutil
-import zipfile
-import hashlib
 from pathlib import Path
 from typing import Union, List
 
 from powerstrip.utils.utils import ensure_path, hash_directory
+from powerstrip.utils.filelock import FileLock, GenerationCounter
 from powerstrip.models import Metadata
+from powerstrip.tracing import tracer
 from powerstrip.exceptions import PluginPackageException
 
 
@@ -20,6 +19,7 @@ class PluginPackage:
     plugin package
     """
     @staticmethod
+    @tracer.traced("PluginPackage.pack")
     def pack(
         directory: Union[str, Path],
         target_directory: Union[str, Path],
@@ -48,6 +48,8 @@ class PluginPackage:
         assert isinstance(ext, str) and ext.startswith(".")
         assert isinstance(force, bool)
 
+        import zipfile
+
         # ensure that directory is a Path and that it does exist
         directory = ensure_path(directory, must_exist=True)
 
@@ -75,15 +77,23 @@ class PluginPackage:
         exclude_filenames: list = ["__pycache__", ".DS_Store"]
 
         # get directory's hash and save updated metadata back to file
-        md.hash = hash_directory(
-            directory=directory,
-            exclude_suffixes=exclude_suffixes,
-            exclude_filenames=exclude_filenames + [md.METADATA_FILENAME]
-        ).hex()
+        tracer.current_span().set_attribute("plugin", md.name)
+        with tracer.span("hash_directory"):
+            md.hash = hash_directory(
+                directory=directory,
+                exclude_suffixes=exclude_suffixes,
+                exclude_filenames=exclude_filenames + [
+                    md.METADATA_FILENAME, md.SIDECAR_FILENAME
+                ]
+            ).hex()
+
         md.save_to_directory(directory)
+        md.save_sidecar(directory)
 
         log.debug(f"Opening '{plugin_filename}'...")
-        with zipfile.ZipFile(plugin_filename, "w") as zf:
+        with zipfile.ZipFile(plugin_filename, "w") as zf, tracer.span(
+            "zip.write", filename=plugin_filename
+        ) as span:
             for fn in directory.glob("**/*"):
                 if (
                     fn.suffix in exclude_suffixes or
@@ -95,9 +105,12 @@ class PluginPackage:
                 log.debug(f"Adding '{fn}' to plugin package...")
                 zf.write(fn, fn.relative_to(directory))
 
+            span.set_attribute("files", len(zf.infolist()))
+
         return plugin_filename
 
     @staticmethod
+    @tracer.traced("PluginPackage.install")
     def install(
         plugin_filename: Union[str, Path],
         target_directory: Union[str, Path],
@@ -127,6 +140,8 @@ class PluginPackage:
         assert isinstance(use_category, bool)
         assert isinstance(force, bool)
 
+        import zipfile
+
         # check that plugin filename is a Path and that it exists
         plugin_filename = ensure_path(plugin_filename, must_exist=True)
 
@@ -138,51 +153,67 @@ class PluginPackage:
                 f"Invalid target directory '{target_directory}'! Abort."
             )
 
-        try:
-            log.debug(f"Opening '{plugin_filename}'...")
-            with zipfile.ZipFile(plugin_filename) as zf:
-                # get metadata from metadata file within the plugin package
-                with zf.open(Metadata.METADATA_FILENAME) as f:
-                    metadata = Metadata.create_from_f(
-                        io.TextIOWrapper(f)
-                    )
-
-                if not use_category:
-                    # prepare target directory without category
-                    target_directory = target_directory.joinpath(
-                        metadata.name
-                    )
-
-                else:
-                    # prepare target directory with category
-                    target_directory = target_directory.joinpath(
-                        metadata.category, metadata.name
+        # writers hold the exclusive lock of the plugins directory
+        root = target_directory
+        with FileLock(root).exclusive():
+            try:
+                log.debug(f"Opening '{plugin_filename}'...")
+                with zipfile.ZipFile(plugin_filename) as zf:
+                    # get metadata from metadata file within the plugin package
+                    with zf.open(Metadata.METADATA_FILENAME) as f:
+                        metadata = Metadata.create_from_f(
+                            io.TextIOWrapper(f)
+                        )
+
+                    if not use_category:
+                        # prepare target directory without category
+                        target_directory = target_directory.joinpath(
+                            metadata.name
+                        )
+
+                    else:
+                        # prepare target directory with category
+                        target_directory = target_directory.joinpath(
+                            metadata.category, metadata.name
+                        )
+
+                    if (force is False) and target_directory.exists():
+                        # plugin does already exist
+                        raise PluginPackageException(
+                            f"The plugin '{metadata.name}' does already "
+                            f"exist in '{target_directory}'! Abort."
+                        )
+
+                    log.debug(f"Installing plugin to '{target_directory}'...")
+                    tracer.current_span().set_attribute(
+                        "plugin", metadata.name
                     )
 
-                if (force is False) and target_directory.exists():
-                    # plugin does already exist
-                    raise PluginPackageException(
-                        f"The plugin '{metadata.name}' does already "
-                        f"exist in '{target_directory}'! Abort."
-                    )
+                    # create plugin directory
+                    target_directory.mkdir(parents=True, exist_ok=True)
 
-                log.debug(f"Installing plugin to '{target_directory}'...")
+                    # extract all files from plugin package to target directory
+                    with tracer.span(
+                        "zip.extractall", files=len(zf.infolist())
+                    ):
+                        zf.extractall(path=target_directory)
 
-                # create plugin directory
-                target_directory.mkdir(parents=True, exist_ok=True)
+                    # cache the validated metadata, e.g., for older packages
+                    metadata.save_sidecar(target_directory)
 
-                # extract all files from plugin package to target directory
-                zf.extractall(path=target_directory)
+            except zipfile.BadZipFile as e:
+                # not a zip file, i.e., not a valid plugin
+                raise PluginPackageException(
+                    f"The file '{plugin_filename}' is not a valid plugin file!"
+                )
 
-        except zipfile.BadZipFile as e:
-            # not a zip file, i.e., not a valid plugin
-            raise PluginPackageException(
-                f"The file '{plugin_filename}' is not a valid plugin file!"
-            )
+            # announce the modification to other processes
+            GenerationCounter(root).increment()
 
         return target_directory
 
     @staticmethod
+    @tracer.traced("PluginPackage.uninstall")
     def uninstall(
         plugin_name: str,
         target_directory: Union[str, Path],
@@ -203,6 +234,8 @@ class PluginPackage:
         assert isinstance(target_directory, (str, Path))
         assert (category is None) or isinstance(category, str)
 
+        import shutil
+
         # ensure that target directory is a Path and that it does exist
         target_directory = ensure_path(target_directory, must_exist=True)
 
@@ -232,9 +265,15 @@ class PluginPackage:
         log.debug(
             f"removing plugin directory '{plugin_directory}'..."
         )
-        shutil.rmtree(plugin_directory)
+        with FileLock(target_directory).exclusive():
+            with tracer.span("rmtree", directory=plugin_directory):
+                shutil.rmtree(plugin_directory)
+
+            # announce the modification to other processes
+            GenerationCounter(target_directory).increment()
 
     @staticmethod
+    @tracer.traced("PluginPackage.info")
     def info(
         plugin_filename: Union[str, Path]
     ) -> Metadata:
@@ -249,6 +288,8 @@ class PluginPackage:
         """
         assert isinstance(plugin_filename, (str, Path))
 
+        import zipfile
+
         # check that plugin filename is a Path and that it exists
         plugin_filename = ensure_path(plugin_filename, must_exist=True)
 
@@ -0,0 +1,421 @@
+import queue
+import types
+import asyncio
+import inspect
+import logging
+import threading
+import functools
+from typing import Union, Iterable, List
+
+from powerstrip.models.plugin import Plugin
+from powerstrip.models.asyncplugin import AsyncPlugin
+from powerstrip.exceptions import PluginManagerException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# marks the end of the stream
+_END = object()
+
+
+class _Failure:
+    """
+    wraps an exception raised by a stage
+    """
+    def __init__(self, exception: Exception):
+        self.exception = exception
+
+
+class Pipeline:
+    """
+    streaming pipeline of plugins, i.e., the result of each stage's run()
+    is passed to the next stage through bounded queues, so that all stages
+    run overlapping while memory stays bounded
+
+    results that are None are dropped, while generators (or async
+    generators) returned by run() are flattened into the stream
+    """
+    def __init__(
+        self,
+        stages: List[Plugin],
+        maxsize: int = 64,
+        parallelism: Union[int, List[int]] = 1,
+        owned: List[Plugin] = None
+    ):
+        """
+        initialize the pipeline
+
+        :param stages: initialized plugin instances in the stage order
+        :type stages: List[Plugin]
+        :param maxsize: maximum number of items between two stages,
+                        defaults to 64
+        :type maxsize: int, optional
+        :param parallelism: number of concurrent workers for all stages or
+                            per stage, defaults to 1; the order of the
+                            items is only kept for a parallelism of 1
+        :type parallelism: Union[int, List[int]], optional
+        :param owned: stages that have been created for the pipeline and
+                      are shut down by close(), defaults to None
+        :type owned: List[Plugin], optional
+        """
+        assert len(stages) > 0
+        assert isinstance(maxsize, int) and (maxsize > 0)
+
+        if isinstance(parallelism, int):
+            parallelism = [parallelism] * len(stages)
+
+        assert len(parallelism) == len(stages)
+        assert all(p > 0 for p in parallelism)
+
+        self.stages = list(stages)
+        self.maxsize = maxsize
+        self.parallelism = list(parallelism)
+        self._owned = list(owned or [])
+
+    def _put(self, q: queue.Queue, item, stop: threading.Event) -> bool:
+        """
+        put item into the queue unless the pipeline is stopped
+
+        :return: False, if pipeline has been stopped
+        :rtype: bool
+        """
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+
+            except queue.Full:
+                continue
+
+        return False
+
+    def _get(self, q: queue.Queue, stop: threading.Event):
+        """
+        get item from the queue unless the pipeline is stopped
+
+        :return: item or _END, if pipeline has been stopped
+        """
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+
+            except queue.Empty:
+                continue
+
+        return _END
+
+    def _feed(
+        self,
+        items: Iterable,
+        q: queue.Queue,
+        workers: int,
+        stop: threading.Event
+    ) -> None:
+        """
+        feed the input items into the first queue
+        """
+        try:
+            for item in items:
+                if not self._put(q, item, stop):
+                    return
+
+        except Exception as e:
+            self._put(q, _Failure(e), stop)
+
+        for _ in range(workers):
+            self._put(q, _END, stop)
+
+    def _work(
+        self,
+        index: int,
+        q_in: queue.Queue,
+        q_out: queue.Queue,
+        remaining: list,
+        lock: threading.Lock,
+        stop: threading.Event
+    ) -> None:
+        """
+        process the items of the stage with the given index
+        """
+        plugin = self.stages[index]
+        while True:
+            item = self._get(q_in, stop)
+            if item is _END:
+                break
+
+            if isinstance(item, _Failure):
+                # forward failure of previous stage
+                self._put(q_out, item, stop)
+                continue
+
+            try:
+                res = plugin.run(item)
+                if isinstance(res, types.GeneratorType):
+                    for r in res:
+                        if (r is not None) and not self._put(q_out, r, stop):
+                            return
+
+                elif res is not None:
+                    self._put(q_out, res, stop)
+
+            except Exception as e:
+                self._put(q_out, _Failure(e), stop)
+
+        with lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+
+        if last:
+            # last worker of the stage signals the end to the next stage
+            workers = (
+                self.parallelism[index + 1]
+                if index + 1 < len(self.stages) else
+                1
+            )
+            for _ in range(workers):
+                self._put(q_out, _END, stop)
+
+    def process(self, items: Iterable) -> Iterable:
+        """
+        stream the given items through the pipeline
+
+        :param items: input items
+        :type items: Iterable
+        :raises PluginManagerException: if a stage is an AsyncPlugin
+        :return: output items of the last stage
+        :rtype: Iterable
+        """
+        if any(isinstance(plugin, AsyncPlugin) for plugin in self.stages):
+            # run() returns coroutines, which must be awaited
+            raise PluginManagerException(
+                "Pipelines with AsyncPlugin stages must be processed by "
+                "process_async()!"
+            )
+
+        return self._process(items)
+
+    def _process(self, items: Iterable) -> Iterable:
+        """
+        stream the given items through the pipeline in worker threads
+
+        :param items: input items
+        :type items: Iterable
+        :return: output items of the last stage
+        :rtype: Iterable
+        """
+        stop = threading.Event()
+        lock = threading.Lock()
+        remaining = list(self.parallelism)
+        queues = [
+            queue.Queue(maxsize=self.maxsize)
+            for _ in range(len(self.stages) + 1)
+        ]
+
+        threads = [
+            threading.Thread(
+                target=self._feed,
+                args=(items, queues[0], self.parallelism[0], stop),
+                daemon=True
+            )
+        ]
+        for index, workers in enumerate(self.parallelism):
+            for _ in range(workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(
+                        index, queues[index], queues[index + 1],
+                        remaining, lock, stop
+                    ),
+                    daemon=True
+                ))
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    break
+
+                if isinstance(item, _Failure):
+                    raise item.exception
+
+                yield item
+
+        finally:
+            # stop all stages, e.g., if consumer stopped early
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    async def _afeed(self, items, q: asyncio.Queue, workers: int) -> None:
+        """
+        feed the input items into the first queue
+        """
+        try:
+            if hasattr(items, "__aiter__"):
+                async for item in items:
+                    await q.put(item)
+
+            else:
+                for item in items:
+                    await q.put(item)
+
+        except Exception as e:
+            await q.put(_Failure(e))
+
+        for _ in range(workers):
+            await q.put(_END)
+
+    async def _awork(
+        self,
+        index: int,
+        q_in: asyncio.Queue,
+        q_out: asyncio.Queue,
+        remaining: list
+    ) -> None:
+        """
+        process the items of the stage with the given index
+        """
+        loop = asyncio.get_event_loop()
+        plugin = self.stages[index]
+        while True:
+            item = await q_in.get()
+            if item is _END:
+                break
+
+            if isinstance(item, _Failure):
+                # forward failure of previous stage
+                await q_out.put(item)
+                continue
+
+            try:
+                if isinstance(plugin, AsyncPlugin):
+                    res = plugin.run(item)
+                    if inspect.isawaitable(res):
+                        res = await res
+
+                else:
+                    # do not block the loop by synchronous plugins
+                    res = await loop.run_in_executor(
+                        None, functools.partial(plugin.run, item)
+                    )
+
+                if hasattr(res, "__aiter__"):
+                    async for r in res:
+                        if r is not None:
+                            await q_out.put(r)
+
+                elif isinstance(res, types.GeneratorType):
+                    for r in res:
+                        if r is not None:
+                            await q_out.put(r)
+
+                elif res is not None:
+                    await q_out.put(res)
+
+            except Exception as e:
+                await q_out.put(_Failure(e))
+
+        remaining[index] -= 1
+        if remaining[index] == 0:
+            # last worker of the stage signals the end to the next stage
+            workers = (
+                self.parallelism[index + 1]
+                if index + 1 < len(self.stages) else
+                1
+            )
+            for _ in range(workers):
+                await q_out.put(_END)
+
+    async def process_async(self, items):
+        """
+        stream the given items through the pipeline within the event loop;
+        AsyncPlugin stages are awaited, synchronous plugins are run in the
+        executor
+
+        :param items: input items, iterable or async iterable
+        :return: async iterator over the output items of the last stage
+        """
+        queues = [
+            asyncio.Queue(maxsize=self.maxsize)
+            for _ in range(len(self.stages) + 1)
+        ]
+        remaining = list(self.parallelism)
+        tasks = [
+            asyncio.ensure_future(
+                self._afeed(items, queues[0], self.parallelism[0])
+            )
+        ]
+        for index, workers in enumerate(self.parallelism):
+            for _ in range(workers):
+                tasks.append(asyncio.ensure_future(self._awork(
+                    index, queues[index], queues[index + 1], remaining
+                )))
+
+        try:
+            while True:
+                item = await queues[-1].get()
+                if item is _END:
+                    break
+
+                if isinstance(item, _Failure):
+                    raise item.exception
+
+                yield item
+
+        finally:
+            # cancel all stages, e.g., if consumer stopped early
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        """
+        shutdown the stages that have been created for the pipeline; the
+        shutdown() coroutines of AsyncPlugin stages are run in a new event
+        loop, use aclose() within the event loop
+        """
+        plugins, self._owned = self._owned, []
+        for plugin in plugins:
+            res = plugin.shutdown()
+            if inspect.isawaitable(res):
+                asyncio.run(res)
+
+    async def aclose(self) -> None:
+        """
+        shutdown the stages that have been created for the pipeline within
+        the event loop
+        """
+        plugins, self._owned = self._owned, []
+        for plugin in plugins:
+            res = plugin.shutdown()
+            if inspect.isawaitable(res):
+                await res
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "Pipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    def __repr__(self) -> str:
+        """
+        string representation of the pipeline
+
+        :return: string representation of the pipeline
+        :rtype: str
+        """
+        return (
+            f"<Pipeline(stages={self.stages}, maxsize={self.maxsize}, "
+            f"parallelism={self.parallelism})>"
+        )
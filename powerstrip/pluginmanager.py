@@ -1,15 +1,47 @@
+import gc
+import sys
+import copy
+import types
+import inspect
+import weakref
+import contextlib
+import tracemalloc
+import asyncio
 import logging
+import threading
+import functools
 import collections
 from pathlib import Path
-from typing import Union
+from typing import Union, Iterable, TYPE_CHECKING
 
-from powerstrip.utils import load_module
+from powerstrip.utils import (
+    load_module, unload_module, estimate_module_size, FileLock,
+    GenerationCounter
+)
 from powerstrip.models.plugin import Plugin
+from powerstrip.models.asyncplugin import AsyncPlugin
 from powerstrip.models.metadata import Metadata
+from powerstrip.models.pluginentry import PluginEntry
 from powerstrip.models.pluginpackage import PluginPackage
+from powerstrip.scopes import SCOPES, InstanceScope, PoolScope
+from powerstrip.query import PluginQuery
+from powerstrip.registry import RegistrySnapshot
+from powerstrip.metrics import MetricsRegistry
+from powerstrip.tracing import tracer
+from powerstrip.utils.semver import SemVer
 from powerstrip.utils.utils import ensure_path
 from powerstrip.exceptions import PluginManagerException
 
+if TYPE_CHECKING:
+    from powerstrip.repository import (
+        RepositoryIndex, RepositoryClient, MirrorResult, SearchResult
+    )
+    # imported on first use, since they import multiprocessing and ctypes
+    from powerstrip.processpool import PluginProcessPool
+    from powerstrip.batching import BatchDispatcher
+    from powerstrip.pipeline import Pipeline
+    from powerstrip.watcher import PluginWatcher
+
 
 class PluginManager:
     """
@@ -17,18 +49,28 @@ class PluginManager:
     """
     def __init__(
         self,
-        plugins_directory: Union[str, Path],
+        plugins_directory: Union[str, Path, Iterable[Union[str, Path]]],
         subclass: Plugin = Plugin,
         use_category: bool = False,
         auto_discover: bool = True,
         plugin_ext: str = ".psp",
-        plugins_repo_directory: Union[str, Path] = "."
+        plugins_repo_directory: Union[str, Path] = ".",
+        scope: str = "singleton",
+        pool_size: int = 4,
+        metrics: bool = False,
+        lazy: bool = False,
+        plugins_repo_url: str = None
     ):
         """
         initialize the plugin manager class
 
-        :param plugins_directory: directory where plugins are installed
-        :type plugins_directory: Union[str, Path]
+        :param plugins_directory: directory where plugins are installed or
+                                  list of directories in the order of
+                                  their precedence, i.e., a plugin shadows
+                                  plugins with the same name in later
+                                  directories; plugins are installed to
+                                  the first directory
+        :type plugins_directory: Union[str, Path, Iterable[Union[str, Path]]]
         :param subclass: subclass of Plugin that is managed by the
                          plugin manager, defaults to Plugin
         :type subclass: Plugin, optional
@@ -42,13 +84,48 @@ class PluginManager:
         :param plugins_repo_directory: repository directory where packed plugin
                                        packages are stored
         :type plugins_repo_directory: Union[str, Path]
+        :param scope: default lifecycle scope of managed instances, i.e.,
+                      "singleton", "thread", "context" or "pool",
+                      defaults to "singleton"
+        :type scope: str, optional
+        :param pool_size: maximum number of instances per plugin in the
+                          "pool" scope, defaults to 4
+        :type pool_size: int, optional
+        :param metrics: if True, calls of managed instances are measured
+                        and exposed by the metrics registry,
+                        defaults to False
+        :type metrics: bool, optional
+        :param lazy: if True, only the metadata of the plugins is read
+                     on discovery, while their modules are loaded on
+                     first use, defaults to False
+        :type lazy: bool, optional
+        :param plugins_repo_url: URL of a repository server from which
+                                 packages that are not found locally are
+                                 downloaded, defaults to None
+        :type plugins_repo_url: str, optional
         """
+        assert scope in SCOPES
+        assert (plugins_repo_url is None) or isinstance(plugins_repo_url, str)
+        assert isinstance(pool_size, int) and (pool_size > 0)
+
         self.plugins_directory = plugins_directory
         self.subclass = subclass
         self.use_category = use_category
         self.plugin_ext = plugin_ext
         self.plugins_repo_directory = plugins_repo_directory
+        self.scope = scope
+        self.pool_size = pool_size
+        self.metrics = MetricsRegistry() if metrics else None
+        self.lazy = lazy
+        self.plugins_repo_url = plugins_repo_url
         self.log = logging.getLogger(self.__class__.__name__)
+        self._snapshot = RegistrySnapshot()
+        self._repository = None
+        self._remote = None
+        self._generations = None
+        # replaced or removed entries, whose instances are still used
+        self._retired = set()
+        self._lock = threading.RLock()
 
         if auto_discover:
             # auto discover plugins from directory
@@ -57,7 +134,8 @@ class PluginManager:
     @property
     def plugins_directory(self) -> Path:
         """
-        returns the plugins directory where all plugins are installed
+        returns the plugins directory where all plugins are installed,
+        i.e., the directory with the highest precedence
 
         :return: plugins directory
         :rtype: Path
@@ -65,20 +143,82 @@ class PluginManager:
         return self._plugin_directory
 
     @plugins_directory.setter
-    def plugins_directory(self, value: Union[str, Path]) -> None:
+    def plugins_directory(
+        self,
+        value: Union[str, Path, Iterable[Union[str, Path]]]
+    ) -> None:
         """
-        set the plugins directory
+        set the plugins directory or the list of plugins directories in
+        the order of their precedence
 
-        :param value: plugins directory
-        :type value: Union[str, Path]
+        :param value: plugins directory or list of plugins directories
+        :type value: Union[str, Path, Iterable[Union[str, Path]]]
         """
-        # ensure that plugin_directory is a path
-        self._plugin_directory = ensure_path(value)
+        if isinstance(value, (str, Path)):
+            value = [value]
+
+        # ensure that plugin directories are paths
+        self._plugin_directories = list(map(ensure_path, value))
+        if not self._plugin_directories:
+            raise PluginManagerException("No plugins directory given!")
+
+        self._plugin_directory = self._plugin_directories[0]
 
         if not self._plugin_directory.exists():
             # plugin directory does not exist => create it
             self._plugin_directory.mkdir(parents=True)
 
+    @property
+    def plugins_directories(self) -> list:
+        """
+        returns all plugins directories in the order of their precedence
+
+        :return: plugins directories
+        :rtype: list
+        """
+        return list(self._plugin_directories)
+
+    @property
+    def shadowed(self) -> dict:
+        """
+        returns the plugin directories that have not been loaded, since
+        a plugin with the same name has a higher precedence
+
+        :return: shadowing plugin directory by shadowed plugin directory
+        :rtype: dict
+        """
+        return dict(self._snapshot.shadowed)
+
+    def _get_root(self, directory: Path) -> Path:
+        """
+        returns the plugins directory that contains the given path
+
+        :param directory: path within a plugins directory
+        :type directory: Path
+        :raises PluginManagerException: if not within a plugins directory
+        :return: plugins directory
+        :rtype: Path
+        """
+        for root in self._plugin_directories:
+            if (directory == root) or (root in directory.parents):
+                return root
+
+        raise PluginManagerException(
+            f"The path '{directory}' is not within a plugins directory!"
+        )
+
+    def _get_precedence(self, directory: Path) -> int:
+        """
+        returns the precedence of the plugin directory, i.e., the index
+        of its plugins directory, where lower means higher precedence
+
+        :param directory: plugin directory
+        :type directory: Path
+        :return: precedence
+        :rtype: int
+        """
+        return self._plugin_directories.index(self._get_root(directory))
+
     @property
     def plugins_repo_directory(self) -> Path:
         """
@@ -148,24 +288,18 @@ class PluginManager:
 
         return [
             directory.parents[1].name
-            for directory in self.plugins_directory.glob(
-                f"**/{Metadata.METADATA_FILENAME}"
-            )
+            for root in self._plugin_directories
+            for directory in root.glob(f"**/{Metadata.METADATA_FILENAME}")
             if directory
         ]
 
-    def _find_plugin_package(
-        self,
-        plugin_filename: Union[str, Path]
-    ) -> Path:
+    def _add_plugin_ext(self, plugin_filename: Union[str, Path]) -> Path:
         """
-        try to find the plugin package by first using the given path directly
-        then if not found, try to get the package from local path and the
-        if still not found from the repository path
+        returns the plugin package filename with the plugin extension
 
         :param plugin_filename: plugin package filename
         :type plugin_filename: Union[str, Path]
-        :return: path of the plugin package file
+        :return: plugin package filename
         :rtype: Path
         """
         plugin_filename = ensure_path(plugin_filename)
@@ -175,6 +309,28 @@ class PluginManager:
                 plugin_filename.suffix + self.plugin_ext
             )
 
+        return plugin_filename
+
+    def _find_plugin_package(
+        self,
+        plugin_filename: Union[str, Path],
+        download: bool = True
+    ) -> Path:
+        """
+        try to find the plugin package by first using the given path directly
+        then if not found, try to get the package from local path and the
+        if still not found from the repository path or the repository server
+
+        :param plugin_filename: plugin package filename
+        :type plugin_filename: Union[str, Path]
+        :param download: if True, the package is downloaded from the
+                         repository server, if not found locally,
+                         defaults to True
+        :type download: bool, optional
+        :return: path of the plugin package file
+        :rtype: Path
+        """
+        plugin_filename = self._add_plugin_ext(plugin_filename)
         if plugin_filename.exists():
             # full path given and existing
             return plugin_filename
@@ -186,188 +342,1886 @@ class PluginManager:
                 # plugin package in the path found
                 return fn
 
+        if download and (self.remote is not None):
+            # download the plugin package or take it from the cache
+            from powerstrip.exceptions import RepositoryException
+
+            try:
+                return self.remote.download(plugin_filename.name)
+
+            except RepositoryException as e:
+                self.log.debug(f"Downloading failed: {e}")
+
         # plugin package not found
         raise PluginManagerException(
             f"The plugin package '{plugin_filename}' could not be found!"
         )
 
+    def _get_module_name(self, filename: Path) -> str:
+        """
+        derive the module name from the path relative to the plugins
+        directory
+
+        :param filename: python file
+        :type filename: Path
+        :return: module name
+        :rtype: str
+        """
+        return (
+            filename.with_suffix("").relative_to(
+                self._get_root(filename)
+            ).as_posix()
+        ).replace("/", ".")
+
+    def _load_plugin(
+        self,
+        plugin_directory: Path,
+        lazy: bool = None,
+        metadata: Metadata = None
+    ) -> PluginEntry:
+        """
+        load metadata and all modules of the plugin in the given directory
+
+        :param plugin_directory: plugin directory
+        :type plugin_directory: Path
+        :param lazy: if True, the modules are loaded on first use,
+                     defaults to the lazy setting of the manager
+        :type lazy: bool, optional
+        :param metadata: metadata of the plugin, if already read,
+                         defaults to None
+        :type metadata: Metadata, optional
+        :return: registry entry of the plugin
+        :rtype: PluginEntry
+        """
+        with tracer.span(
+            "PluginManager.load_plugin", directory=plugin_directory
+        ) as span:
+            if metadata is None:
+                metadata = Metadata.create_from_directory(plugin_directory)
+
+            span.set_attribute("plugin", metadata.name)
+
+            entry = PluginEntry(
+                plugin_directory, metadata, loader=self._load_modules
+            )
+            if not (self.lazy if lazy is None else lazy):
+                entry.load()
+
+            return entry
+
+    def _load_modules(self, entry: PluginEntry) -> tuple:
+        """
+        load all modules of the plugin of the given registry entry
+
+        :param entry: registry entry of the plugin
+        :type entry: PluginEntry
+        :return: module names and plugin classes
+        :rtype: tuple
+        """
+        with tracer.span(
+            "PluginManager.load_modules", plugin=entry.name
+        ), FileLock(self._get_root(entry.directory)).shared():
+            modules, classes = [], []
+            for fn in sorted(entry.directory.glob("**/*.py")):
+                # load the module
+                module_name = self._get_module_name(fn)
+                with tracer.span("load_module", module=module_name):
+                    mod = load_module(module_name, fn)
+
+                modules.append(module_name)
+
+                # get all concrete plugin classes defined in the module
+                classes.extend(
+                    obj
+                    for obj in vars(mod).values()
+                    if (
+                        inspect.isclass(obj) and
+                        issubclass(obj, Plugin) and
+                        (obj.__module__ == module_name) and
+                        not inspect.isabstract(obj)
+                    )
+                )
+
+            for plugincls in classes:
+                # instances reuse the metadata instead of reading it again
+                plugincls._cached_metadata = entry.metadata
+
+            return modules, classes
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """
+        returns the current immutable snapshot of the registry; readers
+        keep using the snapshot they took, while writers swap it
+
+        :return: registry snapshot
+        :rtype: RegistrySnapshot
+        """
+        return self._snapshot
+
+    @property
+    def _registry(self) -> types.MappingProxyType:
+        """
+        returns the registry entries of the current snapshot by plugin
+        directory
+        """
+        return self._snapshot.registry
+
+    def _swap_registry(self, registry: dict, shadowed: dict = None) -> None:
+        """
+        replace the registry at once together with the name index and
+        the attribute indexes of the plugin queries; must be called while
+        holding the lock, so that writers do not lose updates
+
+        :param registry: registry entries by plugin directory
+        :type registry: dict
+        :param shadowed: shadowing plugin directory by shadowed plugin
+                         directory, defaults to the current ones
+        :type shadowed: dict, optional
+        """
+        # readers see either the old or the new snapshot
+        self._snapshot = self._snapshot.replace(registry, shadowed)
+
+    @property
+    def plugins(self) -> list:
+        """
+        returns the registry entries of all discovered plugins
+
+        :return: list of registry entries
+        :rtype: list
+        """
+        return list(self._snapshot.registry.values())
+
+    def _find_entry(
+        self,
+        plugin_name: str,
+        category: str = None
+    ) -> PluginEntry:
+        """
+        find the registry entry of the plugin with the given name
+
+        :param plugin_name: plugin name
+        :type plugin_name: str
+        :param category: plugin's category
+        :type category: str
+        :raises PluginManagerException: if plugin is not discovered
+        :return: registry entry of the plugin
+        :rtype: PluginEntry
+        """
+        for entry in self._snapshot.names.get(plugin_name, ()):
+            if category in (None, entry.category):
+                return entry
+
+        raise PluginManagerException(
+            f"The plugin '{plugin_name}' has not been discovered!"
+        )
+
+    def select(self, query: PluginQuery = None, **criteria) -> list:
+        """
+        returns the registry entries of the discovered plugins matching
+        the query, e.g.,
+        select(categories=["export"], tags_any=["csv", "json"],
+        version=">=1.0.0, <2.0.0", author="*@example.com*")
+
+        :param query: plugin query, defaults to a query of the criteria
+        :type query: PluginQuery, optional
+        :param criteria: criteria of PluginQuery, if no query is provided
+        :raises PluginQueryException: if the version range is invalid
+        :return: matching registry entries
+        :rtype: list
+        """
+        assert (query is None) or (not criteria)
+
+        if query is None:
+            query = PluginQuery(**criteria)
+
+        return self._snapshot.index.select(query)
+
+    def find_providers(self, capability: str) -> list:
+        """
+        returns the registry entries of the plugins that provide the
+        capability, e.g., "exporter:csv", or any capability matching the
+        glob pattern, e.g., "exporter:*"; only the metadata is consulted,
+        i.e., plugins are neither imported nor instantiated
+
+        :param capability: capability or glob pattern
+        :type capability: str
+        :return: registry entries of the providers
+        :rtype: list
+        """
+        assert isinstance(capability, str)
+
+        return self._snapshot.index.select(
+            PluginQuery(provides=[capability])
+        )
+
+    def unmet_requirements(self) -> dict:
+        """
+        returns the capabilities required by discovered plugins, which are
+        not provided by any discovered plugin
+
+        :return: unmet capabilities by plugin name
+        :rtype: dict
+        """
+        index = self._snapshot.index
+        return {
+            index.registry[directory].name: capabilities
+            for directory, capabilities in index.unmet_requirements().items()
+        }
+
     def get_plugin_classes(
         self,
         subclass: Plugin = None,
         category: str = None,
-        tag: str = None
+        tag: str = None,
+        query: PluginQuery = None,
+        capability: str = None
     ) -> dict:
+        """
+        returns the classes of the discovered plugins by category and name
+
+        :param subclass: subclass of Plugin that the classes must be
+                         derived from, defaults to subclass of the manager
+        :type subclass: Plugin, optional
+        :param category: category the plugins must match
+        :type category: str, optional
+        :param tag: tag the plugins must match, plugins without tags
+                    match any tag
+        :type tag: str, optional
+        :param query: plugin query the plugins must match, see select(),
+                      defaults to None
+        :type query: PluginQuery, optional
+        :param capability: capability or glob pattern the plugins must
+                           provide, see find_providers(), defaults to None
+        :type capability: str, optional
+        :return: plugin classes by category and name, where plugins with
+                 the same name are resolved by the precedence of their
+                 plugins directories
+        :rtype: dict
+        """
         # if not provided, use originally define subclass
         subclass = subclass or self.subclass
 
-        plugin_classes = collections.defaultdict(dict)
-        for plugincls in subclass.__subclasses__():
-            plugin = plugincls()
+        if capability is not None:
+            # narrow the query to the providers, the given query is kept
+            query = copy.copy(query) if query is not None else PluginQuery()
+            query.provides = (
+                (query.provides or frozenset()) | {capability.lower()}
+            )
 
-            match = True
-            if (
-                (subclass is not None) and
-                not issubclass(plugincls, subclass)
-            ):
-                # subclass is not matching
-                match = False
+        # all lookups use the same snapshot without locking
+        snapshot = self._snapshot
+        plugin_classes = collections.defaultdict(dict)
+        owners = {}
+        for entry in (
+            snapshot.registry.values()
+            if query is None else
+            snapshot.index.select(query)
+        ):
+            metadata = entry.metadata
 
             if (
                 (category is not None) and
-                (category != plugin.metadata.category)
+                (category != metadata.category)
             ):
                 # category is not matching
-                match = False
+                continue
 
             if (
                 (tag is not None) and
-                (len(plugin.metadata.tags) > 0) and
-                (tag not in plugin.metadata.tags)
+                (len(metadata.tags) > 0) and
+                (tag not in metadata.tags)
             ):
                 # tag is not matching
-                match = False
+                continue
 
-            if match:
-                # matching search criteria then add to dict
+            for plugincls in entry.classes:
+                if not issubclass(plugincls, subclass):
+                    # subclass is not matching
+                    continue
 
                 # get category or use 'default' as category
                 cat = (
-                    plugin.metadata.category
+                    metadata.category
                     if self.use_category else
                     "default"
                 )
 
-                if plugin.metadata.name in plugin_classes[cat]:
+                if metadata.name in plugin_classes[cat]:
                     # plugin with same name does already exist in category
-                    raise PluginManagerException(
-                        f"A plugin with the name '{plugin.metadata.name}' "
-                        f"does already exist in the category '{cat}'!"
-                    )
+                    # => keep the plugin of higher precedence
+                    other = owners[(cat, metadata.name)]
+                    precedence = self._get_precedence(entry.directory)
+                    if self._get_precedence(other.directory) == precedence:
+                        raise PluginManagerException(
+                            f"A plugin with the name '{metadata.name}' "
+                            f"does already exist in the category '{cat}'!"
+                        )
+
+                    if self._get_precedence(other.directory) < precedence:
+                        self.log.warning(
+                            f"The plugin '{metadata.name}' in "
+                            f"'{entry.directory}' is shadowed by "
+                            f"'{other.directory}' in the category '{cat}'!"
+                        )
+                        continue
 
                 # add plugin to the category
-                plugin_classes[cat][plugin.metadata.name] = plugincls
+                plugin_classes[cat][metadata.name] = plugincls
+                owners[(cat, metadata.name)] = entry
 
         return plugin_classes
 
-    def discover(
+    def _get_scope(
         self,
-    ) -> None:
+        entry: PluginEntry,
+        scope: str = None,
+        **kwargs
+    ) -> InstanceScope:
         """
-        discover all plugins that are located in the plugins directory
-        and that do match the given subclass
+        returns the lifecycle scope of the plugin's managed instances,
+        i.e., the scope is created on first use
+
+        :param entry: registry entry of the plugin
+        :type entry: PluginEntry
+        :param scope: lifecycle scope, defaults to the manager's scope
+        :type scope: str, optional
+        :raises PluginManagerException: if the plugin does not define
+                                        exactly one plugin class
+        :return: lifecycle scope
+        :rtype: InstanceScope
         """
-        self.log.debug(
-            f"Discovering all plugins in '{self.plugins_directory}'... "
-        )
-        for fn in self.plugins_directory.glob("**/*.py"):
-            # derive from relative path the module name
-            module_name = (
-                fn.with_suffix("").relative_to(
-                    self.plugins_directory
-                ).as_posix()
-            ).replace("/", ".")
-
-            # load the module
-            load_module(module_name, fn)
-
-        # get all classes that are a subclass of the Plugin class
-        plugin_classes = [
-            plugincls
-            for plugincls in Plugin.__subclasses__()
-        ]
-        self.log.debug(
-            f"Found {len(plugin_classes)} plugins: "
-            f"{', '.join([p.__name__ for p in plugin_classes])}"
-        )
+        scope = scope or self.scope
+        assert scope in SCOPES
 
-    def pack(
+        plugin_name = entry.name
+        instance_scope = entry.scopes.get(scope)
+        if instance_scope is not None:
+            return instance_scope
+
+        with self._lock:
+            if scope in entry.scopes:
+                # created in the meantime
+                return entry.scopes[scope]
+
+            classes = [
+                plugincls
+                for plugincls in entry.classes
+                if issubclass(plugincls, self.subclass)
+            ]
+            if len(classes) != 1:
+                raise PluginManagerException(
+                    f"The plugin '{plugin_name}' must define exactly "
+                    f"one plugin class, but defines {len(classes)}!"
+                )
+
+            def factory(plugincls=classes[0]):
+                # init() is called once per instance
+                with tracer.span("Plugin.init", plugin=plugin_name):
+                    plugin = plugincls()
+                    if self.metrics is not None:
+                        self.metrics.instrument(plugin)
+
+                    plugin.init(**kwargs)
+
+                return plugin
+
+            instance_scope = (
+                PoolScope(factory, self.pool_size)
+                if scope == PoolScope.name else
+                SCOPES[scope](factory)
+            )
+            entry.scopes[scope] = instance_scope
+
+            return instance_scope
+
+    def get_plugin(
         self,
-        directory: Union[str, Path],
-        target_directory: Union[str, Path] = None,
-        force: bool = False
-    ) -> Path:
+        plugin_name: str,
+        category: str = None,
+        scope: str = None,
+        **kwargs
+    ) -> Plugin:
         """
-        pack plugin from given source directory and store the
-        resulting plugin package to the target directory or to the
-        repository directory, if target directory is not provided
+        returns the managed instance of the plugin with the given name for
+        the current caller, i.e., one instance per manager ("singleton"),
+        per thread ("thread") or per contextvars context ("context");
+        instances are created and initialized with the given keyword
+        arguments on first use; once the instance is not used anymore,
+        it is returned by release(), so that a reloaded or removed plugin
+        shuts down its instances
 
-        :param directory: plugin source directory
-        :type directory: Union[str, Path]
-        :param target_directory: target directory to which packed plugin
-                                 will be stored
-        :type target_directory: Union[str, Path]
-        :param force: if True, package will be installed even if it is already
-                      existing, default: False
-        :type force: bool
-        :return: filename of the packed plugin
-        :rtype: Path
+        :param plugin_name: plugin name
+        :type plugin_name: str
+        :param category: plugin's category
+        :type category: str
+        :param scope: lifecycle scope, defaults to the manager's scope
+        :type scope: str, optional
+        :raises PluginManagerException: if plugin is not discovered or
+                                        scope is "pool"
+        :return: initialized plugin instance
+        :rtype: Plugin
         """
-        return PluginPackage.pack(
-            directory=directory,
-            target_directory=(
-                target_directory or
-                self.plugins_repo_directory
-            ),
-            ext=self.plugin_ext,
-            force=force
-        )
+        if (scope or self.scope) == PoolScope.name:
+            raise PluginManagerException(
+                "Pooled instances must be returned, use checkout()!"
+            )
 
-    def info(self, plugin_filename: Union[str, Path]) -> dict:
+        entry = self._find_entry(plugin_name, category)
+        while not entry.retain():
+            # replaced in the meantime => use the current entry
+            entry = self._find_entry(plugin_name, category)
+
+        try:
+            return self._get_scope(entry, scope, **kwargs).acquire()
+
+        except BaseException:
+            self._release_entry(entry)
+            raise
+
+    def release(self, plugin: Plugin) -> None:
         """
-        get metadata information of the given plugin file
+        release an instance returned by get_plugin(), i.e., the instances
+        of a reloaded or removed plugin are shut down once all instances
+        returned before have been released
 
-        :param plugin_filename: plugin filename
-        :type plugin_name: Union[str, Path]
-        :return: metata of the plugin
-        :rtype: dict
+        :param plugin: plugin instance
+        :type plugin: Plugin
+        :raises PluginManagerException: if the instance has not been
+                                        returned by get_plugin()
         """
-        # find the plugin package
-        plugin_filename = self._find_plugin_package(plugin_filename)
+        with self._lock:
+            entries = list(self._retired) + list(self._registry.values())
 
-        return PluginPackage.info(plugin_filename)
+        for entry in entries:
+            if any(p is plugin for p in entry.instances):
+                self._release_entry(entry)
+                return
 
-    def install(
-        self,
-        plugin_filename: Union[str, Path],
-        force: bool = True
-    ) -> Path:
+        raise PluginManagerException(
+            f"The plugin '{type(plugin).__name__}' is not managed!"
+        )
+
+    def _retire(self, entry: PluginEntry) -> None:
         """
-        install plugin from given filename
+        shutdown the instances of a replaced or removed registry entry,
+        once they are not used anymore, i.e., the entry is kept until its
+        last caller has released it
 
-        :param plugin_filename: plugin filename
-        :type plugin_filename: Union[str, Path]
-        :param force: if True, package will be installed even if it has already
-                      been installed previously, default: False
-        :type force: bool
-        :return: installed plugin directory
+        :param entry: registry entry of the plugin
+        :type entry: PluginEntry
         """
-        # find the plugin package
-        plugin_filename = self._find_plugin_package(plugin_filename)
+        with self._lock:
+            self._retired.add(entry)
 
-        return PluginPackage.install(
-            plugin_filename=plugin_filename,
-            target_directory=self.plugins_directory,
-            use_category=self.use_category,
-            force=force
-        )
+        if entry.retire():
+            with self._lock:
+                self._retired.discard(entry)
 
-    def uninstall(
+    def _release_entry(self, entry: PluginEntry) -> None:
+        """
+        release a caller of the registry entry counted by retain()
+
+        :param entry: registry entry of the plugin
+        :type entry: PluginEntry
+        """
+        if entry.release():
+            with self._lock:
+                self._retired.discard(entry)
+
+    @contextlib.contextmanager
+    def checkout(
         self,
         plugin_name: str,
-        category: str = None
-    ) -> None:
+        category: str = None,
+        scope: str = None,
+        timeout: float = None,
+        **kwargs
+    ):
         """
-        uninstall the plugin with the given name
+        check out a managed instance of the plugin for the duration of the
+        with-block; in the "pool" scope, the instance is used exclusively
+        and returned to the pool afterwards
 
         :param plugin_name: plugin name
         :type plugin_name: str
         :param category: plugin's category
         :type category: str
+        :param scope: lifecycle scope, defaults to the manager's scope
+        :type scope: str, optional
+        :param timeout: time in seconds to wait for a pooled instance,
+                        defaults to None
+        :type timeout: float, optional
+        :raises PluginManagerException: if plugin is not discovered or no
+                                        pooled instance became available
+        """
+        entry = self._find_entry(plugin_name, category)
+        while not entry.retain():
+            # replaced in the meantime => use the current entry
+            entry = self._find_entry(plugin_name, category)
+
+        try:
+            instance_scope = self._get_scope(entry, scope, **kwargs)
+            with instance_scope.checkout(timeout) as plugin:
+                yield plugin
+
+        finally:
+            # a reloaded entry is shut down by its last caller
+            self._release_entry(entry)
+
+    def _scan_root(self, root: Path, registry: dict) -> list:
+        """
+        find the plugin directories in the given plugins directory and
+        read the metadata of plugins that have not been discovered yet
+
+        :param root: plugins directory
+        :type root: Path
+        :param registry: registry entries of the discovered plugins
+        :type registry: dict
+        :return: plugin directories with their metadata
+        :rtype: list
+        """
+        with tracer.span("glob", directory=root):
+            filenames = sorted(
+                root.glob(f"**/{Metadata.METADATA_FILENAME}")
+            )
+
+        plugins = []
+        for fn in filenames:
+            plugin_directory = fn.parent
+            entry = registry.get(plugin_directory)
+            plugins.append((
+                plugin_directory,
+                (
+                    entry.metadata
+                    if entry is not None else
+                    Metadata.create_from_directory(plugin_directory)
+                )
+            ))
+
+        return plugins
+
+    def _shadow(self, plugins: Iterable[tuple]) -> tuple:
+        """
+        resolve plugins with the same name, and category if categories
+        are used, i.e., a plugin shadows the plugins in plugins
+        directories of lower precedence, while plugins with the same name
+        in the same plugins directory are kept
+
+        :param plugins: plugin directories with their metadata in the
+                        order of the precedence of their plugins
+                        directories
+        :type plugins: Iterable[tuple]
+        :return: plugin directories with their metadata that are not
+                 shadowed and shadowing plugin directory by shadowed
+                 plugin directory
+        :rtype: tuple
+        """
+        owners, shadowed, result = {}, {}, []
+        for plugin_directory, metadata in plugins:
+            key = (
+                (metadata.category, metadata.name)
+                if self.use_category else
+                metadata.name
+            )
+            owner = owners.get(key)
+            if (owner is not None) and (
+                self._get_root(owner) != self._get_root(plugin_directory)
+            ):
+                # shadowed by a plugin of higher precedence
+                shadowed[plugin_directory] = owner
+                continue
+
+            owners.setdefault(key, plugin_directory)
+            result.append((plugin_directory, metadata))
+
+        return result, shadowed
+
+    def _shared_locks(self, roots: list) -> contextlib.ExitStack:
+        """
+        returns a context manager holding the shared locks of the given
+        plugins directories, so that other processes do not install or
+        remove plugins in the meantime
+
+        :param roots: plugins directories
+        :type roots: list
+        :return: context manager
+        :rtype: contextlib.ExitStack
+        """
+        stack = contextlib.ExitStack()
+        try:
+            for root in roots:
+                stack.enter_context(FileLock(root).shared())
+
+        except BaseException:
+            stack.close()
+            raise
+
+        return stack
+
+    def _get_generations(self) -> dict:
+        """
+        returns the stamps of the generation counters of all plugins
+        directories, i.e., a single stat per plugins directory
+
+        :return: stamp by plugins directory
+        :rtype: dict
+        """
+        return {
+            root: GenerationCounter(root).stamp()
+            for root in self._plugin_directories
+        }
+
+    def has_changed(self) -> bool:
+        """
+        checks cheaply if plugins have been installed or removed in any
+        plugins directory since the last discovery, e.g., by another
+        process, without scanning the plugins directories
+
+        :return: True, if discovery is needed
+        :rtype: bool
+        """
+        return (
+            (self._generations is None) or
+            (self._generations != self._get_generations())
+        )
+
+    def discover_if_changed(self) -> bool:
+        """
+        discover the plugins only if plugins have been installed or
+        removed since the last discovery
+
+        :return: True, if plugins have been discovered
+        :rtype: bool
+        """
+        if not self.has_changed():
+            return False
+
+        self.discover()
+        return True
+
+    @tracer.traced("PluginManager.discover")
+    def discover(
+        self,
+    ) -> None:
+        """
+        discover all plugins that are located in the plugins directories
+        and that do match the given subclass; plugins that have already
+        been discovered are kept, use reload() for changed plugins
+
+        the plugins directories are scanned in parallel and a plugin
+        shadows plugins with the same name, and category if categories
+        are used, in plugins directories of lower precedence
+        """
+        self.log.debug(
+            f"Discovering all plugins in "
+            f"{', '.join(map(str, self._plugin_directories))}... "
+        )
+        with self._lock:
+            roots = [
+                root for root in self._plugin_directories if root.exists()
+            ]
+
+            # no process modifies the plugins directories while scanning
+            with self._shared_locks(roots):
+                generations = self._get_generations()
+                if len(roots) > 1:
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    with ThreadPoolExecutor(
+                        max_workers=len(roots)
+                    ) as executor:
+                        scans = list(executor.map(
+                            self._scan_root, roots,
+                            [self._registry] * len(roots)
+                        ))
+
+                else:
+                    scans = [
+                        self._scan_root(root, self._registry)
+                        for root in roots
+                    ]
+
+                plugins, shadowed = self._shadow(
+                    plugin for plugins in scans for plugin in plugins
+                )
+                registry = {}
+                for plugin_directory, metadata in plugins:
+                    entry = self._registry.get(plugin_directory)
+                    if entry is None:
+                        # plugin not yet loaded
+                        entry = self._load_plugin(
+                            plugin_directory, metadata=metadata
+                        )
+
+                    registry[plugin_directory] = entry
+
+            # plugins that have been removed, replaced or are shadowed now
+            dropped = [
+                entry
+                for directory, entry in self._registry.items()
+                if registry.get(directory) is not entry
+            ]
+
+            # swap the registry at once
+            self._swap_registry(registry, shadowed)
+            self._generations = generations
+
+        for entry in dropped:
+            self._drop_entry(entry)
+
+        if shadowed:
+            self.log.debug(
+                "Shadowed plugins: " + ", ".join(
+                    f"'{directory}' by '{owner}'"
+                    for directory, owner in shadowed.items()
+                )
+            )
+
+        self.log.debug(
+            f"Found {len(registry)} plugins: "
+            f"{', '.join([entry.name for entry in registry.values()])}"
+        )
+
+    def _reload_entry(self, entry: PluginEntry) -> PluginEntry:
+        """
+        execute the modules of the given plugin again; if loading fails,
+        the old modules are restored
+
+        :param entry: registry entry of the plugin
+        :type entry: PluginEntry
+        :return: new registry entry of the plugin
+        :rtype: PluginEntry
+        """
+        self.log.debug(f"Reloading plugin '{entry.name}'...")
+        if not entry.loaded:
+            # modules have not been loaded yet => read the metadata again
+            return self._load_plugin(entry.directory, lazy=True)
+
+        # evict the plugin's modules
+        old_modules = {
+            module_name: sys.modules[module_name]
+            for module_name in entry.modules
+            if module_name in sys.modules
+        }
+        for module_name in old_modules:
+            unload_module(module_name)
+
+        try:
+            return self._load_plugin(entry.directory, lazy=False)
+
+        except Exception:
+            # keep the old version of the plugin
+            for module_name in entry.modules:
+                sys.modules.pop(module_name, None)
+
+            sys.modules.update(old_modules)
+            raise
+
+    def _drop_entry(self, entry: PluginEntry) -> None:
+        """
+        shutdown the instances, once they are not used anymore, and evict
+        the modules of a plugin whose registry entry has been removed
+
+        :param entry: registry entry of the plugin
+        :type entry: PluginEntry
+        """
+        self._retire(entry)
+        for module_name in entry.drop():
+            filename = getattr(sys.modules.get(module_name), "__file__", None)
+            if (filename is not None) and (
+                entry.directory not in Path(filename).parents
+            ):
+                # module of the plugin with the same name in another
+                # plugins directory, e.g., of the shadowing plugin
+                continue
+
+            unload_module(module_name)
+
+    @tracer.traced("PluginManager.unload")
+    def unload(self, plugin_name: str, category: str = None) -> dict:
+        """
+        unload the plugin with the given name from the process, i.e., its
+        instances are shut down, its modules and registry entry are
+        removed and it is verified that the modules and classes are
+        garbage collected
+
+        the reclaimed memory is measured, if tracemalloc is tracing,
+        otherwise it is estimated from the size of the modules
+
+        :param plugin_name: plugin name
+        :type plugin_name: str
+        :param category: plugin's category
+        :type category: str
+        :raises PluginManagerException: if plugin is not discovered
+        :return: report with the number of modules and classes, the
+                 reclaimed bytes and the names of objects that are still
+                 referenced elsewhere
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._find_entry(plugin_name, category)
+
+            # remove the registry entry at once
+            registry = dict(self._registry)
+            del registry[entry.directory]
+            self._swap_registry(registry)
+
+        self.log.debug(f"Unloading plugin '{entry.name}'...")
+
+        # modules of lazy entries may have never been loaded
+        modules, classes = (
+            (entry.modules, entry.classes) if entry.loaded else ([], [])
+        )
+        measured = tracemalloc.is_tracing()
+        if measured:
+            gc.collect()
+            size = tracemalloc.get_traced_memory()[0]
+
+        else:
+            size = sum(map(estimate_module_size, modules))
+
+        refs = {
+            f"{obj.__module__}.{obj.__qualname__}": weakref.ref(obj)
+            for obj in classes
+        }
+        refs.update({
+            module_name: weakref.ref(sys.modules[module_name])
+            for module_name in modules
+            if module_name in sys.modules
+        })
+        report = {
+            "name": entry.name,
+            "modules": len(modules),
+            "classes": len(classes),
+        }
+        del modules, classes
+
+        self._drop_entry(entry)
+        del entry
+
+        # collect reference cycles, e.g., between classes and functions
+        gc.collect()
+        leaked = sorted(
+            name for name, ref in refs.items() if ref() is not None
+        )
+        if leaked:
+            self.log.warning(
+                f"Objects of plugin '{report['name']}' are still "
+                f"referenced: {', '.join(leaked)}"
+            )
+
+        if measured:
+            size = max(0, size - tracemalloc.get_traced_memory()[0])
+
+        elif leaked:
+            # memory of referenced objects is not reclaimed
+            size = 0
+
+        report.update({
+            "collected": not leaked,
+            "leaked": leaked,
+            "bytes_reclaimed": size,
+            "measured": measured
+        })
+
+        return report
+
+    @tracer.traced("PluginManager.reload")
+    def reload(self, plugin_name: str, category: str = None) -> PluginEntry:
+        """
+        reload the plugin with the given name, i.e., its modules are
+        executed again and its registry entry is replaced at once;
+        checked-out instances are used until the end of their with-block,
+        i.e., the old instances are shut down once the last one has been
+        returned
+
+        :param plugin_name: plugin name
+        :type plugin_name: str
+        :param category: plugin's category
+        :type category: str
+        :raises PluginManagerException: if plugin is not discovered
+        :return: new registry entry of the plugin
+        :rtype: PluginEntry
+        """
+        with self._lock:
+            entry = self._find_entry(plugin_name, category)
+            new_entry = self._reload_entry(entry)
+
+            # swap the registry at once
+            registry = dict(self._registry)
+            registry[entry.directory] = new_entry
+            self._swap_registry(registry)
+
+        # shutdown the old instances, once they are not used anymore
+        self._retire(entry)
+
+        return new_entry
+
+    @tracer.traced("PluginManager.refresh")
+    def refresh(self, plugin_directories: Iterable[Union[str, Path]]) -> list:
+        """
+        incrementally refresh the given plugin directories, i.e., new
+        plugins are loaded, changed plugins are reloaded and removed
+        plugins are dropped, while all other plugins are untouched;
+        plugins are shadowed by precedence as by discover(), i.e., a new
+        plugin may shadow a discovered plugin and removing a plugin
+        loads the plugin it has shadowed
+
+        :param plugin_directories: changed plugin directories
+        :type plugin_directories: Iterable[Union[str, Path]]
+        :return: names of the refreshed plugins
+        :rtype: list
+        """
+        names, replaced, removed = [], [], []
+        with self._lock:
+            old_registry = self._registry
+            candidates = {}
+            for directory, owner in self._snapshot.shadowed.items():
+                try:
+                    # shadowed plugins have the same name as their owners
+                    candidates[directory] = (
+                        old_registry[owner].metadata
+                        if owner in old_registry else
+                        Metadata.create_from_directory(directory)
+                    )
+
+                except Exception as e:
+                    self.log.error(
+                        f"Refreshing plugin in '{directory}' failed: {e!r}"
+                    )
+
+            candidates.update({
+                directory: entry.metadata
+                for directory, entry in old_registry.items()
+            })
+
+            changed = set()
+            for directory in sorted(map(ensure_path, plugin_directories)):
+                try:
+                    self._get_root(directory)
+                    if directory.joinpath(
+                        Metadata.METADATA_FILENAME
+                    ).exists():
+                        candidates[directory] = (
+                            Metadata.create_from_directory(directory)
+                        )
+
+                    elif candidates.pop(directory, None) is None:
+                        continue
+
+                except Exception as e:
+                    self.log.error(
+                        f"Refreshing plugin in '{directory}' failed: {e!r}"
+                    )
+                    continue
+
+                changed.add(directory)
+
+            plugins, shadowed = self._shadow(sorted(
+                candidates.items(),
+                key=lambda item: (self._get_precedence(item[0]), item[0])
+            ))
+
+            registry = {}
+            for directory, metadata in plugins:
+                entry = old_registry.get(directory)
+                try:
+                    if entry is None:
+                        # new plugin or no longer shadowed
+                        registry[directory] = self._load_plugin(
+                            directory, metadata=metadata
+                        )
+
+                    elif directory in changed:
+                        # changed plugin
+                        registry[directory] = self._reload_entry(entry)
+                        replaced.append(entry)
+
+                    else:
+                        registry[directory] = entry
+                        continue
+
+                except Exception as e:
+                    self.log.error(
+                        f"Refreshing plugin in '{directory}' failed: {e!r}"
+                    )
+                    if entry is not None:
+                        # keep the old version of the plugin
+                        registry[directory] = entry
+
+                    continue
+
+                names.append(registry[directory].name)
+
+            for directory, entry in old_registry.items():
+                if directory not in registry:
+                    # removed or shadowed plugin
+                    removed.append(entry)
+                    names.append(entry.name)
+
+            # swap the registry at once
+            self._swap_registry(registry, shadowed)
+
+        for entry in replaced:
+            # shutdown the old instances, once they are not used anymore
+            self._retire(entry)
+
+        for entry in removed:
+            self._drop_entry(entry)
+
+        return names
+
+    def watch(
+        self,
+        interval: float = 1.0,
+        use_hash: bool = False,
+        backend: str = None,
+        debounce: float = 0.1
+    ) -> "PluginWatcher":
+        """
+        start a watcher that subscribes to changes of all plugins
+        directories and refreshes the changed plugins in the background
+
+        :param interval: polling interval in seconds, defaults to 1.0
+        :type interval: float, optional
+        :param use_hash: if True, the polling backend detects changes by
+                         the hash of the files' content instead of their
+                         modification time and size, defaults to False
+        :type use_hash: bool, optional
+        :param backend: "inotify" or "polling", defaults to inotify, if
+                        available
+        :type backend: str, optional
+        :param debounce: time in seconds without further changes until
+                         changes are processed, defaults to 0.1
+        :type debounce: float, optional
+        :return: started plugin watcher
+        :rtype: PluginWatcher
+        """
+        from powerstrip.watcher import PluginWatcher
+
+        return PluginWatcher(
+            self, interval=interval, use_hash=use_hash, backend=backend,
+            debounce=debounce
+        ).start()
+
+    @tracer.traced("PluginManager.pack")
+    def pack(
+        self,
+        directory: Union[str, Path],
+        target_directory: Union[str, Path] = None,
+        force: bool = False
+    ) -> Path:
+        """
+        pack plugin from given source directory and store the
+        resulting plugin package to the target directory or to the
+        repository directory, if target directory is not provided
+
+        :param directory: plugin source directory
+        :type directory: Union[str, Path]
+        :param target_directory: target directory to which packed plugin
+                                 will be stored
+        :type target_directory: Union[str, Path]
+        :param force: if True, package will be installed even if it is already
+                      existing, default: False
+        :type force: bool
+        :return: filename of the packed plugin
+        :rtype: Path
+        """
+        plugin_filename = PluginPackage.pack(
+            directory=directory,
+            target_directory=(
+                target_directory or
+                self.plugins_repo_directory
+            ),
+            ext=self.plugin_ext,
+            force=force
+        )
+
+        repository = self._repository
+        if (
+            (repository is not None) and
+            (plugin_filename.parent.samefile(repository.directory))
+        ):
+            # keep the search index up to date
+            repository.add(plugin_filename)
+
+        return plugin_filename
+
+    @property
+    def repository(self) -> "RepositoryIndex":
+        """
+        returns the index of the plugin packages in the repository
+        directory, which is created on first use
+
+        :return: repository index
+        :rtype: RepositoryIndex
+        """
+        with self._lock:
+            repository = self._repository
+            if (
+                (repository is None) or
+                (repository.directory != self.plugins_repo_directory) or
+                (repository.ext != self.plugin_ext)
+            ):
+                from powerstrip.repository import RepositoryIndex
+
+                repository = self._repository = RepositoryIndex(
+                    self.plugins_repo_directory, self.plugin_ext
+                )
+
+            return repository
+
+    @property
+    def remote(self) -> "RepositoryClient":
+        """
+        returns the client of the repository server, which is created on
+        first use; downloaded packages are cached in the ".cache"
+        subdirectory of the repository directory
+
+        :return: repository client or None, if no URL is given
+        :rtype: RepositoryClient
+        """
+        with self._lock:
+            if self.plugins_repo_url is None:
+                return None
+
+            remote = self._remote
+            if (
+                (remote is None) or
+                (remote.url != self.plugins_repo_url.rstrip("/"))
+            ):
+                from powerstrip.repository import RepositoryClient
+
+                remote = self._remote = RepositoryClient(
+                    self.plugins_repo_url,
+                    cache_directory=self.plugins_repo_directory.joinpath(
+                        ".cache"
+                    )
+                )
+
+            return remote
+
+    @tracer.traced("PluginManager.mirror")
+    def mirror(
+        self,
+        source: Union[str, Path],
+        jobs: int = 4,
+        delete: bool = False,
+        dry_run: bool = False
+    ) -> "MirrorResult":
+        """
+        mirror the packages of another repository into the repository
+        directory, i.e., only missing or changed packages are transferred
+
+        :param source: repository directory or URL of a repository server
+        :type source: Union[str, Path]
+        :param jobs: number of parallel transfers, defaults to 4
+        :type jobs: int, optional
+        :param delete: if True, packages that are not in the source are
+                       removed, defaults to False
+        :type delete: bool, optional
+        :param dry_run: if True, only the differences are determined,
+                        defaults to False
+        :type dry_run: bool, optional
+        :return: transferred, removed and failed packages
+        :rtype: MirrorResult
+        """
+        from powerstrip.repository import RepositoryMirror
+
+        return RepositoryMirror(
+            source, self.repository, jobs=jobs, delete=delete,
+            ext=self.plugin_ext
+        ).run(dry_run=dry_run)
+
+    def _get_installed(self) -> dict:
+        """
+        returns the installed plugins, which are not shadowed by plugins
+        in plugins directories of higher precedence
+
+        :return: plugin directory and metadata by plugin name, or category
+                 and name if categories are used
+        :rtype: dict
+        """
+        installed = {}
+        for root in self._plugin_directories:
+            if not root.exists():
+                continue
+
+            for plugin_directory, metadata in self._scan_root(
+                root, self._registry
+            ):
+                key = (
+                    (metadata.category, metadata.name)
+                    if self.use_category else
+                    metadata.name
+                )
+                installed.setdefault(key, (plugin_directory, metadata))
+
+        return installed
+
+    @tracer.traced("PluginManager.outdated")
+    def outdated(self, prereleases: bool = False) -> dict:
+        """
+        returns the installed plugins for which a newer version is in the
+        repository directory or on the repository server, which is decided
+        in a single pass over their indexes, i.e., without opening any
+        package
+
+        :param prereleases: if True, prereleases are newer versions as
+                            well, defaults to False
+        :type prereleases: bool, optional
+        :return: installed version, latest version and package filename
+                 by plugin name
+        :rtype: dict
+        """
+        installed = self._get_installed()
+
+        packages = {}
+        if self.remote is not None:
+            packages.update(self.remote.index())
+
+        # local packages are preferred
+        self.repository.update()
+        packages.update(self.repository.packages)
+
+        latest = {}
+        for filename, package in packages.items():
+            metadata = package["metadata"]
+            key = (
+                (metadata["category"], metadata["name"])
+                if self.use_category else
+                metadata["name"]
+            )
+            if key not in installed:
+                continue
+
+            try:
+                version = SemVer.create_from_str(metadata["version"])
+
+            except (KeyError, TypeError):
+                # unknown version
+                continue
+
+            if version.prerelease and not prereleases:
+                continue
+
+            if (key not in latest) or (version > latest[key][0]):
+                latest[key] = (version, filename)
+
+        return {
+            installed[key][1].name: (
+                installed[key][1].version, version, filename
+            )
+            for key, (version, filename) in latest.items()
+            if version > installed[key][1].version
+        }
+
+    @tracer.traced("PluginManager.upgrade_all")
+    def upgrade_all(self, jobs: int = 4, prereleases: bool = False) -> dict:
+        """
+        upgrade all outdated plugins, i.e., the latest versions are
+        fetched and installed concurrently, while the registry is
+        refreshed once at the end; plugins that have not been discovered
+        are found by the next discovery
+
+        :param jobs: number of concurrent upgrades, defaults to 4
+        :type jobs: int, optional
+        :param prereleases: if True, plugins are upgraded to prereleases
+                            as well, defaults to False
+        :type prereleases: bool, optional
+        :raises PluginManagerException: if any plugin is not upgraded
+        :return: installed plugin directory by plugin name
+        :rtype: dict
+        """
+        assert isinstance(jobs, int) and (jobs > 0)
+
+        def upgrade(filename: str) -> Path:
+            # installations are serialized by the lock of the directory
+            return PluginPackage.install(
+                plugin_filename=self._find_plugin_package(filename),
+                target_directory=self.plugins_directory,
+                use_category=self.use_category,
+                force=True
+            )
+
+        outdated = self.outdated(prereleases=prereleases)
+        if not outdated:
+            return {}
+
+        self.log.debug(f"Upgrading {len(outdated)} plugins...")
+        from concurrent.futures import ThreadPoolExecutor
+
+        upgraded, failed = {}, {}
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                name: executor.submit(upgrade, filename)
+                for name, (_, _, filename) in outdated.items()
+            }
+            for name, future in futures.items():
+                try:
+                    upgraded[name] = future.result()
+
+                except Exception as e:
+                    self.log.error(f"Upgrading '{name}' failed: {e!r}")
+                    failed[name] = e
+
+        # reload the discovered plugins at once
+        self.refresh([
+            directory
+            for directory in upgraded.values()
+            if directory in self._registry
+        ])
+
+        if failed:
+            raise PluginManagerException(
+                f"Upgrading {', '.join(sorted(failed))} failed!"
+            )
+
+        return upgraded
+
+    @tracer.traced("PluginManager.collect_garbage")
+    def collect_garbage(
+        self,
+        keep_last: int = None,
+        max_age: float = None,
+        dry_run: bool = True
+    ) -> list:
+        """
+        remove old versions of the packages in the repository directory,
+        while the packages of installed plugins are always kept, see
+        RepositoryIndex.collect_garbage
+
+        :param keep_last: number of latest versions that are kept per
+                          plugin, defaults to None
+        :type keep_last: int, optional
+        :param max_age: packages modified within the given seconds are
+                        kept, defaults to None
+        :type max_age: float, optional
+        :param dry_run: if True, the packages are not removed,
+                        defaults to True
+        :type dry_run: bool, optional
+        :return: filenames of the removed packages
+        :rtype: list
+        """
+        installed = [
+            (metadata.name, metadata.version)
+            for root in self._plugin_directories
+            if root.exists()
+            for _, metadata in self._scan_root(root, self._registry)
+        ]
+
+        return self.repository.collect_garbage(
+            keep_last=keep_last, max_age=max_age, keep=installed,
+            dry_run=dry_run
+        )
+
+    @tracer.traced("PluginManager.search")
+    def search(
+        self,
+        query: str = "",
+        category: str = None,
+        tags: Iterable[str] = None,
+        limit: int = None,
+        facets: bool = True,
+        update: bool = True
+    ) -> "SearchResult":
+        """
+        search the plugin packages of the repository directory by name,
+        description, author, tags and category; terms can be restricted
+        to a field by "field:term" and terms ending with "*" are prefix
+        queries, e.g., "tags:csv export*"
+
+        :param query: search query, defaults to "" for all packages
+        :type query: str, optional
+        :param category: category the packages must match, defaults to None
+        :type category: str, optional
+        :param tags: tags the packages must all match, defaults to None
+        :type tags: Iterable[str], optional
+        :param limit: maximum number of hits, defaults to None
+        :type limit: int, optional
+        :param facets: if True, the matching packages are counted per
+                       category and tag, defaults to True
+        :type facets: bool, optional
+        :param update: if True, the index is updated before, if packages
+                       have been added or removed, defaults to True
+        :type update: bool, optional
+        :return: hits ranked by version, latest first, and facet counts
+        :rtype: SearchResult
+        """
+        return self.repository.search(
+            query=query, category=category, tags=tags, limit=limit,
+            facets=facets, update=update
+        )
+
+    @tracer.traced("PluginManager.info")
+    def info(self, plugin_filename: Union[str, Path]) -> dict:
+        """
+        get metadata information of the given plugin file
+
+        :param plugin_filename: plugin filename
+        :type plugin_name: Union[str, Path]
+        :return: metata of the plugin
+        :rtype: dict
+        """
+        try:
+            # find the plugin package
+            plugin_filename = self._find_plugin_package(
+                plugin_filename, download=False
+            )
+
+        except PluginManagerException:
+            if self.remote is None:
+                raise
+
+            # read only the metadata of the remote plugin package
+            return self.remote.info(self._add_plugin_ext(plugin_filename).name)
+
+        return PluginPackage.info(plugin_filename)
+
+    @tracer.traced("PluginManager.install")
+    def install(
+        self,
+        plugin_filename: Union[str, Path],
+        force: bool = True
+    ) -> Path:
+        """
+        install plugin from given filename
+
+        :param plugin_filename: plugin filename
+        :type plugin_filename: Union[str, Path]
+        :param force: if True, package will be installed even if it has already
+                      been installed previously, default: False
+        :type force: bool
+        :return: installed plugin directory
+        """
+        # find the plugin package
+        plugin_filename = self._find_plugin_package(plugin_filename)
+
+        # discovery never sees a partially installed plugin, neither in
+        # this process nor in other processes
+        with self._lock:
+            return PluginPackage.install(
+                plugin_filename=plugin_filename,
+                target_directory=self.plugins_directory,
+                use_category=self.use_category,
+                force=force
+            )
+
+    @tracer.traced("PluginManager.uninstall")
+    def uninstall(
+        self,
+        plugin_name: str,
+        category: str = None
+    ) -> None:
+        """
+        uninstall the plugin with the given name
+
+        :param plugin_name: plugin name
+        :type plugin_name: str
+        :param category: plugin's category
+        :type category: str
+        """
+        with self._lock:
+            if any(
+                (entry.name == plugin_name) and
+                (category in (None, entry.category))
+                for entry in self._registry.values()
+            ):
+                # remove the plugin from the process
+                self.unload(plugin_name, category)
+
+            PluginPackage.uninstall(
+                plugin_name=plugin_name,
+                target_directory=self.plugins_directory,
+                category=category
+            )
+
+    def create_process_pool(
+        self,
+        plugin_names: Iterable[str] = None,
+        size: int = None,
+        affinity: dict = None,
+        init_kwargs: dict = None,
+        mp_context: str = None,
+        shared_memory: bool = False,
+        shared_memory_threshold: int = 65536
+    ) -> "PluginProcessPool":
+        """
+        create and start a pool of worker processes that host the given
+        plugins, so that their run() calls are executed on multiple cores
+
+        :param plugin_names: names of the plugins hosted by the pool,
+                             defaults to all discovered plugins
+        :type plugin_names: Iterable[str], optional
+        :param size: number of worker processes, defaults to the
+                     number of CPUs
+        :type size: int, optional
+        :param affinity: maps plugin names to a worker index or a list of
+                         worker indexes; plugins without affinity are
+                         hosted by all workers
+        :type affinity: dict, optional
+        :param init_kwargs: keyword arguments for init() per plugin name
+        :type init_kwargs: dict, optional
+        :param mp_context: multiprocessing start method, defaults to the
+                           platform's default
+        :type mp_context: str, optional
+        :param shared_memory: if True, large buffers are passed in shared
+                              memory segments instead of being pickled,
+                              defaults to False
+        :type shared_memory: bool, optional
+        :param shared_memory_threshold: minimum payload size in bytes for
+                                        the shared memory transport,
+                                        defaults to 64 KiB
+        :type shared_memory_threshold: int, optional
+        :return: started plugin process pool
+        :rtype: PluginProcessPool
+        """
+        if plugin_names is None:
+            # host all discovered plugins
+            plugin_names = [
+                name
+                for category in self.get_plugin_classes().values()
+                for name in category
+            ]
+
+        from powerstrip.processpool import PluginProcessPool
+
+        return PluginProcessPool(
+            plugins_directory=self.plugins_directories,
+            plugin_names=plugin_names,
+            size=size,
+            affinity=affinity,
+            subclass=self.subclass,
+            use_category=self.use_category,
+            init_kwargs=init_kwargs,
+            mp_context=mp_context,
+            shared_memory=shared_memory,
+            shared_memory_threshold=shared_memory_threshold
+        ).start()
+
+    def create_batch_dispatcher(
+        self,
+        max_batch_size: int = 64,
+        max_latency: float = 0.01
+    ) -> "BatchDispatcher":
+        """
+        create a dispatcher that groups items submitted for plugins into
+        size- or time-bounded micro-batches that are processed by the
+        plugins' run_batch()
+
+        :param max_batch_size: maximum number of items per batch,
+                               defaults to 64
+        :type max_batch_size: int, optional
+        :param max_latency: maximum time in seconds an item waits for its
+                            batch to be dispatched, defaults to 0.01
+        :type max_latency: float, optional
+        :return: batch dispatcher
+        :rtype: BatchDispatcher
+        """
+        from powerstrip.batching import BatchDispatcher
+
+        return BatchDispatcher(
+            max_batch_size=max_batch_size, max_latency=max_latency
+        )
+
+    def create_pipeline(
+        self,
+        stages: list = None,
+        categories: list = None,
+        maxsize: int = 64,
+        parallelism: Union[int, list] = 1
+    ) -> "Pipeline":
+        """
+        create a streaming pipeline of plugins that are either given as
+        explicit list or ordered by the given categories; plugins given by
+        name or category are instantiated and initialized, and they are
+        shut down when the pipeline is closed
+
+        :param stages: plugin instances or plugin names in the stage order
+        :type stages: list, optional
+        :param categories: categories in the stage order, plugins of the
+                           same category are ordered by name
+        :type categories: list, optional
+        :param maxsize: maximum number of items between two stages,
+                        defaults to 64
+        :type maxsize: int, optional
+        :param parallelism: number of concurrent workers for all stages or
+                            per stage, defaults to 1
+        :type parallelism: Union[int, list], optional
+        :raises PluginManagerException: if a plugin is unknown
+        :return: pipeline
+        :rtype: Pipeline
+        """
+        assert (stages is None) != (categories is None)
+
+        plugin_classes = {
+            name: plugincls
+            for category in self.get_plugin_classes().values()
+            for name, plugincls in category.items()
+        }
+
+        if categories is not None:
+            # all plugins of the categories ordered by name
+            stages = []
+            for category in categories:
+                stages.extend(sorted(
+                    name
+                    for c in self.get_plugin_classes(
+                        category=category
+                    ).values()
+                    for name in c
+                ))
+
+        plugins, owned = [], []
+        try:
+            for stage in stages:
+                if isinstance(stage, Plugin):
+                    plugins.append(stage)
+                    continue
+
+                if stage not in plugin_classes:
+                    raise PluginManagerException(
+                        f"The plugin '{stage}' is not installed!"
+                    )
+
+                # stages are created like managed instances
+                plugin = plugin_classes[stage]()
+                if self.metrics is not None:
+                    self.metrics.instrument(plugin)
+
+                if not isinstance(plugin, AsyncPlugin):
+                    # async plugins must be initialized by init_async()
+                    with tracer.span("Plugin.init", plugin=stage):
+                        plugin.init()
+
+                plugins.append(plugin)
+                owned.append(plugin)
+
+        except BaseException:
+            # shutdown the stages that have been initialized already
+            for plugin in owned:
+                if isinstance(plugin, AsyncPlugin):
+                    # not initialized yet
+                    continue
+
+                try:
+                    plugin.shutdown()
+
+                except Exception as e:
+                    self.log.error(
+                        f"Shutting down the plugin "
+                        f"'{plugin.__class__.__name__}' failed: {e!r}"
+                    )
+
+            raise
+
+        from powerstrip.pipeline import Pipeline
+
+        return Pipeline(
+            plugins, maxsize=maxsize, parallelism=parallelism, owned=owned
+        )
+
+    async def _run_in_executor(self, func: callable, *args, **kwargs):
+        """
+        run the given blocking function in the default executor of the
+        event loop to avoid blocking the loop by file and zip operations
+
+        :param func: blocking function
+        :type func: callable
+        :return: return value of the function
+        """
+        loop = asyncio.get_event_loop()
+
+        return await loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs)
+        )
+
+    async def discover_async(self) -> None:
+        """
+        asynchronous variant of discover()
+        """
+        await self._run_in_executor(self.discover)
+
+    async def pack_async(
+        self,
+        directory: Union[str, Path],
+        target_directory: Union[str, Path] = None,
+        force: bool = False
+    ) -> Path:
+        """
+        asynchronous variant of pack()
+
+        :param directory: plugin source directory
+        :type directory: Union[str, Path]
+        :param target_directory: target directory to which packed plugin
+                                 will be stored
+        :type target_directory: Union[str, Path]
+        :param force: if True, package will be installed even if it is already
+                      existing, default: False
+        :type force: bool
+        :return: filename of the packed plugin
+        :rtype: Path
+        """
+        return await self._run_in_executor(
+            self.pack,
+            directory=directory,
+            target_directory=target_directory,
+            force=force
+        )
+
+    async def info_async(self, plugin_filename: Union[str, Path]) -> Metadata:
+        """
+        asynchronous variant of info()
+
+        :param plugin_filename: plugin filename
+        :type plugin_name: Union[str, Path]
+        :return: metata of the plugin
+        :rtype: Metadata
+        """
+        return await self._run_in_executor(self.info, plugin_filename)
+
+    async def install_async(
+        self,
+        plugin_filename: Union[str, Path],
+        force: bool = True
+    ) -> Path:
+        """
+        asynchronous variant of install()
+
+        :param plugin_filename: plugin filename
+        :type plugin_filename: Union[str, Path]
+        :param force: if True, package will be installed even if it has already
+                      been installed previously, default: False
+        :type force: bool
+        :return: installed plugin directory
+        """
+        return await self._run_in_executor(
+            self.install, plugin_filename=plugin_filename, force=force
+        )
+
+    async def _gather(
+        self,
+        plugins: Iterable[Plugin],
+        method: str,
+        *args,
+        timeout: float = None,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> list:
+        """
+        call the given lifecycle method of all plugins concurrently;
+        coroutine methods of AsyncPlugin are awaited directly, while
+        the methods of synchronous plugins are run in the executor
+
+        if the timeout is exceeded or the calling task is cancelled,
+        all pending calls are cancelled
+
+        :param plugins: plugin instances
+        :type plugins: Iterable[Plugin]
+        :param method: name of the lifecycle method, i.e., init, run
+                       or shutdown
+        :type method: str
+        :param timeout: timeout in seconds, defaults to None
+        :type timeout: float, optional
+        :param return_exceptions: if True, exceptions are returned as
+                                  results instead of being raised
+        :type return_exceptions: bool, optional
+        :return: results of the calls in the order of the plugins
+        :rtype: list
+        """
+        assert method in ("init", "run", "shutdown")
+
+        aws = []
+        for plugin in plugins:
+            func = getattr(plugin, method)
+            if isinstance(plugin, AsyncPlugin):
+                # coroutine of the async plugin
+                aws.append(func(*args, **kwargs))
+
+            else:
+                # blocking method of synchronous plugin
+                aws.append(self._run_in_executor(func, *args, **kwargs))
+
+        with tracer.span(f"PluginManager.{method}_async", plugins=len(aws)):
+            return await asyncio.wait_for(
+                asyncio.gather(*aws, return_exceptions=return_exceptions),
+                timeout=timeout
+            )
+
+    async def init_async(
+        self,
+        plugins: Iterable[Plugin],
+        timeout: float = None,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> list:
+        """
+        initialize all given plugins concurrently
+
+        :param plugins: plugin instances
+        :type plugins: Iterable[Plugin]
+        :param timeout: timeout in seconds, defaults to None
+        :type timeout: float, optional
+        :param return_exceptions: if True, exceptions are returned as
+                                  results instead of being raised
+        :type return_exceptions: bool, optional
+        :return: results of init() in the order of the plugins
+        :rtype: list
+        """
+        return await self._gather(
+            plugins, "init", timeout=timeout,
+            return_exceptions=return_exceptions, **kwargs
+        )
+
+    async def run_async(
+        self,
+        plugins: Iterable[Plugin],
+        *args,
+        timeout: float = None,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> list:
+        """
+        run all given plugins concurrently
+
+        :param plugins: plugin instances
+        :type plugins: Iterable[Plugin]
+        :param timeout: timeout in seconds, defaults to None
+        :type timeout: float, optional
+        :param return_exceptions: if True, exceptions are returned as
+                                  results instead of being raised
+        :type return_exceptions: bool, optional
+        :return: results of run() in the order of the plugins
+        :rtype: list
+        """
+        return await self._gather(
+            plugins, "run", *args, timeout=timeout,
+            return_exceptions=return_exceptions, **kwargs
+        )
+
+    async def shutdown_async(
+        self,
+        plugins: Iterable[Plugin],
+        timeout: float = None,
+        return_exceptions: bool = False
+    ) -> list:
+        """
+        shutdown all given plugins concurrently
+
+        :param plugins: plugin instances
+        :type plugins: Iterable[Plugin]
+        :param timeout: timeout in seconds, defaults to None
+        :type timeout: float, optional
+        :param return_exceptions: if True, exceptions are returned as
+                                  results instead of being raised
+        :type return_exceptions: bool, optional
+        :return: results of shutdown() in the order of the plugins
+        :rtype: list
         """
-        PluginPackage.uninstall(
-            plugin_name=plugin_name,
-            target_directory=self.plugins_directory,
-            category=category
+        return await self._gather(
+            plugins, "shutdown", timeout=timeout,
+            return_exceptions=return_exceptions
         )
 
     def __repr__(self) -> str:
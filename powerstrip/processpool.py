@@ -0,0 +1,638 @@
+import os
+import pickle
+import logging
+import itertools
+import functools
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import Future
+from typing import Union, Iterable
+
+from powerstrip.models.plugin import Plugin
+from powerstrip.utils.utils import ensure_path
+from powerstrip.sharedmemory import (
+    SharedBuffer, SharedMemoryPool, SharedMemoryAttachments, encode, decode,
+    ensure_resource_tracker
+)
+from powerstrip.exceptions import PluginProcessPoolException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+def _send(conn, msg) -> None:
+    """
+    send message pickled with the highest protocol over the connection
+
+    :param conn: connection
+    :param msg: message to send
+    """
+    conn.send_bytes(pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _resolve(future: Future, ok: bool, value) -> None:
+    """
+    set the result or the exception of the future, unless the caller has
+    cancelled it
+
+    :param future: future of the call
+    :type future: Future
+    :param ok: True, if the call was successful
+    :type ok: bool
+    :param value: result or exception of the call
+    """
+    if not future.set_running_or_notify_cancel():
+        # cancelled by the caller
+        return
+
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
+
+
+def _recv(conn):
+    """
+    receive pickled message from the connection
+
+    :param conn: connection
+    :return: received message
+    """
+    return pickle.loads(conn.recv_bytes())
+
+
+def _worker_main(
+    conn,
+    plugins_directory: Union[Path, list],
+    subclass: Plugin,
+    use_category: bool,
+    plugin_names: list,
+    init_kwargs: dict,
+    shm_threshold: int = None
+) -> None:
+    """
+    main function of a worker process that imports and initializes its
+    plugins once and then serves run() calls until it receives None
+
+    :param conn: connection to the host process
+    :param plugins_directory: directory or directories where plugins are
+                              installed
+    :type plugins_directory: Union[Path, list]
+    :param subclass: subclass of Plugin that is managed
+    :type subclass: Plugin
+    :param use_category: use category subdirectories
+    :type use_category: bool
+    :param plugin_names: names of the plugins hosted by the worker
+    :type plugin_names: list
+    :param init_kwargs: keyword arguments for init() per plugin name
+    :type init_kwargs: dict
+    :param shm_threshold: minimum payload size for the shared memory
+                          transport, None if disabled
+    :type shm_threshold: int
+    """
+    # import here to avoid cyclic import of the plugin manager
+    from powerstrip.pluginmanager import PluginManager
+
+    plugins = {}
+    attachments = None
+    if shm_threshold is not None:
+        attachments = SharedMemoryAttachments(shm_threshold)
+
+    try:
+        # pre-import and initialize all plugins of this worker
+        pm = PluginManager(
+            plugins_directory, subclass=subclass, use_category=use_category
+        )
+        plugin_classes = {
+            name: plugincls
+            for category in pm.get_plugin_classes().values()
+            for name, plugincls in category.items()
+        }
+        for name in plugin_names:
+            if name not in plugin_classes:
+                raise PluginProcessPoolException(
+                    f"The plugin '{name}' is not installed in "
+                    f"'{plugins_directory}'!"
+                )
+
+            plugins[name] = plugin_classes[name]()
+            plugins[name].init(**init_kwargs.get(name, {}))
+
+        _send(conn, (None, True, os.getpid()))
+
+    except Exception as e:
+        # worker could not be started
+        _send(conn, (None, False, PluginProcessPoolException(repr(e))))
+        return
+
+    while True:
+        try:
+            msg = _recv(conn)
+
+        except EOFError:
+            # host has gone
+            break
+
+        if msg is None:
+            # regular shutdown requested by the host
+            break
+
+        call_id, name, args, kwargs, hint, detached = msg
+        try:
+            if attachments is not None:
+                for segment_name in detached:
+                    # segment has been unlinked by the host
+                    attachments.detach(segment_name)
+
+                # payloads in shared memory are passed as memoryviews
+                args = decode(args, attachments.view)
+                kwargs = decode(kwargs, attachments.view)
+                value = attachments.export(
+                    plugins[name].run(*args, **kwargs), hint
+                )
+
+            else:
+                value = plugins[name].run(*args, **kwargs)
+
+            res = (call_id, True, value)
+
+        except Exception as e:
+            res = (call_id, False, e)
+
+        try:
+            _send(conn, res)
+
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # result or exception cannot be transferred to the host
+            _send(conn, (call_id, False, PluginProcessPoolException(
+                f"The result of plugin '{name}' cannot be pickled: {e!r}"
+            )))
+
+        # release the views of the payloads, e.g., referenced by the
+        # traceback of an exception, before segments are detached
+        args = kwargs = value = res = None
+
+    for plugin in plugins.values():
+        plugin.shutdown()
+
+    if attachments is not None:
+        attachments.close()
+
+    conn.close()
+
+
+class _Worker:
+    """
+    host-side handle of a worker process
+    """
+    def __init__(self, index: int, process, conn, plugin_names: list):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.plugin_names = plugin_names
+        self.pending = {}
+        self.lock = threading.Lock()
+        # segments that the worker may have attached and segments that
+        # must be detached by the worker, since the host unlinked them
+        self.attached = set()
+        self.detached = set()
+        self.thread = None
+
+    def reader(self) -> None:
+        """
+        receive results from the worker process and resolve the
+        pending futures
+        """
+        while True:
+            try:
+                call_id, ok, value = _recv(self.conn)
+
+            except (EOFError, OSError):
+                # worker process has terminated
+                break
+
+            future, finalize = self.pending.pop(call_id, (None, None))
+            if future is None:
+                continue
+
+            if finalize is not None:
+                try:
+                    value = finalize(value, ok)
+
+                except Exception as e:
+                    ok, value = False, e
+
+            _resolve(future, ok, value)
+
+        # fail all calls that are still pending
+        for call_id in list(self.pending):
+            future, finalize = self.pending.pop(call_id)
+            if finalize is not None:
+                try:
+                    finalize(None, False)
+
+                except Exception as e:
+                    log.error(
+                        f"Releasing the shared memory of call {call_id} "
+                        f"failed: {e}"
+                    )
+
+            _resolve(
+                future,
+                False,
+                PluginProcessPoolException(
+                    f"The worker process {self.index} has terminated!"
+                )
+            )
+
+
+class PluginProcessPool:
+    """
+    pool of preforked worker processes that host plugins, i.e., each
+    worker imports and initializes its plugins once and then forwards
+    run() calls from the host
+    """
+    def __init__(
+        self,
+        plugins_directory: Union[str, Path, Iterable[Union[str, Path]]],
+        plugin_names: Iterable[str],
+        size: int = None,
+        affinity: dict = None,
+        subclass: Plugin = Plugin,
+        use_category: bool = False,
+        init_kwargs: dict = None,
+        mp_context: str = None,
+        shared_memory: bool = False,
+        shared_memory_threshold: int = 65536,
+        copy_results: bool = True
+    ):
+        """
+        initialize the plugin process pool
+
+        :param plugins_directory: directory where plugins are installed or
+                                  list of directories in the order of
+                                  their precedence
+        :type plugins_directory: Union[str, Path, Iterable[Union[str, Path]]]
+        :param plugin_names: names of the plugins hosted by the pool
+        :type plugin_names: Iterable[str]
+        :param size: number of worker processes, defaults to the
+                     number of CPUs
+        :type size: int, optional
+        :param affinity: maps plugin names to a worker index or a list of
+                         worker indexes; plugins without affinity are
+                         hosted by all workers
+        :type affinity: dict, optional
+        :param subclass: subclass of Plugin that is managed, defaults to
+                         Plugin
+        :type subclass: Plugin, optional
+        :param use_category: use category subdirectories, defaults to False
+        :type use_category: bool, optional
+        :param init_kwargs: keyword arguments for init() per plugin name
+        :type init_kwargs: dict, optional
+        :param mp_context: multiprocessing start method, defaults to the
+                           platform's default
+        :type mp_context: str, optional
+        :param shared_memory: if True, large buffers are passed in shared
+                              memory segments instead of being pickled,
+                              defaults to False
+        :type shared_memory: bool, optional
+        :param shared_memory_threshold: minimum payload size in bytes for
+                                        the shared memory transport,
+                                        defaults to 64 KiB
+        :type shared_memory_threshold: int, optional
+        :param copy_results: if True, results in shared memory are copied
+                             to bytes, otherwise SharedBuffer instances
+                             are returned that must be released,
+                             defaults to True
+        :type copy_results: bool, optional
+        """
+        self.plugins_directory = (
+            ensure_path(plugins_directory)
+            if isinstance(plugins_directory, (str, Path)) else
+            list(map(ensure_path, plugins_directory))
+        )
+        self.plugin_names = list(plugin_names)
+        self.size = size or os.cpu_count() or 1
+        self.affinity = affinity or {}
+        self.subclass = subclass
+        self.use_category = use_category
+        self.init_kwargs = init_kwargs or {}
+        self.mp_context = multiprocessing.get_context(mp_context)
+        self.shared_memory_threshold = shared_memory_threshold
+        self.copy_results = copy_results
+        self._shm_pool = (
+            SharedMemoryPool(on_destroy=self._detach)
+            if shared_memory else
+            None
+        )
+        self._result_sizes = {}
+        self._workers = []
+        self._call_ids = itertools.count()
+
+        assert self.size > 0
+        for name, indexes in self.affinity.items():
+            indexes = [indexes] if isinstance(indexes, int) else indexes
+            if not all(0 <= i < self.size for i in indexes):
+                raise PluginProcessPoolException(
+                    f"Invalid affinity {indexes} for plugin '{name}'!"
+                )
+
+    def _get_worker_plugin_names(self, index: int) -> list:
+        """
+        returns the names of the plugins hosted by the given worker
+
+        :param index: worker index
+        :type index: int
+        :return: names of the plugins
+        :rtype: list
+        """
+        names = []
+        for name in self.plugin_names:
+            indexes = self.affinity.get(name, range(self.size))
+            indexes = [indexes] if isinstance(indexes, int) else indexes
+            if index in indexes:
+                names.append(name)
+
+        return names
+
+    def start(self) -> "PluginProcessPool":
+        """
+        start all worker processes and wait until their plugins
+        are initialized
+
+        :raises PluginProcessPoolException: if a worker cannot be started
+        :return: the started pool
+        :rtype: PluginProcessPool
+        """
+        if self._workers:
+            # already started
+            return self
+
+        if self._shm_pool is not None:
+            # workers share the resource tracker of the host
+            ensure_resource_tracker()
+
+        # start all processes first, i.e., before reader threads exist
+        for index in range(self.size):
+            parent_conn, child_conn = self.mp_context.Pipe()
+            plugin_names = self._get_worker_plugin_names(index)
+            process = self.mp_context.Process(
+                target=_worker_main,
+                args=(
+                    child_conn, self.plugins_directory, self.subclass,
+                    self.use_category, plugin_names, self.init_kwargs,
+                    (
+                        self.shared_memory_threshold
+                        if self._shm_pool is not None else
+                        None
+                    )
+                ),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._workers.append(
+                _Worker(index, process, parent_conn, plugin_names)
+            )
+
+        # wait for all workers to become ready
+        errors = []
+        for worker in self._workers:
+            try:
+                _, ok, value = _recv(worker.conn)
+
+            except EOFError:
+                ok, value = False, PluginProcessPoolException(
+                    f"The worker process {worker.index} has terminated!"
+                )
+
+            if not ok:
+                errors.append(value)
+                continue
+
+            log.debug(
+                f"Worker {worker.index} (pid {value}) is hosting: "
+                f"{', '.join(worker.plugin_names)}"
+            )
+            worker.thread = threading.Thread(
+                target=worker.reader, daemon=True
+            )
+            worker.thread.start()
+
+        if errors:
+            self.shutdown()
+            raise errors[0]
+
+        return self
+
+    def lease(self, size: int) -> SharedBuffer:
+        """
+        lease a shared memory segment that can be filled by the caller
+        and passed as argument without any copy; the buffer must be
+        released after the call
+
+        :param size: payload size in bytes
+        :type size: int
+        :raises PluginProcessPoolException: if shared memory is disabled
+        :return: shared buffer
+        :rtype: SharedBuffer
+        """
+        if self._shm_pool is None:
+            raise PluginProcessPoolException(
+                "Shared memory is disabled for the pool!"
+            )
+
+        return self._shm_pool.lease(size)
+
+    def _detach(self, name: str) -> None:
+        """
+        let the workers that may have attached the segment with the given
+        name detach it with their next call
+
+        :param name: name of the unlinked segment
+        :type name: str
+        """
+        for worker in self._workers:
+            with worker.lock:
+                if name in worker.attached:
+                    worker.attached.discard(name)
+                    worker.detached.add(name)
+
+    def _finalize(
+        self,
+        plugin_name: str,
+        leases: list,
+        value,
+        ok: bool
+    ):
+        """
+        resolve the shared memory handles of the result and return the
+        segments leased for the call to the pool
+
+        :param plugin_name: name of the plugin
+        :type plugin_name: str
+        :param leases: segments leased for the call
+        :type leases: list
+        :param value: result of the call
+        :param ok: True, if the call was successful
+        :type ok: bool
+        :return: decoded result
+        """
+        used = set()
+
+        def resolve(buffer: SharedBuffer):
+            used.add(buffer.name)
+            self._result_sizes[plugin_name] = buffer.size
+            buffer = self._shm_pool.adopt(buffer.name, buffer.size)
+            if not self.copy_results:
+                return buffer
+
+            data = buffer.tobytes()
+            buffer.release()
+
+            return data
+
+        try:
+            if ok:
+                value = decode(value, resolve)
+
+        finally:
+            for lease in leases:
+                if lease.name not in used:
+                    lease.release()
+
+        return value
+
+    def submit(self, plugin_name: str, *args, **kwargs) -> Future:
+        """
+        forward the run() call of the given plugin to the least loaded
+        worker that is hosting the plugin
+
+        :param plugin_name: name of the plugin
+        :type plugin_name: str
+        :raises PluginProcessPoolException: if plugin is not hosted
+        :return: future of the result
+        :rtype: Future
+        """
+        candidates = [
+            worker
+            for worker in self._workers
+            if plugin_name in worker.plugin_names
+        ]
+        if not candidates:
+            raise PluginProcessPoolException(
+                f"The plugin '{plugin_name}' is not hosted by the pool!"
+            )
+
+        worker = min(candidates, key=lambda w: len(w.pending))
+        call_id = next(self._call_ids)
+        future = Future()
+        finalize = hint = None
+        names = set()
+        if self._shm_pool is not None:
+            # move large payloads to shared memory
+            leases = []
+
+            def lease(size: int) -> SharedBuffer:
+                leases.append(self._shm_pool.lease(size))
+                return leases[-1]
+
+            args = encode(args, lease, self.shared_memory_threshold)
+            kwargs = encode(kwargs, lease, self.shared_memory_threshold)
+            if plugin_name in self._result_sizes:
+                # provide segment for result of the previous call's size
+                hint = lease(self._result_sizes[plugin_name])
+
+            finalize = functools.partial(self._finalize, plugin_name, leases)
+
+            def collect(buffer: SharedBuffer) -> SharedBuffer:
+                names.add(buffer.name)
+                return buffer
+
+            # segments that are attached by the worker
+            decode((args, kwargs, hint), collect)
+
+        worker.pending[call_id] = (future, finalize)
+        try:
+            with worker.lock:
+                worker.attached.update(names)
+                detached, worker.detached = worker.detached, set()
+                _send(
+                    worker.conn,
+                    (call_id, plugin_name, args, kwargs, hint, detached)
+                )
+
+        except Exception:
+            worker.pending.pop(call_id, None)
+            if finalize is not None:
+                finalize(None, False)
+
+            raise
+
+        return future
+
+    def run(self, plugin_name: str, *args, timeout: float = None, **kwargs):
+        """
+        call run() of the given plugin in a worker process and wait
+        for the result
+
+        :param plugin_name: name of the plugin
+        :type plugin_name: str
+        :param timeout: timeout in seconds, defaults to None
+        :type timeout: float, optional
+        :return: result of the plugin's run()
+        """
+        return self.submit(plugin_name, *args, **kwargs).result(timeout)
+
+    def shutdown(self, timeout: float = None) -> None:
+        """
+        shutdown the plugins and stop all worker processes
+
+        :param timeout: time to wait for each worker, defaults to None
+        :type timeout: float, optional
+        """
+        for worker in self._workers:
+            try:
+                with worker.lock:
+                    _send(worker.conn, None)
+
+            except OSError:
+                # worker has already terminated
+                pass
+
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+
+            if worker.thread is not None:
+                worker.thread.join(timeout)
+
+            worker.conn.close()
+
+        self._workers = []
+        if self._shm_pool is not None:
+            # unlink all shared memory segments
+            self._shm_pool.close()
+
+    def __enter__(self) -> "PluginProcessPool":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+    def __repr__(self) -> str:
+        """
+        string representation of the plugin process pool
+
+        :return: string representation of the plugin process pool
+        :rtype: str
+        """
+        return (
+            f"<PluginProcessPool(plugins_directory="
+            f"'{self.plugins_directory}', size={self.size}, "
+            f"plugin_names={self.plugin_names})>"
+        )
@@ -0,0 +1,394 @@
+import re
+import bisect
+import fnmatch
+import logging
+import operator
+import collections
+from typing import Iterable, Union
+
+from powerstrip.utils.semver import SemVer
+from powerstrip.exceptions import PluginQueryException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# constraint of a version range, e.g., ">=1.2.0"
+CONSTRAINT_PATTERN = re.compile(r"^\s*(>=|<=|==|!=|>|<|=)?\s*(\S+)\s*$")
+
+# operators of the version constraints
+OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne
+}
+
+
+class VersionRange:
+    """
+    range of semantic versions given by comma separated constraints,
+    e.g., ">=1.2.0, <2.0.0"
+    """
+    def __init__(self, spec: str):
+        """
+        initialize the version range
+
+        :param spec: comma separated constraints with the operators
+                     >=, <=, >, <, == and !=
+        :type spec: str
+        :raises PluginQueryException: if the constraints are invalid
+        """
+        assert isinstance(spec, str)
+
+        self.spec = spec
+        self.constraints = []
+        for part in spec.split(","):
+            res = CONSTRAINT_PATTERN.match(part)
+            if not res:
+                raise PluginQueryException(
+                    f"Invalid version constraint '{part.strip()}'!"
+                )
+
+            op, version = res.groups()
+            try:
+                semver = SemVer.create_from_str(version)
+
+            except TypeError:
+                raise PluginQueryException(
+                    f"Invalid version constraint '{part.strip()}'!"
+                )
+
+            self.constraints.append((op or "==", semver.precedence))
+
+    def bounds(self) -> tuple:
+        """
+        returns the lowest and highest precedence of the range, i.e.,
+        the bounds used to select a slice of sorted versions
+
+        :return: lower bound, whether it is inclusive, upper bound and
+                 whether it is inclusive; a bound is None, if unbounded
+        :rtype: tuple
+        """
+        lower, lower_inclusive = None, True
+        upper, upper_inclusive = None, True
+        for op, precedence in self.constraints:
+            if op in (">=", ">", "==", "="):
+                inclusive = op != ">"
+                if (
+                    (lower is None) or (precedence > lower) or
+                    ((precedence == lower) and not inclusive)
+                ):
+                    lower, lower_inclusive = precedence, inclusive
+
+            if op in ("<=", "<", "==", "="):
+                inclusive = op != "<"
+                if (
+                    (upper is None) or (precedence < upper) or
+                    ((precedence == upper) and not inclusive)
+                ):
+                    upper, upper_inclusive = precedence, inclusive
+
+        return lower, lower_inclusive, upper, upper_inclusive
+
+    def __contains__(self, version: Union[str, SemVer]) -> bool:
+        """
+        check whether the version is within the range
+
+        :param version: semantic version
+        :type version: Union[str, SemVer]
+        :return: True, if all constraints are met
+        :rtype: bool
+        """
+        if isinstance(version, str):
+            version = SemVer.create_from_str(version)
+
+        precedence = version.precedence
+        return all(
+            OPERATORS[op](precedence, other)
+            for op, other in self.constraints
+        )
+
+    def __repr__(self) -> str:
+        """
+        string representation of the version range
+
+        :return: string representation of the version range
+        :rtype: str
+        """
+        return f"<VersionRange('{self.spec}')>"
+
+
+class PluginQuery:
+    """
+    compound query to select plugins, i.e., all given criteria must match;
+    criteria that are None are ignored
+    """
+    def __init__(
+        self,
+        categories: Iterable[str] = None,
+        tags_any: Iterable[str] = None,
+        tags_all: Iterable[str] = None,
+        tags_none: Iterable[str] = None,
+        version: Union[str, VersionRange] = None,
+        author: str = None,
+        name: str = None,
+        provides: Iterable[str] = None
+    ):
+        """
+        initialize the plugin query
+
+        :param categories: plugins must match any of the categories,
+                           defaults to None
+        :type categories: Iterable[str], optional
+        :param tags_any: plugins must have any of the tags, defaults to None
+        :type tags_any: Iterable[str], optional
+        :param tags_all: plugins must have all of the tags, defaults to None
+        :type tags_all: Iterable[str], optional
+        :param tags_none: plugins must have none of the tags,
+                          defaults to None
+        :type tags_none: Iterable[str], optional
+        :param version: version range, e.g., ">=1.0.0, <2.0.0",
+                        defaults to None
+        :type version: Union[str, VersionRange], optional
+        :param author: glob pattern of the author, e.g., "*@example.com*",
+                       defaults to None
+        :type author: str, optional
+        :param name: glob pattern of the plugin name, e.g., "Csv*",
+                     defaults to None
+        :type name: str, optional
+        :param provides: plugins must provide all of the capabilities,
+                         which may be glob patterns, e.g., "exporter:*",
+                         defaults to None
+        :type provides: Iterable[str], optional
+        """
+        assert (author is None) or isinstance(author, str)
+        assert (name is None) or isinstance(name, str)
+
+        self.categories = self._to_set(categories)
+        self.tags_any = self._to_set(tags_any, lower=True)
+        self.tags_all = self._to_set(tags_all, lower=True)
+        self.tags_none = self._to_set(tags_none, lower=True)
+        self.version = (
+            VersionRange(version) if isinstance(version, str) else version
+        )
+        self.author = author
+        self.name = name
+        self.provides = self._to_set(provides, lower=True)
+
+    @staticmethod
+    def _to_set(values: Iterable[str], lower: bool = False) -> frozenset:
+        """
+        returns the values as frozenset or None, if not given
+        """
+        if values is None:
+            return None
+
+        if isinstance(values, str):
+            # single value
+            values = [values]
+
+        return frozenset(v.lower() if lower else v for v in values)
+
+    def __repr__(self) -> str:
+        """
+        string representation of the plugin query
+
+        :return: string representation of the plugin query
+        :rtype: str
+        """
+        criteria = ", ".join(
+            f"{key}={value!r}"
+            for key, value in vars(self).items()
+            if value is not None
+        )
+        return f"<PluginQuery({criteria})>"
+
+
+class PluginIndex:
+    """
+    per-attribute indexes over the registry entries, i.e., the plugin
+    directories by category, tag, author, name and provided and required
+    capability, and the versions in sorted order, so that queries are
+    evaluated by set intersections; the index is built once per registry
+    and never modified
+    """
+    def __init__(self, registry: dict):
+        """
+        build the indexes of the given registry
+
+        :param registry: registry entries by plugin directory
+        :type registry: dict
+        """
+        self.registry = registry
+        self.all = frozenset(registry)
+        self.positions = {
+            directory: position
+            for position, directory in enumerate(registry)
+        }
+
+        categories = collections.defaultdict(set)
+        tags = collections.defaultdict(set)
+        authors = collections.defaultdict(set)
+        names = collections.defaultdict(set)
+        provides = collections.defaultdict(set)
+        requires = collections.defaultdict(set)
+        versions = []
+        for directory, entry in registry.items():
+            metadata = entry.metadata
+            categories[metadata.category].add(directory)
+            for tag in metadata.tags:
+                tags[tag].add(directory)
+
+            authors[metadata.author].add(directory)
+            names[metadata.name].add(directory)
+            for capability in metadata.provides:
+                provides[capability].add(directory)
+
+            for capability in metadata.requires:
+                requires[capability].add(directory)
+
+            versions.append((metadata.version.precedence, directory))
+
+        self.categories = dict(categories)
+        self.tags = dict(tags)
+        self.authors = dict(authors)
+        self.names = dict(names)
+        self.provides = dict(provides)
+        self.requires = dict(requires)
+
+        # the directories are kept in a separate list to bisect precedences
+        versions.sort(key=operator.itemgetter(0))
+        self.precedences = [precedence for precedence, _ in versions]
+        self.versions = [directory for _, directory in versions]
+
+    def _match_glob(self, values: dict, pattern: str) -> set:
+        """
+        returns the directories of the values matching the glob pattern
+        """
+        if not any(c in pattern for c in "*?["):
+            # exact value
+            return values.get(pattern, set())
+
+        regex = re.compile(fnmatch.translate(pattern))
+        return set().union(*(
+            directories
+            for value, directories in values.items()
+            if regex.match(value)
+        ))
+
+    def _match_version(self, version: VersionRange) -> set:
+        """
+        returns the directories of the plugins within the version range
+        """
+        lower, lower_inclusive, upper, upper_inclusive = version.bounds()
+        start, end = 0, len(self.precedences)
+        if lower is not None:
+            start = (
+                bisect.bisect_left(self.precedences, lower)
+                if lower_inclusive else
+                bisect.bisect_right(self.precedences, lower)
+            )
+
+        if upper is not None:
+            end = (
+                bisect.bisect_right(self.precedences, upper)
+                if upper_inclusive else
+                bisect.bisect_left(self.precedences, upper)
+            )
+
+        directories = set(self.versions[start:end])
+        for op, precedence in version.constraints:
+            if op == "!=":
+                # exclude the versions from the slice
+                lo = bisect.bisect_left(self.precedences, precedence)
+                hi = bisect.bisect_right(self.precedences, precedence)
+                directories.difference_update(self.versions[lo:hi])
+
+        return directories
+
+    def select(self, query: PluginQuery) -> list:
+        """
+        returns the registry entries matching the query
+
+        :param query: plugin query
+        :type query: PluginQuery
+        :return: matching registry entries
+        :rtype: list
+        """
+        assert isinstance(query, PluginQuery)
+
+        candidates = []
+        if query.categories is not None:
+            candidates.append(set().union(*(
+                self.categories.get(category, ())
+                for category in query.categories
+            )))
+
+        if query.tags_any is not None:
+            candidates.append(set().union(*(
+                self.tags.get(tag, ()) for tag in query.tags_any
+            )))
+
+        for tag in query.tags_all or ():
+            candidates.append(self.tags.get(tag, set()))
+
+        if query.name is not None:
+            candidates.append(self._match_glob(self.names, query.name))
+
+        if query.author is not None:
+            candidates.append(self._match_glob(self.authors, query.author))
+
+        if query.version is not None:
+            candidates.append(self._match_version(query.version))
+
+        for capability in query.provides or ():
+            candidates.append(self._match_glob(self.provides, capability))
+
+        if candidates:
+            # intersect starting with the smallest set
+            candidates.sort(key=len)
+            directories = candidates[0].intersection(*candidates[1:])
+
+        else:
+            directories = set(self.all)
+
+        for tag in query.tags_none or ():
+            directories.difference_update(self.tags.get(tag, ()))
+
+        # keep the order of the registry
+        return [
+            self.registry[directory]
+            for directory in sorted(
+                directories, key=self.positions.__getitem__
+            )
+        ]
+
+    def unmet_requirements(self) -> dict:
+        """
+        returns the required capabilities that no plugin provides
+
+        :return: unmet capabilities by plugin directory
+        :rtype: dict
+        """
+        unmet = collections.defaultdict(list)
+        for capability, directories in sorted(self.requires.items()):
+            if capability in self.provides:
+                continue
+
+            for directory in directories:
+                unmet[directory].append(capability)
+
+        return dict(unmet)
+
+    def __repr__(self) -> str:
+        """
+        string representation of the plugin index
+
+        :return: string representation of the plugin index
+        :rtype: str
+        """
+        return f"<PluginIndex(plugins={len(self.all)})>"
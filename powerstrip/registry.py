@@ -0,0 +1,77 @@
+import types
+import collections
+
+from powerstrip.query import PluginIndex
+
+
+class RegistrySnapshot:
+    """
+    immutable snapshot of the registry, i.e., the entries of the
+    discovered plugins together with their name and attribute indexes;
+    writers build a new snapshot and swap it at once, so that readers
+    take a reference to the current snapshot without any lock
+    (read-copy-update)
+    """
+    __slots__ = ("registry", "names", "index", "shadowed")
+
+    def __init__(self, registry: dict = None, shadowed: dict = None):
+        """
+        build the snapshot of the given registry
+
+        :param registry: registry entries by plugin directory,
+                         defaults to None
+        :type registry: dict, optional
+        :param shadowed: shadowing plugin directory by shadowed plugin
+                         directory, defaults to None
+        :type shadowed: dict, optional
+        """
+        # copy, so that the snapshot does not change with the given dict
+        registry = dict(registry or {})
+
+        names = collections.defaultdict(list)
+        for entry in registry.values():
+            names[entry.name].append(entry)
+
+        setattr_ = object.__setattr__
+        setattr_(self, "registry", types.MappingProxyType(registry))
+        setattr_(self, "names", types.MappingProxyType({
+            name: tuple(entries) for name, entries in names.items()
+        }))
+        setattr_(self, "index", PluginIndex(registry))
+        setattr_(
+            self, "shadowed", types.MappingProxyType(dict(shadowed or {}))
+        )
+
+    def __setattr__(self, key: str, value) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is immutable!")
+
+    def replace(self, registry: dict = None, shadowed: dict = None):
+        """
+        returns a new snapshot with the given registry or shadowed
+        plugin directories, while the others are kept
+
+        :param registry: registry entries by plugin directory,
+                         defaults to the registry of this snapshot
+        :type registry: dict, optional
+        :param shadowed: shadowing plugin directory by shadowed plugin
+                         directory, defaults to those of this snapshot
+        :type shadowed: dict, optional
+        :return: new snapshot
+        :rtype: RegistrySnapshot
+        """
+        return RegistrySnapshot(
+            self.registry if registry is None else registry,
+            self.shadowed if shadowed is None else shadowed
+        )
+
+    def __len__(self) -> int:
+        return len(self.registry)
+
+    def __repr__(self) -> str:
+        """
+        string representation of the registry snapshot
+
+        :return: string representation of the registry snapshot
+        :rtype: str
+        """
+        return f"<RegistrySnapshot(plugins={len(self.registry)})>"
@@ -0,0 +1,5 @@
+from powerstrip.repository.searchindex import SearchIndex, SearchResult
+from powerstrip.repository.repositoryindex import RepositoryIndex
+from powerstrip.repository.server import RepositoryServer
+from powerstrip.repository.client import RepositoryClient
+from powerstrip.repository.mirror import RepositoryMirror, MirrorResult
@@ -0,0 +1,616 @@
+import io
+import os
+import logging
+import threading
+import http.client
+from pathlib import Path
+from typing import Union, BinaryIO
+from urllib.parse import urlsplit, quote
+
+from powerstrip.models.metadata import Metadata
+from powerstrip.models.pluginpackage import PluginPackage
+from powerstrip.repository.repositoryindex import RepositoryIndex
+from powerstrip.tracing import tracer
+from powerstrip.utils.utils import ensure_path, hash_file
+from powerstrip.exceptions import RepositoryException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+class RangeFile(io.RawIOBase):
+    """
+    read-only file of a remote plugin package, whose blocks are fetched
+    by range requests on demand, i.e., zipfile only fetches the blocks
+    of the central directory and of the members that are read
+    """
+    def __init__(
+        self,
+        client: "RepositoryClient",
+        path: str,
+        size: int,
+        block_size: int = 16 * 1024
+    ):
+        """
+        initialize the remote file
+
+        :param client: repository client
+        :type client: RepositoryClient
+        :param path: path of the file on the server
+        :type path: str
+        :param size: file size
+        :type size: int
+        :param block_size: size of the fetched blocks, defaults to 16 KiB
+        :type block_size: int, optional
+        """
+        assert isinstance(size, int) and (size >= 0)
+        assert isinstance(block_size, int) and (block_size > 0)
+
+        super().__init__()
+        self.client = client
+        self.path = path
+        self.size = size
+        self.block_size = block_size
+        self.requests = 0
+        self._blocks = {}
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+
+        else:
+            raise ValueError(f"Invalid whence {whence}!")
+
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}!")
+
+        self._position = position
+        return position
+
+    def _fetch(self, first_block: int, last_block: int) -> None:
+        """
+        fetch the missing blocks of the given block range by a single
+        range request
+
+        :param first_block: first block
+        :type first_block: int
+        :param last_block: last block
+        :type last_block: int
+        """
+        missing = [
+            block
+            for block in range(first_block, last_block + 1)
+            if block not in self._blocks
+        ]
+        if not missing:
+            return
+
+        first = missing[0] * self.block_size
+        last = min((missing[-1] + 1) * self.block_size, self.size) - 1
+        data = self.client.get_range(self.path, first, last)
+        self.requests += 1
+
+        for block in range(missing[0], missing[-1] + 1):
+            offset = block * self.block_size - first
+            self._blocks.setdefault(
+                block, data[offset:offset + self.block_size]
+            )
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self.size - self._position)
+        if length <= 0:
+            return 0
+
+        first_block = self._position // self.block_size
+        last_block = (self._position + length - 1) // self.block_size
+        self._fetch(first_block, last_block)
+
+        data = b"".join(
+            self._blocks[block]
+            for block in range(first_block, last_block + 1)
+        )
+        offset = self._position - first_block * self.block_size
+        buffer[:length] = data[offset:offset + length]
+        self._position += length
+
+        return length
+
+
+class RepositoryClient:
+    """
+    client of a repository server, which reuses keep-alive connections,
+    fetches the index by conditional requests, reads the metadata of
+    packages by range requests and keeps downloaded packages in a local
+    cache, so that they are not fetched again
+    """
+    INDEX_PATH = "/index.json"
+    PACKAGES_PATH = "/packages/"
+
+    def __init__(
+        self,
+        url: str,
+        cache_directory: Union[str, Path] = "~/.cache/powerstrip",
+        timeout: float = 10.0,
+        pool_size: int = 4
+    ):
+        """
+        initialize the repository client
+
+        :param url: base URL of the repository server
+        :type url: str
+        :param cache_directory: directory of the downloaded packages,
+                                defaults to "~/.cache/powerstrip"
+        :type cache_directory: Union[str, Path], optional
+        :param timeout: timeout of the requests in seconds,
+                        defaults to 10.0
+        :type timeout: float, optional
+        :param pool_size: maximum number of idle connections,
+                          defaults to 4
+        :type pool_size: int, optional
+        """
+        assert isinstance(url, str)
+        assert isinstance(cache_directory, (str, Path))
+        assert isinstance(pool_size, int) and (pool_size > 0)
+
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise RepositoryException(f"Invalid repository URL '{url}'!")
+
+        self.url = url.rstrip("/")
+        self.cache_directory = ensure_path(cache_directory)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base_path = parts.path.rstrip("/")
+        self._pool = []
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._packages = None
+        self._etag = None
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        """
+        returns an idle connection of the pool or a new connection
+
+        :return: connection
+        :rtype: http.client.HTTPConnection
+        """
+        with self._lock:
+            if self._pool:
+                return self._pool.pop()
+
+        connection_cls = (
+            http.client.HTTPSConnection
+            if self._scheme == "https" else
+            http.client.HTTPConnection
+        )
+        return connection_cls(self._host, self._port, timeout=self.timeout)
+
+    def _release_connection(self, connection: http.client.HTTPConnection):
+        """
+        return the connection to the pool to keep it alive
+
+        :param connection: connection
+        :type connection: http.client.HTTPConnection
+        """
+        with self._lock:
+            if len(self._pool) < self.pool_size:
+                self._pool.append(connection)
+                return
+
+        connection.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        headers: dict = None,
+        f: BinaryIO = None
+    ) -> tuple:
+        """
+        send a request on a pooled connection; a request on a connection
+        that has been closed by the server is repeated once
+
+        :param method: HTTP method
+        :type method: str
+        :param path: path relative to the base URL
+        :type path: str
+        :param headers: request headers, defaults to None
+        :type headers: dict, optional
+        :param f: file to which the body of a successful response is
+                  written instead of returning it, defaults to None
+        :type f: BinaryIO, optional
+        :raises RepositoryException: if the server is not reachable
+        :return: status, response headers and body
+        :rtype: tuple
+        """
+        for attempt in range(2):
+            connection = self._get_connection()
+            try:
+                connection.request(
+                    method, self._base_path + path, headers=headers or {}
+                )
+                response = connection.getresponse()
+                if (f is not None) and (response.status == 200):
+                    import shutil
+
+                    f.seek(0)
+                    f.truncate()
+                    shutil.copyfileobj(response, f, 64 * 1024)
+                    body = b""
+
+                else:
+                    body = response.read()
+
+            except (http.client.HTTPException, ConnectionError) as e:
+                # e.g., keep-alive connection closed by the server
+                connection.close()
+                if attempt == 0:
+                    continue
+
+                raise RepositoryException(
+                    f"Request of '{self.url}{path}' failed: {e!r}"
+                )
+
+            except OSError as e:
+                connection.close()
+                raise RepositoryException(
+                    f"Request of '{self.url}{path}' failed: {e!r}"
+                )
+
+            if response.will_close:
+                connection.close()
+
+            else:
+                self._release_connection(connection)
+
+            return response.status, response.headers, body
+
+    def _get_package_path(self, filename: str) -> str:
+        return self.PACKAGES_PATH + quote(filename)
+
+    @property
+    def _index_filename(self) -> Path:
+        return self.cache_directory.joinpath(RepositoryIndex.INDEX_FILENAME)
+
+    def _load_index(self) -> None:
+        """
+        load the cached index, e.g., of a previous process
+        """
+        import json
+
+        try:
+            with self._index_filename.open() as f:
+                cached = json.load(f)
+
+            packages, etag = cached["index"]["packages"], cached["etag"]
+
+        except (OSError, ValueError, KeyError, TypeError):
+            # not cached yet
+            return
+
+        self._packages, self._etag = packages, etag
+
+    def _save_index(self, index: dict) -> None:
+        """
+        cache the index together with its entity tag
+
+        :param index: index
+        :type index: dict
+        """
+        import json
+
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+        tmp_filename = self._index_filename.with_name(
+            f"{RepositoryIndex.INDEX_FILENAME}."
+            f"{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with tmp_filename.open("w") as f:
+            json.dump(
+                {"etag": self._etag, "index": index}, f,
+                separators=(",", ":")
+            )
+
+        os.replace(tmp_filename, self._index_filename)
+
+    @tracer.traced("RepositoryClient.index")
+    def index(self, update: bool = True) -> dict:
+        """
+        returns the packages of the repository, i.e., their modification
+        time, size, content digest and metadata by package filename; the
+        index is only transferred, if it has been changed
+
+        :param update: if True, the server is asked for a changed index,
+                       otherwise only on first use, defaults to True
+        :type update: bool, optional
+        :raises RepositoryException: if the server is not reachable and
+                                     the index is not cached
+        :return: packages by filename
+        :rtype: dict
+        """
+        import json
+
+        with self._index_lock:
+            if self._packages is None:
+                self._load_index()
+
+            if update or (self._packages is None):
+                try:
+                    status, headers, body = self.request(
+                        "GET", self.INDEX_PATH,
+                        {"If-None-Match": self._etag} if self._etag else {}
+                    )
+
+                except RepositoryException as e:
+                    if self._packages is None:
+                        raise
+
+                    log.warning(f"Using the cached index: {e}")
+                    return dict(self._packages)
+
+                if status == 200:
+                    index = json.loads(body)
+                    if index.get("version") != RepositoryIndex.INDEX_VERSION:
+                        raise RepositoryException(
+                            f"Unsupported index version "
+                            f"{index.get('version')} of '{self.url}'!"
+                        )
+
+                    self._packages = index["packages"]
+                    self._etag = headers.get("ETag")
+                    self._save_index(index)
+
+                elif status != 304:
+                    raise RepositoryException(
+                        f"Fetching the index of '{self.url}' failed "
+                        f"with status {status}!"
+                    )
+
+            return dict(self._packages)
+
+    def get_package(self, filename: str) -> dict:
+        """
+        returns the modification time, size, content digest and metadata
+        of the given package
+
+        :param filename: package filename
+        :type filename: str
+        :return: package or None, if not indexed
+        :rtype: dict
+        """
+        return self.index(update=self._packages is None).get(filename)
+
+    def get_range(self, path: str, first: int, last: int) -> bytes:
+        """
+        returns the given byte range of a file on the server
+
+        :param path: path of the file
+        :type path: str
+        :param first: first byte
+        :type first: int
+        :param last: last byte
+        :type last: int
+        :raises RepositoryException: if the range cannot be read
+        :return: content of the range
+        :rtype: bytes
+        """
+        status, headers, body = self.request(
+            "GET", path, {"Range": f"bytes={first}-{last}"}
+        )
+        if status == 200:
+            # server does not support ranges
+            return body[first:last + 1]
+
+        if status != 206:
+            raise RepositoryException(
+                f"Reading '{self.url}{path}' failed with status {status}!"
+            )
+
+        return body
+
+    def _get_size(self, filename: str) -> int:
+        """
+        returns the size of the package by the index or a HEAD request
+
+        :param filename: package filename
+        :type filename: str
+        :return: size
+        :rtype: int
+        """
+        package = self.get_package(filename)
+        if package is not None:
+            return package["size"]
+
+        status, headers, _ = self.request(
+            "HEAD", self._get_package_path(filename)
+        )
+        if status != 200:
+            raise RepositoryException(
+                f"The plugin package '{filename}' could not be found "
+                f"in '{self.url}'!"
+            )
+
+        return int(headers["Content-Length"])
+
+    def get_cached(
+        self,
+        filename: str,
+        directory: Union[str, Path] = None
+    ) -> Path:
+        """
+        returns the cached package, if it matches the indexed package
+
+        :param filename: package filename
+        :type filename: str
+        :param directory: directory of the package, defaults to None for
+                          the cache directory
+        :type directory: Union[str, Path], optional
+        :return: filename of the cached package or None
+        :rtype: Path
+        """
+        fn = ensure_path(directory or self.cache_directory).joinpath(filename)
+        package = self.get_package(filename)
+        try:
+            if (package is None) or (fn.stat().st_size != package["size"]):
+                return None
+
+        except OSError:
+            return None
+
+        return fn if hash_file(fn).hex() == package["digest"] else None
+
+    @tracer.traced("RepositoryClient.info")
+    def info(self, filename: str) -> Metadata:
+        """
+        returns the metadata of the package, which is read from the cached
+        package or otherwise by range requests of the zip central
+        directory and the metadata file, i.e., without downloading the
+        whole package
+
+        :param filename: package filename
+        :type filename: str
+        :raises RepositoryException: if the package cannot be read
+        :return: metadata of the package
+        :rtype: Metadata
+        """
+        import zipfile
+
+        fn = self.get_cached(filename)
+        if fn is not None:
+            return PluginPackage.info(fn)
+
+        f = RangeFile(
+            self, self._get_package_path(filename), self._get_size(filename)
+        )
+        try:
+            with zipfile.ZipFile(f) as zf:
+                with zf.open(Metadata.METADATA_FILENAME) as mf:
+                    metadata = Metadata.create_from_f(io.TextIOWrapper(mf))
+
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise RepositoryException(
+                f"The file '{filename}' is not a valid plugin file: {e}"
+            )
+
+        log.debug(
+            f"Read metadata of '{filename}' by {f.requests} range requests"
+        )
+        return metadata
+
+    @tracer.traced("RepositoryClient.download")
+    def download(
+        self,
+        filename: str,
+        target_directory: Union[str, Path] = None
+    ) -> Path:
+        """
+        download the package into the cache directory, unless the cached
+        package is up to date; the digest of a downloaded package is
+        verified against the index
+
+        :param filename: package filename
+        :type filename: str
+        :param target_directory: directory to which the package is
+                                 downloaded, defaults to None for the
+                                 cache directory
+        :type target_directory: Union[str, Path], optional
+        :raises RepositoryException: if the package cannot be downloaded
+        :return: filename of the downloaded package
+        :rtype: Path
+        """
+        target_directory = ensure_path(
+            target_directory or self.cache_directory
+        )
+        fn = self.get_cached(filename, target_directory)
+        if fn is not None:
+            log.debug(f"Using the cached package '{fn}'...")
+            return fn
+
+        target_directory.mkdir(parents=True, exist_ok=True)
+        fn = target_directory.joinpath(filename)
+        tmp_filename = fn.with_name(
+            f".{fn.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with tmp_filename.open("wb") as f:
+                status, _, _ = self.request(
+                    "GET", self._get_package_path(filename), f=f
+                )
+
+            if status != 200:
+                raise RepositoryException(
+                    f"Downloading '{filename}' from '{self.url}' failed "
+                    f"with status {status}!"
+                )
+
+            digest = hash_file(tmp_filename).hex()
+            package = self.get_package(filename)
+            if (package is not None) and (package["digest"] != digest):
+                # package might have been changed since the index has
+                # been fetched
+                package = self.index().get(filename)
+
+            if (package is not None) and (package["digest"] != digest):
+                raise RepositoryException(
+                    f"The digest of the downloaded package '{filename}' "
+                    f"does not match the index!"
+                )
+
+            os.replace(tmp_filename, fn)
+
+        finally:
+            try:
+                tmp_filename.unlink()
+
+            except FileNotFoundError:
+                # replaced the package
+                pass
+
+        return fn
+
+    def close(self) -> None:
+        """
+        close all idle connections
+        """
+        with self._lock:
+            pool, self._pool = self._pool, []
+
+        for connection in pool:
+            connection.close()
+
+    def __enter__(self) -> "RepositoryClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        """
+        string representation of the repository client
+
+        :return: string representation of the repository client
+        :rtype: str
+        """
+        return (
+            f"<RepositoryClient(url='{self.url}', "
+            f"cache_directory='{self.cache_directory}')>"
+        )
@@ -0,0 +1,287 @@
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Union
+
+from powerstrip.repository.repositoryindex import RepositoryIndex
+from powerstrip.repository.client import RepositoryClient
+from powerstrip.tracing import tracer
+from powerstrip.utils.filelock import FileLock
+from powerstrip.utils.utils import hash_file
+from powerstrip.exceptions import RepositoryException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+class MirrorResult:
+    """
+    result of mirroring a repository, i.e., the transferred, removed and
+    failed packages
+    """
+    def __init__(
+        self,
+        transferred: list,
+        removed: list,
+        failed: dict,
+        unchanged: int,
+        size: int,
+        dry_run: bool
+    ):
+        """
+        initialize the mirror result
+
+        :param transferred: filenames of missing or changed packages
+        :type transferred: list
+        :param removed: filenames of packages removed from the destination
+        :type removed: list
+        :param failed: error by filename of packages that failed
+        :type failed: dict
+        :param unchanged: number of packages that are up to date
+        :type unchanged: int
+        :param size: number of transferred bytes
+        :type size: int
+        :param dry_run: if True, nothing has been changed
+        :type dry_run: bool
+        """
+        self.transferred = transferred
+        self.removed = removed
+        self.failed = failed
+        self.unchanged = unchanged
+        self.size = size
+        self.dry_run = dry_run
+
+    def __repr__(self) -> str:
+        """
+        string representation of the mirror result
+
+        :return: string representation of the mirror result
+        :rtype: str
+        """
+        return (
+            f"<MirrorResult(transferred={len(self.transferred)}, "
+            f"removed={len(self.removed)}, failed={len(self.failed)}, "
+            f"unchanged={self.unchanged}, size={self.size}, "
+            f"dry_run={self.dry_run})>"
+        )
+
+
+class RepositoryMirror:
+    """
+    differential mirror of a repository, i.e., the indexes of the source
+    and the destination are compared by filename, i.e., name and version,
+    and content digest, so that only missing or changed packages are
+    transferred
+    """
+    def __init__(
+        self,
+        source: Union[str, Path, RepositoryIndex, RepositoryClient],
+        destination: Union[str, Path, RepositoryIndex],
+        jobs: int = 4,
+        delete: bool = False,
+        ext: str = ".psp"
+    ):
+        """
+        initialize the repository mirror
+
+        :param source: repository directory, URL of a repository server,
+                       repository index or client
+        :type source: Union[str, Path, RepositoryIndex, RepositoryClient]
+        :param destination: repository directory or index
+        :type destination: Union[str, Path, RepositoryIndex]
+        :param jobs: number of parallel transfers, defaults to 4
+        :type jobs: int, optional
+        :param delete: if True, packages that are not in the source are
+                       removed from the destination, defaults to False
+        :type delete: bool, optional
+        :param ext: plugin extension name, defaults to ".psp"
+        :type ext: str, optional
+        """
+        assert isinstance(jobs, int) and (jobs > 0)
+        assert isinstance(delete, bool)
+
+        if isinstance(destination, (str, Path)):
+            destination = RepositoryIndex(destination, ext)
+
+        if isinstance(source, str) and source.startswith(
+            ("http://", "https://")
+        ):
+            source = RepositoryClient(
+                source,
+                cache_directory=destination.directory.joinpath(".cache"),
+                pool_size=jobs
+            )
+
+        elif isinstance(source, (str, Path)):
+            source = RepositoryIndex(source, ext)
+
+        assert isinstance(source, (RepositoryIndex, RepositoryClient))
+        assert isinstance(destination, RepositoryIndex)
+
+        self.source = source
+        self.destination = destination
+        self.jobs = jobs
+        self.delete = delete
+
+    def _get_source_packages(self) -> dict:
+        """
+        returns the packages of the source
+
+        :return: packages by filename
+        :rtype: dict
+        """
+        if isinstance(self.source, RepositoryClient):
+            return self.source.index()
+
+        self.source.update()
+        return self.source.packages
+
+    def diff(self) -> tuple:
+        """
+        compare the indexes of the source and the destination
+
+        :return: missing or changed packages of the source by filename,
+                 filenames of the packages that are only in the
+                 destination and number of unchanged packages
+        :rtype: tuple
+        """
+        source = self._get_source_packages()
+        self.destination.update()
+        destination = self.destination.packages
+
+        changed = {
+            filename: package
+            for filename, package in source.items()
+            if (filename not in destination) or (
+                destination[filename]["digest"] != package["digest"]
+            )
+        }
+        removed = sorted(set(destination).difference(source))
+
+        return changed, removed, len(source) - len(changed)
+
+    def _transfer(self, filename: str, package: dict) -> int:
+        """
+        transfer the package into the destination and verify its digest;
+        the package is replaced at once
+
+        :param filename: package filename
+        :type filename: str
+        :param package: package of the source index
+        :type package: dict
+        :raises RepositoryException: if the digest does not match
+        :return: number of transferred bytes
+        :rtype: int
+        """
+        directory = self.destination.directory
+        if isinstance(self.source, RepositoryClient):
+            # verified by the client
+            return self.source.download(filename, directory).stat().st_size
+
+        import shutil
+
+        fn = directory.joinpath(filename)
+        tmp_filename = fn.with_name(
+            f".{fn.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            shutil.copyfile(
+                self.source.directory.joinpath(filename), tmp_filename
+            )
+            if hash_file(tmp_filename).hex() != package["digest"]:
+                raise RepositoryException(
+                    f"The digest of the copied package '{filename}' does "
+                    f"not match the index!"
+                )
+
+            os.replace(tmp_filename, fn)
+
+        finally:
+            try:
+                tmp_filename.unlink()
+
+            except FileNotFoundError:
+                # replaced the package
+                pass
+
+        return package["size"]
+
+    @tracer.traced("RepositoryMirror.run")
+    def run(self, dry_run: bool = False) -> MirrorResult:
+        """
+        transfer the missing or changed packages in parallel, remove the
+        packages that are not in the source, if requested, and update the
+        index of the destination at once
+
+        :param dry_run: if True, only the differences are determined,
+                        defaults to False
+        :type dry_run: bool, optional
+        :return: mirror result
+        :rtype: MirrorResult
+        """
+        changed, removed, unchanged = self.diff()
+        if not self.delete:
+            removed = []
+
+        if dry_run:
+            return MirrorResult(
+                sorted(changed), removed, {}, unchanged,
+                sum(package["size"] for package in changed.values()), True
+            )
+
+        log.debug(
+            f"Mirroring {len(changed)} packages to "
+            f"'{self.destination.directory}'..."
+        )
+        self.destination.directory.mkdir(parents=True, exist_ok=True)
+
+        transferred, failed, size = {}, {}, 0
+        with FileLock(self.destination.directory).exclusive():
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                futures = {
+                    filename: executor.submit(
+                        self._transfer, filename, package
+                    )
+                    for filename, package in changed.items()
+                }
+                for filename, future in futures.items():
+                    try:
+                        size += future.result()
+
+                    except (RepositoryException, OSError) as e:
+                        log.error(f"Mirroring '{filename}' failed: {e}")
+                        failed[filename] = e
+                        continue
+
+                    transferred[filename] = changed[filename]
+
+            for filename in removed:
+                try:
+                    self.destination.directory.joinpath(filename).unlink()
+
+                except FileNotFoundError:
+                    # removed in the meantime
+                    pass
+
+            # readers see either the old or the new index
+            self.destination.merge(transferred, removed)
+
+        return MirrorResult(
+            sorted(transferred), removed, failed, unchanged, size, False
+        )
+
+    def __repr__(self) -> str:
+        """
+        string representation of the repository mirror
+
+        :return: string representation of the repository mirror
+        :rtype: str
+        """
+        return (
+            f"<RepositoryMirror(source={self.source!r}, "
+            f"destination={self.destination!r})>"
+        )
@@ -0,0 +1,524 @@
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Union, Iterable
+
+from powerstrip.models.metadatarecord import MetadataRecord
+from powerstrip.models.pluginpackage import PluginPackage
+from powerstrip.repository.searchindex import SearchIndex, SearchResult
+from powerstrip.tracing import tracer
+from powerstrip.utils.filelock import FileLock
+from powerstrip.utils.semver import SemVer
+from powerstrip.utils.utils import ensure_path, hash_file
+from powerstrip.exceptions import PluginPackageException, MetadataException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+class RepositoryIndex:
+    """
+    index of the plugin packages in a repository directory; the metadata
+    of the packages is persisted in an index file, so that only added or
+    changed packages have to be opened, and it is kept in a search index
+    """
+    INDEX_FILENAME = ".index.json"
+    INDEX_VERSION = 2
+
+    def __init__(self, directory: Union[str, Path], ext: str = ".psp"):
+        """
+        initialize the repository index
+
+        :param directory: repository directory with the plugin packages
+        :type directory: Union[str, Path]
+        :param ext: plugin extension name, defaults to ".psp"
+        :type ext: str, optional
+        """
+        assert isinstance(directory, (str, Path))
+        assert isinstance(ext, str) and ext.startswith(".")
+
+        self.directory = ensure_path(directory)
+        self.ext = ext
+        self.search_index = SearchIndex()
+        self._packages = {}
+        # modification time and size of broken packages by filename
+        self._skipped = {}
+        self._directory_mtime = None
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    @property
+    def filename(self) -> Path:
+        """
+        returns the filename of the persisted index
+
+        :return: index filename
+        :rtype: Path
+        """
+        return self.directory.joinpath(self.INDEX_FILENAME)
+
+    @property
+    def packages(self) -> dict:
+        """
+        returns the indexed packages, i.e., their modification time, size,
+        content digest and metadata by package filename
+
+        :return: packages by filename
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._packages)
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._packages
+
+    def load(self) -> None:
+        """
+        load the persisted index, if it exists and is compatible
+        """
+        import json
+
+        with self._lock:
+            self._loaded = True
+            try:
+                with self.filename.open() as f:
+                    index = json.load(f)
+
+            except (OSError, ValueError):
+                # not indexed yet or broken index => rebuild it
+                return
+
+            if index.get("version") != self.INDEX_VERSION:
+                return
+
+            for filename, package in index["packages"].items():
+                try:
+                    record = MetadataRecord.from_dict(package["metadata"])
+
+                except (KeyError, TypeError, AttributeError):
+                    # broken entry => read the package again
+                    continue
+
+                self._packages[filename] = package
+                self.search_index.add(filename, record)
+
+            self._skipped.update({
+                filename: tuple(stat)
+                for filename, stat in index.get("skipped", {}).items()
+            })
+
+    def save(self) -> None:
+        """
+        save the index at once, i.e., readers never see a partial index
+        """
+        import json
+
+        with self._lock:
+            index = {
+                "version": self.INDEX_VERSION,
+                "packages": self._packages,
+                "skipped": self._skipped
+            }
+            tmp_filename = self.filename.with_name(
+                f"{self.INDEX_FILENAME}."
+                f"{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            with tmp_filename.open("w") as f:
+                json.dump(index, f, separators=(",", ":"))
+
+            os.replace(tmp_filename, self.filename)
+
+    def _add(self, entry: os.DirEntry) -> bool:
+        """
+        read the metadata of the package and add it to the index
+
+        :param entry: directory entry of the package
+        :type entry: os.DirEntry
+        :return: True, if the package has been added
+        :rtype: bool
+        """
+        import yaml
+
+        stat = entry.stat()
+        try:
+            md = PluginPackage.info(entry.path)
+
+        except (
+            PluginPackageException, MetadataException, yaml.YAMLError,
+            KeyError, OSError
+        ) as e:
+            # broken package => not searchable and not read again, until
+            # it has been changed
+            log.warning(f"Skipping package '{entry.name}': {e}")
+            self._skipped[entry.name] = (stat.st_mtime_ns, stat.st_size)
+            return False
+
+        self._packages[entry.name] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": hash_file(entry.path).hex(),
+            "metadata": md.dict
+        }
+        self.search_index.add(entry.name, MetadataRecord.from_metadata(md))
+
+        return True
+
+    def _remove(self, filename: str) -> None:
+        """
+        remove the package from the index
+
+        :param filename: package filename
+        :type filename: str
+        """
+        self._packages.pop(filename, None)
+        self._skipped.pop(filename, None)
+        self.search_index.remove(filename)
+
+    def _scan(self) -> Iterable[os.DirEntry]:
+        """
+        returns the plugin packages of the repository directory
+        """
+        with os.scandir(self.directory) as it:
+            return [
+                entry
+                for entry in it
+                if entry.name.endswith(self.ext) and entry.is_file()
+            ]
+
+    @tracer.traced("RepositoryIndex.update")
+    def update(self, force: bool = False) -> int:
+        """
+        update the index incrementally, i.e., the packages are stat'ed and
+        only packages that have been added or changed since the last
+        update, including packages rewritten in place, are read
+
+        :param force: if True, the content digest of all packages is
+                      compared, e.g., to detect packages rewritten without
+                      changing their modification time and size,
+                      defaults to False
+        :type force: bool, optional
+        :return: number of added, changed or removed packages
+        :rtype: int
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+            # stat'ed before scanning, so that later changes are detected
+            directory_mtime = self._get_directory_mtime()
+            exists = directory_mtime is not None
+            entries = self._scan() if exists else []
+            changes = 0
+            for filename in set(self._packages).union(
+                self._skipped
+            ).difference(entry.name for entry in entries):
+                # package has been removed
+                self._remove(filename)
+                changes += 1
+
+            for entry in entries:
+                package = self._packages.get(entry.name)
+                stat = entry.stat()
+                if (not force) and (
+                    self._skipped.get(entry.name) ==
+                    (stat.st_mtime_ns, stat.st_size)
+                ):
+                    # broken package has not been changed
+                    continue
+
+                if (
+                    (package is not None) and
+                    (package["mtime_ns"] == stat.st_mtime_ns) and
+                    (package["size"] == stat.st_size) and (
+                        (not force) or
+                        (hash_file(entry.path).hex() == package["digest"])
+                    )
+                ):
+                    # package has not been changed
+                    continue
+
+                self._remove(entry.name)
+                self._add(entry)
+                changes += 1
+
+            if exists and (changes or not self.filename.exists()):
+                log.debug(f"Updated {changes} packages of the index...")
+                modified = self._get_directory_mtime() != directory_mtime
+                self.save()
+                if not modified:
+                    # saving the index modifies the directory as well
+                    directory_mtime = self._get_directory_mtime()
+
+            self._directory_mtime = directory_mtime
+
+            return changes
+
+    def _get_directory_mtime(self) -> int:
+        """
+        returns the modification time of the repository directory
+
+        :return: modification time in nanoseconds or None, if the
+                 directory does not exist
+        :rtype: int
+        """
+        try:
+            return self.directory.stat().st_mtime_ns
+
+        except FileNotFoundError:
+            return None
+
+    def update_if_modified(self) -> int:
+        """
+        update the index only if packages have been added or removed since
+        the last update, i.e., a single stat of the directory, if it has
+        not been modified; packages rewritten in place are detected by
+        update() only
+
+        :return: number of added, changed or removed packages
+        :rtype: int
+        """
+        with self._lock:
+            directory_mtime = self._get_directory_mtime()
+            if (
+                self._loaded and
+                (directory_mtime is not None) and
+                (directory_mtime == self._directory_mtime)
+            ):
+                return 0
+
+            return self.update()
+
+    def add(self, plugin_filename: Union[str, Path]) -> None:
+        """
+        add or replace a package of the repository directory, e.g., after
+        it has been packed
+
+        :param plugin_filename: plugin filename
+        :type plugin_filename: Union[str, Path]
+        """
+        plugin_filename = ensure_path(plugin_filename, must_exist=True)
+
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+            with os.scandir(plugin_filename.parent) as it:
+                for entry in it:
+                    if entry.name == plugin_filename.name:
+                        self._remove(entry.name)
+                        if self._add(entry):
+                            self.save()
+
+                        break
+
+    def merge(self, packages: dict, removed: Iterable[str] = ()) -> None:
+        """
+        record packages that have been copied into the repository directory
+        by their known content digest and metadata, i.e., without opening
+        them, and remove the given packages; the index is saved once, so
+        that readers see either all or none of the changes
+
+        :param packages: content digest and metadata by package filename
+        :type packages: dict
+        :param removed: filenames of removed packages, defaults to ()
+        :type removed: Iterable[str], optional
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+            for filename in removed:
+                self._remove(filename)
+
+            for filename, package in packages.items():
+                stat = self.directory.joinpath(filename).stat()
+                self._remove(filename)
+                self._packages[filename] = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "digest": package["digest"],
+                    "metadata": package["metadata"]
+                }
+                self.search_index.add(
+                    filename, MetadataRecord.from_dict(package["metadata"])
+                )
+
+            self.save()
+
+    @tracer.traced("RepositoryIndex.collect_garbage")
+    def collect_garbage(
+        self,
+        keep_last: int = None,
+        max_age: float = None,
+        keep: Iterable[tuple] = (),
+        dry_run: bool = True
+    ) -> list:
+        """
+        remove old versions of the packages, which is decided by the index
+        only, i.e., without opening the packages; a package is kept, if it
+        is one of the latest versions of its plugin, if it is not older
+        than the given age or if its plugin name and version are given
+
+        :param keep_last: number of latest versions that are kept per
+                          plugin, defaults to None
+        :type keep_last: int, optional
+        :param max_age: packages modified within the given seconds are
+                        kept, defaults to None
+        :type max_age: float, optional
+        :param keep: plugin names and versions of the packages that are
+                     kept, e.g., installed plugins, defaults to ()
+        :type keep: Iterable[tuple], optional
+        :param dry_run: if True, the packages are not removed,
+                        defaults to True
+        :type dry_run: bool, optional
+        :return: filenames of the removed packages
+        :rtype: list
+        """
+        assert (keep_last is not None) or (max_age is not None)
+        assert (keep_last is None) or (
+            isinstance(keep_last, int) and (keep_last >= 0)
+        )
+        assert (max_age is None) or (max_age >= 0)
+
+        keep = {(name, str(version)) for name, version in keep}
+        min_mtime_ns = (
+            time.time_ns() - int(max_age * 1e9)
+            if max_age is not None else
+            None
+        )
+
+        # no package is added or removed in the meantime
+        with self._lock, FileLock(self.directory).exclusive():
+            self.update()
+
+            plugins = {}
+            for filename, package in self._packages.items():
+                metadata = package["metadata"]
+                try:
+                    version = SemVer.create_from_str(metadata["version"])
+
+                except (KeyError, TypeError):
+                    # unknown version => never removed
+                    continue
+
+                plugins.setdefault(metadata["name"], []).append(
+                    (version, filename, package)
+                )
+
+            removed = []
+            for name, packages in plugins.items():
+                latest = sorted(
+                    {version.precedence for version, _, _ in packages},
+                    reverse=True
+                )
+                latest = set(latest[:keep_last] if keep_last else [])
+                removed.extend(
+                    filename
+                    for version, filename, package in packages
+                    if not (
+                        (version.precedence in latest) or
+                        ((name, str(version)) in keep) or
+                        (
+                            (min_mtime_ns is not None) and
+                            (package["mtime_ns"] >= min_mtime_ns)
+                        )
+                    )
+                )
+
+            removed.sort()
+            if dry_run or not removed:
+                return removed
+
+            log.debug(f"Removing {len(removed)} old packages...")
+            for filename in removed:
+                try:
+                    self.directory.joinpath(filename).unlink()
+
+                except FileNotFoundError:
+                    # removed in the meantime
+                    pass
+
+            # readers see either the old or the new index
+            self.merge({}, removed)
+
+            return removed
+
+    def get(self, filename: str) -> MetadataRecord:
+        """
+        returns the metadata record of the given package
+
+        :param filename: package filename
+        :type filename: str
+        :return: metadata record or None, if not indexed
+        :rtype: MetadataRecord
+        """
+        return self.search_index.get(filename)
+
+    def get_package(self, filename: str) -> dict:
+        """
+        returns the modification time, size, content digest and metadata
+        of the given package
+
+        :param filename: package filename
+        :type filename: str
+        :return: package or None, if not indexed
+        :rtype: dict
+        """
+        return self._packages.get(filename)
+
+    def search(
+        self,
+        query: str = "",
+        category: str = None,
+        tags: Iterable[str] = None,
+        limit: int = None,
+        facets: bool = True,
+        update: bool = True
+    ) -> SearchResult:
+        """
+        search the packages of the repository, see SearchIndex.search
+
+        :param query: search query, defaults to "" for all packages
+        :type query: str, optional
+        :param category: category the packages must match, defaults to None
+        :type category: str, optional
+        :param tags: tags the packages must all match, defaults to None
+        :type tags: Iterable[str], optional
+        :param limit: maximum number of hits, defaults to None
+        :type limit: int, optional
+        :param facets: if True, the matching packages are counted per
+                       category and tag, defaults to True
+        :type facets: bool, optional
+        :param update: if True, the index is updated before, if packages
+                       have been added or removed, see update_if_modified(),
+                       defaults to True
+        :type update: bool, optional
+        :return: hits ranked by version, latest first, and facet counts
+        :rtype: SearchResult
+        """
+        with self._lock:
+            if update or not self._loaded:
+                self.update_if_modified()
+
+            return self.search_index.search(
+                query=query, category=category, tags=tags, limit=limit,
+                facets=facets
+            )
+
+    def __repr__(self) -> str:
+        """
+        string representation of the repository index
+
+        :return: string representation of the repository index
+        :rtype: str
+        """
+        return (
+            f"<RepositoryIndex(directory='{self.directory}', "
+            f"ext='{self.ext}', packages={len(self._packages)})>"
+        )
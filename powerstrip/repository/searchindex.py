@@ -0,0 +1,337 @@
+import re
+import bisect
+import heapq
+import logging
+import itertools
+import collections
+from typing import Iterable
+
+from powerstrip.models.metadatarecord import MetadataRecord
+from powerstrip.utils.semver import SemVer
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# fields that are indexed for full-text search
+SEARCH_FIELDS = ("name", "description", "author", "tags", "category")
+
+# splits text into terms
+TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> set:
+    """
+    returns the lower-case terms of the given text
+
+    :param text: text
+    :type text: str
+    :return: terms
+    :rtype: set
+    """
+    return set(TERM_PATTERN.findall(text.lower()))
+
+
+class SearchResult:
+    """
+    result of a search, i.e., the ranked hits and the facet counts of all
+    matching packages
+    """
+    def __init__(self, hits: list, total: int, facets: dict):
+        """
+        initialize the search result
+
+        :param hits: matching package keys and records, latest version first
+        :type hits: list
+        :param total: number of matching packages
+        :type total: int
+        :param facets: counts of the matching packages per category and tag
+        :type facets: dict
+        """
+        self.hits = hits
+        self.total = total
+        self.facets = facets
+
+    def __iter__(self):
+        return iter(self.hits)
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def __repr__(self) -> str:
+        """
+        string representation of the search result
+
+        :return: string representation of the search result
+        :rtype: str
+        """
+        return f"<SearchResult(total={self.total}, hits={len(self.hits)})>"
+
+
+class SearchIndex:
+    """
+    inverted index over the metadata of packages, i.e., the keys of the
+    packages are kept per field and term, so that term and prefix queries
+    are set intersections; an additional field "*" holds the terms of all
+    fields for unrestricted terms
+    """
+    ANY_FIELD = "*"
+
+    def __init__(self):
+        self._records = {}
+        self._ranks = {}
+        self._order = []
+        fields = SEARCH_FIELDS + (self.ANY_FIELD, )
+        self._postings = {field: {} for field in fields}
+        self._vocabulary = {field: [] for field in fields}
+        self._facets = {"category": {}, "tags": {}}
+        self._values = {"category": {}, "tags": {}}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def get(self, key: str) -> MetadataRecord:
+        """
+        returns the record of the given package
+
+        :param key: package key, e.g., the package filename
+        :type key: str
+        :return: metadata record or None, if not indexed
+        :rtype: MetadataRecord
+        """
+        return self._records.get(key)
+
+    def _get_terms(self, record: MetadataRecord) -> dict:
+        """
+        returns the terms of the record by field
+        """
+        terms = {
+            "name": tokenize(record.name) | {record.name.lower()},
+            "description": tokenize(record.description),
+            "author": tokenize(record.author),
+            "tags": set(record.tags).union(*map(tokenize, record.tags)),
+            "category": tokenize(record.category) | {record.category.lower()}
+        }
+        terms[self.ANY_FIELD] = set().union(*terms.values())
+
+        return terms
+
+    def add(self, key: str, record: MetadataRecord) -> None:
+        """
+        add or replace the record of the given package
+
+        :param key: package key, e.g., the package filename
+        :type key: str
+        :param record: metadata record of the package
+        :type record: MetadataRecord
+        """
+        assert isinstance(record, MetadataRecord)
+
+        if key in self._records:
+            self.remove(key)
+
+        self._records[key] = record
+        try:
+            version = SemVer.create_from_str(record.version).precedence
+
+        except TypeError:
+            version = (0, 0, 0, (0, ()))
+
+        rank = self._ranks[key] = (version, record.name, key)
+        bisect.insort(self._order, rank)
+
+        for field, terms in self._get_terms(record).items():
+            postings = self._postings[field]
+            for term in terms:
+                keys = postings.get(term)
+                if keys is None:
+                    # new term
+                    keys = postings[term] = set()
+                    bisect.insort(self._vocabulary[field], term)
+
+                keys.add(key)
+
+        self._values["category"][key] = (record.category, )
+        self._values["tags"][key] = tuple(record.tags)
+        for name, values in self._values.items():
+            for value in values[key]:
+                self._facets[name].setdefault(value, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        """
+        remove the record of the given package
+
+        :param key: package key, e.g., the package filename
+        :type key: str
+        """
+        record = self._records.pop(key, None)
+        if record is None:
+            return
+
+        rank = self._ranks.pop(key)
+        del self._order[bisect.bisect_left(self._order, rank)]
+
+        for field, terms in self._get_terms(record).items():
+            postings = self._postings[field]
+            for term in terms:
+                keys = postings[term]
+                keys.discard(key)
+                if not keys:
+                    # term is not used anymore
+                    del postings[term]
+                    vocabulary = self._vocabulary[field]
+                    del vocabulary[bisect.bisect_left(vocabulary, term)]
+
+        for name, values in self._values.items():
+            for value in values.pop(key):
+                keys = self._facets[name][value]
+                keys.discard(key)
+                if not keys:
+                    del self._facets[name][value]
+
+    def _match_term(self, term: str, field: str) -> set:
+        """
+        returns the keys of the packages matching the term in the given
+        field; a term ending with "*" is a prefix query
+
+        :param term: lower-case term
+        :type term: str
+        :param field: searched field
+        :type field: str
+        :return: matching keys
+        :rtype: set
+        """
+        postings = self._postings[field]
+        if not term.endswith("*"):
+            return postings.get(term, set())
+
+        # all terms starting with the prefix are adjacent
+        term = term.rstrip("*")
+        vocabulary = self._vocabulary[field]
+        start = bisect.bisect_left(vocabulary, term)
+        end = bisect.bisect_left(vocabulary, term + "\uffff", start)
+        matches = [postings[t] for t in vocabulary[start:end]]
+        if len(matches) == 1:
+            return matches[0]
+
+        return set().union(*matches)
+
+    def search(
+        self,
+        query: str = "",
+        category: str = None,
+        tags: Iterable[str] = None,
+        limit: int = None,
+        facets: bool = True
+    ) -> SearchResult:
+        """
+        search the packages matching all terms of the query; terms can be
+        restricted to a field by "field:term", e.g., "tags:csv", and
+        terms ending with "*" are prefix queries
+
+        :param query: search query, defaults to "" for all packages
+        :type query: str, optional
+        :param category: category the packages must match, defaults to None
+        :type category: str, optional
+        :param tags: tags the packages must all match, defaults to None
+        :type tags: Iterable[str], optional
+        :param limit: maximum number of hits, defaults to None
+        :type limit: int, optional
+        :param facets: if True, the matching packages are counted per
+                       category and tag, defaults to True
+        :type facets: bool, optional
+        :return: hits ranked by version, latest first, and facet counts
+        :rtype: SearchResult
+        """
+        assert (limit is None) or (isinstance(limit, int) and (limit >= 0))
+
+        candidates = []
+        for part in query.lower().split():
+            field, _, term = part.rpartition(":")
+            if not field:
+                field = self.ANY_FIELD
+
+            elif field not in SEARCH_FIELDS:
+                raise ValueError(f"Unknown search field '{field}'!")
+
+            terms = TERM_PATTERN.findall(term)
+            if term.endswith("*") and terms:
+                terms[-1] += "*"
+
+            for t in terms:
+                candidates.append(self._match_term(t, field))
+
+        if category is not None:
+            candidates.append(self._facets["category"].get(category, set()))
+
+        for tag in tags or ():
+            candidates.append(self._facets["tags"].get(tag.lower(), set()))
+
+        if candidates:
+            # intersect starting with the smallest set
+            candidates.sort(key=len)
+            keys = candidates[0].intersection(*candidates[1:])
+
+        else:
+            keys = self._records.keys()
+
+        return SearchResult(
+            hits=self._rank(keys, limit),
+            total=len(keys),
+            facets=self._count_facets(keys) if facets else {}
+        )
+
+    def _rank(self, keys, limit: int = None) -> list:
+        """
+        returns the records of the keys, latest version first
+        """
+        if (limit is None) or (limit >= len(keys)):
+            ranked = sorted(map(self._ranks.__getitem__, keys), reverse=True)
+
+        elif limit * len(self._records) < len(keys) ** 2:
+            # many matches => the first matches in the order of all
+            # packages are found after about limit * total / matches
+            ranked = itertools.islice(
+                (rank for rank in reversed(self._order) if rank[2] in keys),
+                limit
+            )
+
+        else:
+            ranked = heapq.nlargest(
+                limit, map(self._ranks.__getitem__, keys)
+            )
+
+        return [(rank[2], self._records[rank[2]]) for rank in ranked]
+
+    def _count_facets(self, keys) -> dict:
+        """
+        returns the number of matching packages per category and tag
+        """
+        facets = {}
+        for name, values in self._facets.items():
+            if len(keys) == len(self._records):
+                # all packages match
+                counts = {value: len(ids) for value, ids in values.items()}
+
+            else:
+                counts = collections.Counter(itertools.chain.from_iterable(
+                    map(self._values[name].__getitem__, keys)
+                ))
+
+            facets[name] = dict(
+                sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            )
+
+        return facets
+
+    def __repr__(self) -> str:
+        """
+        string representation of the search index
+
+        :return: string representation of the search index
+        :rtype: str
+        """
+        return f"<SearchIndex(packages={len(self._records)})>"
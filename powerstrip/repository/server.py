@@ -0,0 +1,304 @@
+import os
+import re
+import logging
+import threading
+import http.server
+import socketserver
+from pathlib import Path
+from typing import Union
+from urllib.parse import unquote, urlsplit
+
+from powerstrip.repository.repositoryindex import RepositoryIndex
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# single byte range, e.g., "bytes=0-99", "bytes=100-" or "bytes=-22"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RepositoryRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    request handler of the repository server, which serves the index at
+    /index.json and the plugin packages at /packages/<filename>; it keeps
+    connections alive and supports conditional and range requests
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "powerstrip"
+
+    INDEX_PATH = "/index.json"
+    PACKAGES_PATH = "/packages/"
+
+    def log_message(self, format: str, *args) -> None:
+        log.debug(f"{self.address_string()} - {format % args}")
+
+    def _send_empty(self, status: int, headers: dict = None) -> None:
+        """
+        send a response without body
+
+        :param status: HTTP status code
+        :type status: int
+        :param headers: additional headers, defaults to None
+        :type headers: dict, optional
+        """
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _get_range(self, size: int) -> tuple:
+        """
+        returns the requested byte range of a file with the given size
+
+        :param size: file size
+        :type size: int
+        :return: first and last byte, None if the whole file is requested
+                 or False if the range is not satisfiable
+        :rtype: tuple
+        """
+        match = RANGE_PATTERN.match(self.headers.get("Range", ""))
+        if match is None:
+            # no or unsupported range, e.g., multiple ranges
+            return None
+
+        first, last = match.groups()
+        if not first and not last:
+            return None
+
+        if not first:
+            # suffix range
+            first, last = max(size - int(last), 0), size - 1
+
+        else:
+            first = int(first)
+            last = min(int(last), size - 1) if last else size - 1
+
+        if (first > last) or (first >= size):
+            return False
+
+        return first, last
+
+    def _send_file(self, filename: Path, etag: str, content_type: str):
+        """
+        send the file, if it has been changed, or the requested range
+
+        :param filename: filename of the sent file
+        :type filename: Path
+        :param etag: entity tag of the file's content
+        :type etag: str
+        :param content_type: content type of the file
+        :type content_type: str
+        """
+        if etag in map(
+            str.strip, self.headers.get("If-None-Match", "").split(",")
+        ):
+            # client has the current version
+            self._send_empty(304, {"ETag": etag})
+            return
+
+        with filename.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            byte_range = self._get_range(size)
+            if byte_range is False:
+                self._send_empty(416, {"Content-Range": f"bytes */{size}"})
+                return
+
+            if byte_range is None:
+                self.send_response(200)
+                first, length = 0, size
+
+            else:
+                self.send_response(206)
+                first, last = byte_range
+                length = last - first + 1
+                self.send_header(
+                    "Content-Range", f"bytes {first}-{last}/{size}"
+                )
+
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(length))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.end_headers()
+
+            if self.command == "HEAD":
+                return
+
+            f.seek(first)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(remaining, 64 * 1024))
+                if not chunk:
+                    break
+
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def do_GET(self) -> None:
+        """
+        serve the index or a plugin package
+        """
+        repository = self.server.repository
+        path = unquote(urlsplit(self.path).path)
+        if path == self.INDEX_PATH:
+            # packages are only read, if they have been changed
+            repository.update()
+            stat = repository.filename.stat()
+            self._send_file(
+                repository.filename,
+                f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+                "application/json"
+            )
+            return
+
+        filename = path[len(self.PACKAGES_PATH):]
+        if (
+            path.startswith(self.PACKAGES_PATH) and
+            filename.endswith(repository.ext) and
+            ("/" not in filename) and
+            not filename.startswith(".")
+        ):
+            fn = repository.directory.joinpath(filename)
+            try:
+                stat = fn.stat()
+
+            except OSError:
+                stat = None
+
+            if stat is not None:
+                package = repository.get_package(filename)
+                if (package is not None) and (
+                    (package["mtime_ns"], package["size"]) ==
+                    (stat.st_mtime_ns, stat.st_size)
+                ):
+                    # content digest of the indexed package
+                    etag = f'"{package["digest"]}"'
+
+                else:
+                    # not indexed yet
+                    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+                self._send_file(fn, etag, "application/zip")
+                return
+
+        self._send_empty(404)
+
+    do_HEAD = do_GET
+
+
+class _ThreadingHTTPServer(
+    socketserver.ThreadingMixIn, http.server.HTTPServer
+):
+    """
+    HTTP server that handles each connection in a daemon thread, i.e.,
+    http.server.ThreadingHTTPServer, which requires Python 3.7
+    """
+    daemon_threads = True
+
+
+class RepositoryServer:
+    """
+    small HTTP server that serves the packages of a repository directory,
+    so that many nodes pull their plugins from one place
+    """
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ext: str = ".psp"
+    ):
+        """
+        initialize the repository server
+
+        :param directory: repository directory with the plugin packages
+        :type directory: Union[str, Path]
+        :param host: address to listen on, defaults to "127.0.0.1"
+        :type host: str, optional
+        :param port: port to listen on, defaults to 0 for any free port
+        :type port: int, optional
+        :param ext: plugin extension name, defaults to ".psp"
+        :type ext: str, optional
+        """
+        assert isinstance(host, str)
+        assert isinstance(port, int) and (port >= 0)
+
+        self.repository = RepositoryIndex(directory, ext)
+        self._server = _ThreadingHTTPServer(
+            (host, port), RepositoryRequestHandler
+        )
+        self._server.repository = self.repository
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """
+        returns the base URL of the server
+
+        :return: base URL
+        :rtype: str
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self, poll_interval: float = 0.1) -> None:
+        """
+        serve requests until the server is stopped
+
+        :param poll_interval: interval in seconds to check whether the
+                              server is stopped, defaults to 0.1
+        :type poll_interval: float, optional
+        """
+        log.info(
+            f"Serving '{self.repository.directory}' at {self.url}..."
+        )
+        self.repository.update()
+        self._server.serve_forever(poll_interval)
+
+    def start(self) -> "RepositoryServer":
+        """
+        serve requests in a background thread
+
+        :return: started server
+        :rtype: RepositoryServer
+        """
+        assert self._thread is None
+
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="RepositoryServer", daemon=True
+        )
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        """
+        stop serving requests and close the socket
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+
+        self._server.server_close()
+
+    def __enter__(self) -> "RepositoryServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def __repr__(self) -> str:
+        """
+        string representation of the repository server
+
+        :return: string representation of the repository server
+        :rtype: str
+        """
+        return (
+            f"<RepositoryServer(directory='{self.repository.directory}', "
+            f"url='{self.url}')>"
+        )
@@ -0,0 +1,319 @@
+import abc
+import queue
+import weakref
+import logging
+import threading
+import contextlib
+import contextvars
+from typing import Callable
+
+from powerstrip.models.plugin import Plugin
+from powerstrip.exceptions import PluginManagerException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+class InstanceScope(abc.ABC):
+    """
+    abstract lifecycle scope of managed plugin instances, i.e., it
+    decides which callers share an instance; instances are created by
+    the factory, which also calls init() once per instance
+    """
+    name = None
+
+    def __init__(self, factory: Callable[[], Plugin]):
+        """
+        initialize the scope
+
+        :param factory: creates a new initialized plugin instance
+        :type factory: Callable[[], Plugin]
+        """
+        self.factory = factory
+        self._instances = []
+        self._lock = threading.Lock()
+
+    def _create(self) -> Plugin:
+        """
+        create a new instance and keep track of it
+
+        :return: initialized plugin instance
+        :rtype: Plugin
+        """
+        plugin = self.factory()
+        with self._lock:
+            self._instances.append(plugin)
+
+        return plugin
+
+    def _hold(self) -> "_InstanceHolder":
+        """
+        create a new instance held by a holder, i.e., the instance is
+        shut down and forgotten once the holder has been collected
+
+        :return: holder of the initialized plugin instance
+        :rtype: _InstanceHolder
+        """
+        holder = _InstanceHolder(self._create())
+        finalizer = weakref.finalize(holder, self._expire, holder.plugin)
+        finalizer.atexit = False
+
+        return holder
+
+    def _expire(self, plugin: Plugin) -> None:
+        """
+        forget and shutdown the instance of a collected holder, e.g., of a
+        thread that has exited
+
+        :param plugin: plugin instance
+        :type plugin: Plugin
+        """
+        if not any(p is plugin for p in self._instances):
+            # already shut down by close(), which holds the lock, while
+            # the holders of the reset storage are collected
+            return
+
+        with self._lock:
+            if not any(p is plugin for p in self._instances):
+                return
+
+            self._instances = [p for p in self._instances if p is not plugin]
+
+        try:
+            plugin.shutdown()
+
+        except Exception as e:
+            log.error(f"Shutting down an expired instance failed: {e}")
+
+    @property
+    def instances(self) -> list:
+        """
+        returns all instances created by the scope
+
+        :return: plugin instances
+        :rtype: list
+        """
+        return list(self._instances)
+
+    @abc.abstractmethod
+    def acquire(self, timeout: float = None) -> Plugin:
+        """
+        returns the instance of the current caller
+
+        :param timeout: time in seconds to wait for an instance,
+                        defaults to None
+        :type timeout: float, optional
+        :return: initialized plugin instance
+        :rtype: Plugin
+        """
+
+    def release(self, plugin: Plugin) -> None:
+        """
+        return the instance acquired before
+
+        :param plugin: plugin instance
+        :type plugin: Plugin
+        """
+
+    @contextlib.contextmanager
+    def checkout(self, timeout: float = None):
+        """
+        acquire an instance for the duration of the with-block
+
+        :param timeout: time in seconds to wait for an instance,
+                        defaults to None
+        :type timeout: float, optional
+        """
+        plugin = self.acquire(timeout)
+        try:
+            yield plugin
+
+        finally:
+            self.release(plugin)
+
+    def _reset(self) -> None:
+        """
+        forget the instances assigned to the callers
+        """
+
+    def close(self) -> None:
+        """
+        shutdown all instances created by the scope
+        """
+        with self._lock:
+            instances, self._instances = self._instances, []
+            self._reset()
+
+        for plugin in instances:
+            plugin.shutdown()
+
+    def __repr__(self) -> str:
+        """
+        string representation of the scope
+
+        :return: string representation of the scope
+        :rtype: str
+        """
+        return (
+            f"<{self.__class__.__name__}(instances={len(self._instances)})>"
+        )
+
+
+class SingletonScope(InstanceScope):
+    """
+    one instance shared by all callers
+    """
+    name = "singleton"
+
+    def __init__(self, factory: Callable[[], Plugin]):
+        super().__init__(factory)
+        self._instance = None
+        self._create_lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> Plugin:
+        plugin = self._instance
+        if plugin is None:
+            with self._create_lock:
+                if self._instance is None:
+                    self._instance = self._create()
+
+                plugin = self._instance
+
+        return plugin
+
+    def _reset(self) -> None:
+        self._instance = None
+
+
+class _InstanceHolder:
+    """
+    holder of the instance of a thread or a context, which is collected
+    once the thread has exited or the context is not referenced anymore
+    """
+    __slots__ = ("plugin", "__weakref__")
+
+    def __init__(self, plugin: Plugin):
+        self.plugin = plugin
+
+
+class ThreadScope(InstanceScope):
+    """
+    one instance per thread, which is shut down once the thread has exited
+    """
+    name = "thread"
+
+    def __init__(self, factory: Callable[[], Plugin]):
+        super().__init__(factory)
+        self._local = threading.local()
+
+    def acquire(self, timeout: float = None) -> Plugin:
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = self._local.holder = self._hold()
+
+        return holder.plugin
+
+    def _reset(self) -> None:
+        self._local = threading.local()
+
+
+class ContextScope(InstanceScope):
+    """
+    one instance per contextvars context, e.g., per asyncio task; a copied
+    context shares the instance acquired before it has been copied, and
+    the instance is shut down once no context refers to it anymore
+    """
+    name = "context"
+
+    def __init__(self, factory: Callable[[], Plugin]):
+        super().__init__(factory)
+        self._var = contextvars.ContextVar(f"plugin_{id(self)}")
+
+    def acquire(self, timeout: float = None) -> Plugin:
+        holder = self._var.get(None)
+        if holder is None:
+            holder = self._hold()
+            self._var.set(holder)
+
+        return holder.plugin
+
+    def _reset(self) -> None:
+        self._var = contextvars.ContextVar(f"plugin_{id(self)}")
+
+
+class PoolScope(InstanceScope):
+    """
+    bounded pool of instances, i.e., each instance is used by one caller
+    at a time between acquire() and release()
+    """
+    name = "pool"
+
+    def __init__(self, factory: Callable[[], Plugin], size: int = 4):
+        """
+        initialize the pool scope
+
+        :param factory: creates a new initialized plugin instance
+        :type factory: Callable[[], Plugin]
+        :param size: maximum number of instances, defaults to 4
+        :type size: int, optional
+        """
+        assert isinstance(size, int) and (size > 0)
+
+        super().__init__(factory)
+        self.size = size
+        self._free = queue.LifoQueue()
+        self._created = 0
+
+    def acquire(self, timeout: float = None) -> Plugin:
+        try:
+            # most recently used instance first
+            return self._free.get_nowait()
+
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if create:
+            try:
+                return self._create()
+
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+
+                raise
+
+        try:
+            return self._free.get(timeout=timeout)
+
+        except queue.Empty:
+            raise PluginManagerException(
+                f"No instance available within {timeout} seconds!"
+            )
+
+    def release(self, plugin: Plugin) -> None:
+        if plugin in self._instances:
+            self._free.put(plugin)
+
+    def _reset(self) -> None:
+        self._free = queue.LifoQueue()
+        self._created = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}(size={self.size}, "
+            f"instances={len(self._instances)}, "
+            f"free={self._free.qsize()})>"
+        )
+
+
+# available scopes by name
+SCOPES = {
+    scope.name: scope
+    for scope in (SingletonScope, ThreadScope, ContextScope, PoolScope)
+}
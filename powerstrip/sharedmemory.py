@@ -0,0 +1,489 @@
+import os
+import logging
+import threading
+import collections
+
+try:
+    from multiprocessing import shared_memory
+
+except ImportError:
+    # shared memory requires Python 3.8+
+    shared_memory = None
+
+from powerstrip.exceptions import PluginProcessPoolException
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+def is_available() -> bool:
+    """
+    returns True, if shared memory is supported by the Python version
+
+    :return: True, if shared memory is supported
+    :rtype: bool
+    """
+    return shared_memory is not None
+
+
+def ensure_resource_tracker() -> None:
+    """
+    start the resource tracker of the shared memory segments, so that
+    worker processes started afterwards share it with the host process,
+    i.e., forked workers do not start their own tracker, which would
+    report the segments unlinked by the host as leaked
+    """
+    if is_available() and (os.name == "posix"):
+        from multiprocessing import resource_tracker
+
+        resource_tracker.ensure_running()
+
+
+def get_capacity(size: int, min_size: int = 4096) -> int:
+    """
+    returns the capacity of a segment for the given payload size, i.e.,
+    the next power of two, so that segments can be reused for payloads
+    of similar size
+
+    :param size: payload size in bytes
+    :type size: int
+    :param min_size: minimum segment size in bytes, defaults to 4096
+    :type min_size: int, optional
+    :return: capacity in bytes
+    :rtype: int
+    """
+    capacity = min_size
+    while capacity < size:
+        capacity <<= 1
+
+    return capacity
+
+
+class SharedBuffer:
+    """
+    handle of a payload that is stored in a shared memory segment,
+    i.e., only name and size of the segment are pickled
+    """
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        segment=None,
+        pool: "SharedMemoryPool" = None
+    ):
+        self.name = name
+        self.size = size
+        self._segment = segment
+        self._pool = pool
+
+    @property
+    def buf(self) -> memoryview:
+        """
+        returns the payload as memoryview of the shared memory segment
+
+        :return: payload
+        :rtype: memoryview
+        """
+        assert self._segment is not None, "segment is not attached"
+
+        return self._segment.buf[:self.size]
+
+    def tobytes(self) -> bytes:
+        """
+        returns a copy of the payload
+
+        :return: payload
+        :rtype: bytes
+        """
+        return bytes(self.buf)
+
+    def release(self) -> None:
+        """
+        return the segment to the pool from which it has been leased
+        """
+        if self._pool is not None:
+            self._pool.release(self.name)
+            self._pool = None
+            self._segment = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __reduce__(self):
+        # only the handle is transferred to other processes
+        return (SharedBuffer, (self.name, self.size))
+
+    def __repr__(self) -> str:
+        """
+        string representation of the shared buffer
+
+        :return: string representation of the shared buffer
+        :rtype: str
+        """
+        return f"<SharedBuffer(name='{self.name}', size={self.size})>"
+
+
+def _as_buffer(obj) -> memoryview:
+    """
+    returns a byte view of the given object, if it supports the
+    buffer protocol and is contiguous, otherwise None
+
+    :param obj: object
+    :return: byte view or None
+    :rtype: memoryview
+    """
+    if isinstance(obj, (str, int, float, SharedBuffer)) or obj is None:
+        return None
+
+    try:
+        return memoryview(obj).cast("B")
+
+    except (TypeError, ValueError):
+        # no buffer protocol or not contiguous
+        return None
+
+
+def encode(obj, lease: callable, threshold: int):
+    """
+    replace all buffers that are at least threshold bytes in size by
+    handles of shared memory segments, into which they are copied;
+    lists, tuples and dicts are traversed
+
+    :param obj: object to encode
+    :param lease: function returning a SharedBuffer for the given size
+    :type lease: callable
+    :param threshold: minimum payload size in bytes
+    :type threshold: int
+    :return: encoded object
+    """
+    if type(obj) in (list, tuple):
+        return type(obj)(encode(o, lease, threshold) for o in obj)
+
+    if type(obj) is dict:
+        return {k: encode(v, lease, threshold) for k, v in obj.items()}
+
+    view = _as_buffer(obj)
+    if (view is None) or (view.nbytes < threshold):
+        # keep object for regular pickling
+        return obj
+
+    buffer = lease(view.nbytes)
+    buffer.buf[:] = view
+
+    return buffer
+
+
+def decode(obj, resolve: callable):
+    """
+    replace all handles of shared memory segments by the result of
+    the resolve function; lists, tuples and dicts are traversed
+
+    :param obj: object to decode
+    :param resolve: function that is called for each SharedBuffer
+    :type resolve: callable
+    :return: decoded object
+    """
+    if type(obj) in (list, tuple):
+        return type(obj)(decode(o, resolve) for o in obj)
+
+    if type(obj) is dict:
+        return {k: decode(v, resolve) for k, v in obj.items()}
+
+    if isinstance(obj, SharedBuffer):
+        return resolve(obj)
+
+    return obj
+
+
+class SharedMemoryPool:
+    """
+    pool of shared memory segments that are reused for payloads of
+    similar size; all segments are unlinked when the pool is closed
+    """
+    def __init__(
+        self,
+        min_size: int = 4096,
+        max_free: int = 16,
+        on_destroy: callable = None
+    ):
+        """
+        initialize the shared memory pool
+
+        :param min_size: minimum segment size in bytes, defaults to 4096
+        :type min_size: int, optional
+        :param max_free: maximum number of free segments that are kept
+                         per capacity, defaults to 16
+        :type max_free: int, optional
+        :param on_destroy: called with the name of each unlinked segment,
+                           e.g., to detach it in other processes,
+                           defaults to None
+        :type on_destroy: callable, optional
+        :raises PluginProcessPoolException: if shared memory is unsupported
+        """
+        if not is_available():
+            raise PluginProcessPoolException(
+                "Shared memory requires Python 3.8 or newer!"
+            )
+
+        self.min_size = min_size
+        self.max_free = max_free
+        self.on_destroy = on_destroy
+        self._segments = {}
+        self._capacities = {}
+        self._free = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def lease(self, size: int) -> SharedBuffer:
+        """
+        lease a segment for a payload of the given size from the pool
+
+        :param size: payload size in bytes
+        :type size: int
+        :return: buffer that must be released after use
+        :rtype: SharedBuffer
+        """
+        capacity = get_capacity(size, self.min_size)
+        with self._lock:
+            if self._free[capacity]:
+                # reuse free segment
+                segment = self._segments[self._free[capacity].pop()]
+
+            else:
+                segment = shared_memory.SharedMemory(
+                    create=True, size=capacity
+                )
+                self._segments[segment.name] = segment
+                self._capacities[segment.name] = capacity
+
+        return SharedBuffer(segment.name, size, segment, self)
+
+    def adopt(self, name: str, size: int) -> SharedBuffer:
+        """
+        take over the lifetime management of a segment that has been
+        created by another process
+
+        :param name: name of the segment
+        :type name: str
+        :param size: payload size in bytes
+        :type size: int
+        :return: buffer that must be released after use
+        :rtype: SharedBuffer
+        """
+        with self._lock:
+            segment = self._segments.get(name)
+            if segment is None:
+                segment = shared_memory.SharedMemory(name=name)
+                self._segments[name] = segment
+                self._capacities[name] = get_capacity(size, self.min_size)
+
+        return SharedBuffer(name, size, segment, self)
+
+    def _destroy(self, segment) -> None:
+        """
+        close and unlink the segment
+
+        :param segment: shared memory segment
+        """
+        try:
+            segment.close()
+
+        except BufferError:
+            # payload is still referenced, memory is freed later
+            log.debug(f"segment '{segment.name}' is still referenced")
+
+        segment.unlink()
+        if self.on_destroy is not None:
+            self.on_destroy(segment.name)
+
+    def release(self, name: str) -> None:
+        """
+        return the segment with the given name to the pool
+
+        :param name: name of the segment
+        :type name: str
+        """
+        with self._lock:
+            if name not in self._segments:
+                # pool has already been closed
+                return
+
+            capacity = self._capacities[name]
+            if len(self._free[capacity]) < self.max_free:
+                self._free[capacity].append(name)
+                return
+
+            segment = self._segments.pop(name)
+            del self._capacities[name]
+
+        self._destroy(segment)
+
+    def close(self) -> None:
+        """
+        close and unlink all segments of the pool
+        """
+        with self._lock:
+            segments = list(self._segments.values())
+            self._segments.clear()
+            self._capacities.clear()
+            self._free.clear()
+
+        for segment in segments:
+            self._destroy(segment)
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __repr__(self) -> str:
+        """
+        string representation of the shared memory pool
+
+        :return: string representation of the shared memory pool
+        :rtype: str
+        """
+        return (
+            f"<SharedMemoryPool(min_size={self.min_size}, "
+            f"segments={len(self)})>"
+        )
+
+
+def _close_segment(segment) -> None:
+    """
+    close the mapping of an attached segment
+
+    :param segment: shared memory segment
+    """
+    try:
+        segment.close()
+
+    except BufferError:
+        # payload is still referenced by a plugin, the mapping is closed
+        # once the last view has been released, i.e., the segment must
+        # not try to close it again when it is collected
+        segment._mmap = None
+
+
+class SharedMemoryAttachments:
+    """
+    segments attached by a worker process, i.e., the worker side of
+    the shared memory transport; the least recently used segments are
+    detached, if too many segments are attached
+    """
+    def __init__(
+        self,
+        threshold: int,
+        min_size: int = 4096,
+        max_attached: int = 64
+    ):
+        """
+        initialize the attachments
+
+        :param threshold: minimum payload size in bytes for results
+        :type threshold: int
+        :param min_size: minimum segment size in bytes, defaults to 4096
+        :type min_size: int, optional
+        :param max_attached: maximum number of attached segments,
+                             defaults to 64
+        :type max_attached: int, optional
+        """
+        assert isinstance(max_attached, int) and (max_attached > 0)
+
+        self.threshold = threshold
+        self.min_size = min_size
+        self.max_attached = max_attached
+        self._segments = collections.OrderedDict()
+
+    def attach(self, name: str):
+        """
+        returns the segment with the given name, attaching it once
+
+        :param name: name of the segment
+        :type name: str
+        :return: shared memory segment
+        """
+        segment = self._segments.get(name)
+        if segment is not None:
+            self._segments.move_to_end(name)
+            return segment
+
+        segment = shared_memory.SharedMemory(name=name)
+        self._segments[name] = segment
+        while len(self._segments) > self.max_attached:
+            # detach the least recently used segment
+            _close_segment(self._segments.popitem(last=False)[1])
+
+        return segment
+
+    def detach(self, name: str) -> None:
+        """
+        close the segment with the given name, e.g., after it has been
+        unlinked by the host, so that a new segment with the same name
+        is attached again
+
+        :param name: name of the segment
+        :type name: str
+        """
+        segment = self._segments.pop(name, None)
+        if segment is not None:
+            _close_segment(segment)
+
+    def view(self, buffer: SharedBuffer) -> memoryview:
+        """
+        returns a zero-copy view of the payload; the view is only valid
+        during the current call
+
+        :param buffer: handle of the payload
+        :type buffer: SharedBuffer
+        :return: view of the payload
+        :rtype: memoryview
+        """
+        return self.attach(buffer.name).buf[:buffer.size]
+
+    def export(self, obj, hint: SharedBuffer = None):
+        """
+        encode the result of a call, i.e., large buffers are copied into
+        the segment provided by the host or into new segments whose
+        lifetime is then managed by the host
+
+        :param obj: result of the call
+        :param hint: segment leased by the host for the result
+        :type hint: SharedBuffer
+        :return: encoded result
+        """
+        created = []
+
+        def lease(size: int) -> SharedBuffer:
+            nonlocal hint
+            if hint is not None:
+                segment = self.attach(hint.name)
+                if segment.size >= size:
+                    # use segment provided by the host
+                    buffer = SharedBuffer(hint.name, size, segment)
+                    hint = None
+                    return buffer
+
+            segment = shared_memory.SharedMemory(
+                create=True, size=get_capacity(size, self.min_size)
+            )
+            created.append(segment)
+
+            return SharedBuffer(segment.name, size, segment)
+
+        res = encode(obj, lease, self.threshold)
+        for segment in created:
+            # segment is adopted by the host
+            segment.close()
+
+        return res
+
+    def close(self) -> None:
+        """
+        close all attached segments
+        """
+        for segment in self._segments.values():
+            _close_segment(segment)
+
+        self._segments.clear()
+
+    def __len__(self) -> int:
+        return len(self._segments)
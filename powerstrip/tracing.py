@@ -0,0 +1,362 @@
+import os
+import abc
+import time
+import logging
+import functools
+import threading
+import contextvars
+from pathlib import Path
+from typing import Union
+
+from powerstrip.utils.utils import ensure_path
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# span that is active in the current context
+_current_span = contextvars.ContextVar("powerstrip_span", default=None)
+
+
+class Span:
+    """
+    timed operation with attributes, nested in its parent span
+    """
+    __slots__ = (
+        "name", "attributes", "parent", "start", "end", "pid", "tid"
+    )
+
+    def __init__(self, name: str, attributes: dict, parent: "Span" = None):
+        """
+        initialize and start the span
+
+        :param name: name of the operation
+        :type name: str
+        :param attributes: attributes of the operation
+        :type attributes: dict
+        :param parent: enclosing span, defaults to None
+        :type parent: Span, optional
+        """
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self.end = None
+        self.start = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value) -> None:
+        """
+        set an attribute of the span
+
+        :param key: attribute name
+        :type key: str
+        :param value: attribute value
+        """
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        """
+        returns the duration of the finished span in seconds
+
+        :return: duration in seconds or None, if span is not finished
+        :rtype: float
+        """
+        if self.end is None:
+            return None
+
+        return (self.end - self.start) / 1e9
+
+    @property
+    def depth(self) -> int:
+        """
+        returns the number of enclosing spans
+
+        :return: nesting depth
+        :rtype: int
+        """
+        depth, parent = 0, self.parent
+        while parent is not None:
+            depth, parent = depth + 1, parent.parent
+
+        return depth
+
+    def to_trace_event(self) -> dict:
+        """
+        returns the span as complete event of the Chrome trace-event
+        format, which can be loaded by chrome://tracing or Perfetto
+
+        :return: trace event
+        :rtype: dict
+        """
+        return {
+            "name": self.name,
+            "cat": self.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": ((self.end or self.start) - self.start) / 1000,
+            "pid": self.pid,
+            "tid": self.tid,
+            "args": {k: str(v) for k, v in self.attributes.items()}
+        }
+
+    def __repr__(self) -> str:
+        """
+        string representation of the span
+
+        :return: string representation of the span
+        :rtype: str
+        """
+        return (
+            f"<Span(name='{self.name}', duration={self.duration}, "
+            f"attributes={self.attributes})>"
+        )
+
+
+class _NoopSpan:
+    """
+    span used while tracing is disabled
+    """
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(abc.ABC):
+    """
+    abstract exporter of finished spans
+    """
+    @abc.abstractmethod
+    def export(self, span: Span) -> None:
+        """
+        export the finished span
+
+        :param span: finished span
+        :type span: Span
+        """
+
+    def flush(self) -> None:
+        """
+        write the exported spans
+        """
+
+    def close(self) -> None:
+        """
+        write the exported spans and release resources
+        """
+        self.flush()
+
+
+class InMemoryExporter(SpanExporter):
+    """
+    exporter keeping the finished spans in memory, e.g., for tests
+    """
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+
+    @property
+    def spans(self) -> list:
+        """
+        returns the finished spans in the order they ended
+
+        :return: finished spans
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def to_trace_events(self) -> dict:
+        """
+        returns the finished spans in the Chrome trace-event format
+
+        :return: trace with all events
+        :rtype: dict
+        """
+        return {
+            "traceEvents": [span.to_trace_event() for span in self.spans],
+            "displayTimeUnit": "ms"
+        }
+
+    def clear(self) -> None:
+        """
+        remove all finished spans
+        """
+        with self._lock:
+            self._spans = []
+
+
+class JSONFileExporter(InMemoryExporter):
+    """
+    exporter writing the finished spans as JSON file in the Chrome
+    trace-event format, i.e., to be viewed as flame chart
+    """
+    def __init__(self, filename: Union[str, Path]):
+        """
+        initialize the JSON file exporter
+
+        :param filename: filename of the trace file
+        :type filename: Union[str, Path]
+        """
+        super().__init__()
+        self.filename = ensure_path(filename)
+
+    def flush(self) -> None:
+        import json
+
+        # write to temporary file first, so that the trace is never partial
+        tmp_filename = self.filename.with_name(f".{self.filename.name}.tmp")
+        with tmp_filename.open("w") as f:
+            json.dump(self.to_trace_events(), f)
+
+        os.replace(tmp_filename, self.filename)
+
+    def __repr__(self) -> str:
+        return f"<JSONFileExporter(filename='{self.filename}')>"
+
+
+class _SpanContext:
+    """
+    context manager that starts, activates and exports a span
+    """
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        span = self.span
+        span.end = time.perf_counter_ns()
+        _current_span.reset(self.token)
+        if exc is not None:
+            span.attributes["error"] = repr(exc)
+
+        for exporter in self.tracer.exporters:
+            try:
+                exporter.export(span)
+
+            except Exception as e:
+                log.error(f"Exporting span '{span.name}' failed: {e!r}")
+
+
+class Tracer:
+    """
+    tracer creating nested spans; without exporters, tracing is disabled
+    and spans cost a single check
+    """
+    def __init__(self):
+        self.exporters = []
+
+    @property
+    def enabled(self) -> bool:
+        """
+        returns True, if any exporter is registered
+
+        :return: True, if tracing is enabled
+        :rtype: bool
+        """
+        return bool(self.exporters)
+
+    def add_exporter(self, exporter: SpanExporter) -> SpanExporter:
+        """
+        register the exporter, which enables tracing
+
+        :param exporter: span exporter
+        :type exporter: SpanExporter
+        :return: the registered exporter
+        :rtype: SpanExporter
+        """
+        assert isinstance(exporter, SpanExporter)
+
+        self.exporters = self.exporters + [exporter]
+
+        return exporter
+
+    def remove_exporter(self, exporter: SpanExporter) -> None:
+        """
+        unregister and close the exporter
+
+        :param exporter: span exporter
+        :type exporter: SpanExporter
+        """
+        self.exporters = [e for e in self.exporters if e is not exporter]
+        exporter.close()
+
+    def span(self, name: str, **attributes):
+        """
+        returns a context manager tracing the enclosed operation as span
+        nested in the currently active span
+
+        :param name: name of the operation
+        :type name: str
+        :return: context manager returning the span
+        """
+        if not self.exporters:
+            return NOOP_SPAN
+
+        return _SpanContext(
+            self, Span(name, attributes, _current_span.get())
+        )
+
+    def current_span(self):
+        """
+        returns the currently active span, e.g., to set attributes
+
+        :return: active span or a no-op span, if tracing is disabled
+        """
+        return _current_span.get() or NOOP_SPAN
+
+    def traced(self, name: str = None) -> callable:
+        """
+        decorator tracing each call of the function as span
+
+        :param name: name of the span, defaults to the function's name
+        :type name: str, optional
+        :return: decorator
+        :rtype: callable
+        """
+        def decorator(func: callable) -> callable:
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def __repr__(self) -> str:
+        """
+        string representation of the tracer
+
+        :return: string representation of the tracer
+        :rtype: str
+        """
+        return f"<Tracer(exporters={self.exporters})>"
+
+
+# tracer of all powerstrip operations
+tracer = Tracer()
@@ -1,3 +1,4 @@
 from .semver import SemVer
 from .utils import ensure_path
-from .module import load_module
+from .module import load_module, unload_module, estimate_module_size
+from .filelock import FileLock, GenerationCounter
@@ -0,0 +1,228 @@
+import os
+import time
+import logging
+import contextlib
+from pathlib import Path
+from typing import Union
+
+try:
+    import fcntl
+
+except ImportError:
+    # not available on Windows => locks are no-ops
+    fcntl = None
+
+from powerstrip.exceptions import FileLockException
+from powerstrip.utils.utils import ensure_path
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+
+class FileLock:
+    """
+    advisory lock of a directory shared by several processes, i.e.,
+    readers hold a shared lock and writers an exclusive lock on a lock
+    file within the directory; locks are released when the file
+    descriptor is closed, e.g., if the process dies
+    """
+    LOCK_FILENAME = ".powerstrip.lock"
+
+    def __init__(self, directory: Union[str, Path], timeout: float = None):
+        """
+        initialize the file lock
+
+        :param directory: locked directory
+        :type directory: Union[str, Path]
+        :param timeout: seconds to wait for the lock, defaults to None
+                        to wait forever
+        :type timeout: float, optional
+        """
+        assert (timeout is None) or (timeout >= 0)
+
+        self.directory = ensure_path(directory)
+        self.timeout = timeout
+
+    @property
+    def filename(self) -> Path:
+        """
+        returns the filename of the lock file
+
+        :return: lock filename
+        :rtype: Path
+        """
+        return self.directory.joinpath(self.LOCK_FILENAME)
+
+    def _lock(self, fd: int, operation: int) -> None:
+        """
+        acquire the lock on the file descriptor
+
+        :param fd: file descriptor of the lock file
+        :type fd: int
+        :param operation: fcntl.LOCK_SH or fcntl.LOCK_EX
+        :type operation: int
+        :raises FileLockException: if the lock is not acquired in time
+        """
+        if self.timeout is None:
+            fcntl.flock(fd, operation)
+            return
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                return
+
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise FileLockException(
+                        f"Locking '{self.directory}' timed out after "
+                        f"{self.timeout}s!"
+                    )
+
+                time.sleep(0.01)
+
+    @contextlib.contextmanager
+    def _acquire(self, exclusive: bool):
+        """
+        hold the lock while in the context
+
+        :param exclusive: if True, the lock is exclusive, otherwise shared
+        :type exclusive: bool
+        """
+        if (fcntl is None) or not self.directory.is_dir():
+            # nothing to lock
+            yield self
+            return
+
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._lock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield self
+
+        finally:
+            # closing releases the lock
+            os.close(fd)
+
+    def shared(self):
+        """
+        returns a context manager holding the shared lock, e.g., while
+        reading plugins
+
+        :return: context manager
+        """
+        return self._acquire(exclusive=False)
+
+    def exclusive(self):
+        """
+        returns a context manager holding the exclusive lock, e.g., while
+        installing or removing plugins
+
+        :return: context manager
+        """
+        return self._acquire(exclusive=True)
+
+    def __repr__(self) -> str:
+        """
+        string representation of the file lock
+
+        :return: string representation of the file lock
+        :rtype: str
+        """
+        return f"<FileLock(directory='{self.directory}')>"
+
+
+class GenerationCounter:
+    """
+    counter of the modifications of a directory, which is incremented by
+    writers while holding the exclusive lock; since the modification time
+    of the counter file strictly increases on each increment, readers
+    detect modifications by a single stat of the file
+    """
+    GENERATION_FILENAME = ".powerstrip.generation"
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        initialize the generation counter
+
+        :param directory: observed directory
+        :type directory: Union[str, Path]
+        """
+        self.directory = ensure_path(directory)
+
+    @property
+    def filename(self) -> Path:
+        """
+        returns the filename of the counter file
+
+        :return: counter filename
+        :rtype: Path
+        """
+        return self.directory.joinpath(self.GENERATION_FILENAME)
+
+    def read(self) -> int:
+        """
+        returns the current generation
+
+        :return: generation, 0 if never incremented
+        :rtype: int
+        """
+        try:
+            return int(self.filename.read_text() or 0)
+
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def increment(self) -> int:
+        """
+        increment the generation; must be called while holding the
+        exclusive lock of the directory
+
+        :return: new generation
+        :rtype: int
+        """
+        generation = self.read() + 1
+        stamp = self.stamp()
+
+        # the modification time strictly increases, even if the clock
+        # is coarse, so that the stamp changes with every increment
+        mtime = time.time_ns()
+        if stamp is not None:
+            mtime = max(mtime, stamp[1] + 1000)
+
+        # replace the counter at once
+        tmp_filename = self.filename.with_name(
+            f"{self.GENERATION_FILENAME}.{os.getpid()}.tmp"
+        )
+        tmp_filename.write_text(str(generation))
+        os.utime(tmp_filename, ns=(mtime, mtime))
+        os.replace(tmp_filename, self.filename)
+
+        return generation
+
+    def stamp(self) -> tuple:
+        """
+        returns the stamp of the counter file, which changes with every
+        increment, i.e., it costs a single stat
+
+        :return: inode, modification time and size or None, if the
+                 counter file does not exist
+        :rtype: tuple
+        """
+        try:
+            stat = os.stat(self.filename)
+
+        except FileNotFoundError:
+            return None
+
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def __repr__(self) -> str:
+        """
+        string representation of the generation counter
+
+        :return: string representation of the generation counter
+        :rtype: str
+        """
+        return f"<GenerationCounter(directory='{self.directory}')>"
@@ -1,6 +1,7 @@
 import logging
 import sys
 import importlib
+import importlib.util
 from pathlib import Path
 from typing import Union
 
@@ -14,13 +15,15 @@ log = logging.getLogger(__name__)
 
 def load_module(module_name: str, path: Union[str, Path]):
     """
-    load module by name from given directory
+    load module by name from given directory; a module that is already
+    loaded is only loaded again, if it originates from another file
 
     :param module_name: name of the module
     :type module_name: str
     :param path: complete path of the python file
     :type path: Union[str, Path]
     :raises ModuleException: if file does not exist or module cannot be loaded
+    :return: loaded module
     """
     assert isinstance(module_name, str)
     assert isinstance(path, (str, Path))
@@ -48,7 +51,11 @@ def load_module(module_name: str, path: Union[str, Path]):
             f"in file '{path}'! Abort."
         )
 
-    if spec.name not in sys.modules:
+    mod = sys.modules.get(spec.name)
+    if (
+        (mod is None) or
+        (getattr(mod, "__file__", None) != spec.origin)
+    ):
         # get module from spec, if not yet loaded
         log.debug(f"getting module for spec '{spec.name}'...")
         mod = importlib.util.module_from_spec(spec)
@@ -56,4 +63,82 @@ def load_module(module_name: str, path: Union[str, Path]):
 
         # load the module
         log.debug(f"loading module '{spec.name}'...")
-        spec.loader.exec_module(mod)
+        try:
+            spec.loader.exec_module(mod)
+
+        except BaseException:
+            # do not keep partially loaded module
+            del sys.modules[spec.name]
+            raise
+
+    return mod
+
+
+def unload_module(module_name: str) -> bool:
+    """
+    remove the module from the module cache and delete its bytecode
+    cache file, so that it is executed again on the next load
+
+    :param module_name: name of the module
+    :type module_name: str
+    :return: True, if module has been loaded
+    :rtype: bool
+    """
+    assert isinstance(module_name, str)
+
+    mod = sys.modules.pop(module_name, None)
+    if mod is None:
+        # module not loaded
+        return False
+
+    log.debug(f"unloading module '{module_name}'...")
+    path = getattr(mod, "__file__", None)
+    if path is not None:
+        try:
+            # bytecode might be outdated, if source was changed
+            # within the same second without changing its size
+            Path(importlib.util.cache_from_source(path)).unlink()
+
+        except (OSError, NotImplementedError, ValueError):
+            # no bytecode cache file
+            pass
+
+    return True
+
+
+def estimate_module_size(module_name: str) -> int:
+    """
+    estimate the memory in bytes that is owned by the loaded module, i.e.,
+    the module, its namespace and the functions and classes defined in it
+
+    :param module_name: name of the module
+    :type module_name: str
+    :return: estimated size in bytes, 0 if the module is not loaded
+    :rtype: int
+    """
+    assert isinstance(module_name, str)
+
+    mod = sys.modules.get(module_name)
+    if mod is None:
+        # module not loaded
+        return 0
+
+    size = sys.getsizeof(mod) + sys.getsizeof(vars(mod))
+    for obj in vars(mod).values():
+        if getattr(obj, "__module__", None) != module_name:
+            # object is not defined in the module
+            size += sys.getsizeof(obj) if isinstance(obj, str) else 0
+            continue
+
+        size += sys.getsizeof(obj)
+        for attr in vars(obj).values() if hasattr(obj, "__dict__") else ():
+            size += sys.getsizeof(attr)
+            code = getattr(attr, "__code__", None)
+            if code is not None:
+                size += sys.getsizeof(code) + len(code.co_code)
+
+        code = getattr(obj, "__code__", None)
+        if code is not None:
+            size += sys.getsizeof(code) + len(code.co_code)
+
+    return size
@@ -1,7 +1,18 @@
 import re
+import functools
 import collections
 
 
+# pattern of a semantic version, see https://semver.org
+SEMVER_PATTERN = re.compile(
+    r"^(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|"
+    r"[1-9]\d*)(?:-(?P<prerelease>(?:0|[1-9]\d*|\d*[a-zA-Z-]"
+    r"[0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*)"
+    r")?(?:\+(?P<buildmetadata>[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"
+)
+
+
+@functools.total_ordering
 class SemVer:
     """
     semantic versioning class
@@ -145,12 +156,7 @@ class SemVer:
         """
         assert isinstance(s, str)
 
-        res = re.compile(
-            r"^(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|"
-            r"[1-9]\d*)(?:-(?P<prerelease>(?:0|[1-9]\d*|\d*[a-zA-Z-]"
-            r"[0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*)"
-            r")?(?:\+(?P<buildmetadata>[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"
-        ).match(s)
+        res = SEMVER_PATTERN.match(s)
         if not res:
             # not a valid SemVer
             raise TypeError(f"The string '{s}' is not a valid SemVer.")
@@ -164,6 +170,45 @@ class SemVer:
 
         return SemVer(**d)
 
+    @property
+    def precedence(self) -> tuple:
+        """
+        returns the key by which versions are ordered, i.e., a prerelease
+        has a lower precedence than its release and build metadata is
+        ignored
+
+        => see https://semver.org/#spec-item-11
+
+        :return: sort key
+        :rtype: tuple
+        """
+        if self.prerelease is None:
+            prerelease = (1, ())
+
+        else:
+            # numeric identifiers have a lower precedence than others
+            prerelease = (0, tuple(
+                (0, int(part), "") if part.isdigit() else (1, 0, part)
+                for part in self.prerelease.split(".")
+            ))
+
+        return (self.major, self.minor, self.patch or 0, prerelease)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SemVer):
+            return NotImplemented
+
+        return self.precedence == other.precedence
+
+    def __lt__(self, other) -> bool:
+        if not isinstance(other, SemVer):
+            return NotImplemented
+
+        return self.precedence < other.precedence
+
+    def __hash__(self) -> int:
+        return hash(self.precedence)
+
     def __str__(self) -> str:
         """
         string representation of SemVer class
@@ -108,4 +108,56 @@ def hash_directory(
             for a, b in zip(digest, hash_file(fn, hash_func))
         ])
 
+    return digest
+
+
+def stat_directory(
+    directory: Union[str, Path],
+    glob: str = "**/*",
+    exclude_suffixes: list = [],
+    exclude_filenames: list = [],
+    hash_func: callable = sha3_256
+) -> bytes:
+    """
+    obtain a fingerprint of all files in the given directory from their
+    relative paths, modification times and sizes, i.e., without reading
+    the files' content
+
+    :param directory: directory from which all files are fingerprinted
+    :type directory: Path
+    :param glob: glob to obtain files from directory, defaults to **/*
+    :type glob: str, optional
+    :param exclude_suffixes: suffixes that are ignored
+    :type exclude_suffixes: list
+    :param exclude_filenames: filenames that are ignored
+    :type exclude_filenames: list
+    :param hash_func: hash function that is used, defaults to sha3_256
+    :type hash_func: callable, optional
+    :return: fingerprint
+    :rtype: bytes
+    """
+    assert isinstance(directory, (str, Path))
+    assert isinstance(glob, str)
+    assert callable(hash_func)
+
+    # ensure that filename does exist
+    directory = ensure_path(directory, must_exist=True)
+    assert directory.is_dir()
+
+    h = hash_func()
+    for fn in sorted(directory.glob(glob)):
+        if (
+            fn.suffix in exclude_suffixes or
+            fn.name in exclude_filenames or
+            fn.is_dir()
+        ):
+            # skip excluded files and directories
+            continue
+
+        stat = fn.stat()
+        h.update(
+            f"{fn.relative_to(directory).as_posix()}:"
+            f"{stat.st_mtime_ns}:{stat.st_size}\n".encode()
+        )
+
     return h.digest()
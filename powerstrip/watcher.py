@@ -0,0 +1,531 @@
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from powerstrip.models.metadata import Metadata
+from powerstrip.utils.utils import hash_directory, stat_directory
+
+if TYPE_CHECKING:
+    from powerstrip.pluginmanager import PluginManager
+
+
+# prepare logger
+log = logging.getLogger(__name__)
+
+# files that are ignored for change detection
+EXCLUDE_SUFFIXES = [".pyc", ".bak", ".swp"]
+EXCLUDE_FILENAMES = ["__pycache__", ".DS_Store"]
+
+
+def is_excluded(path: Path) -> bool:
+    """
+    checks if changes of the given path are ignored, e.g., bytecode
+    written when the plugin is imported
+
+    :param path: changed path
+    :type path: Path
+    :return: True, if path is ignored
+    :rtype: bool
+    """
+    return (
+        (path.suffix in EXCLUDE_SUFFIXES) or
+        any(part in EXCLUDE_FILENAMES for part in path.parts)
+    )
+
+
+class PollingBackend:
+    """
+    portable backend that detects changes by comparing fingerprints of
+    all plugin directories
+    """
+    def __init__(self, directories: list, use_hash: bool = False):
+        """
+        initialize the polling backend
+
+        :param directories: plugins directories
+        :type directories: list
+        :param use_hash: if True, changes are detected by the hash of the
+                         files' content instead of their modification
+                         time and size, defaults to False
+        :type use_hash: bool, optional
+        """
+        self.directories = directories
+        self.use_hash = use_hash
+        self._wakeup = threading.Event()
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> dict:
+        """
+        returns the fingerprints of all plugin directories
+
+        :return: fingerprint by plugin directory
+        :rtype: dict
+        """
+        func = hash_directory if self.use_hash else stat_directory
+        snapshot = {}
+        for fn in (
+            fn
+            for directory in self.directories
+            for fn in directory.glob(f"**/{Metadata.METADATA_FILENAME}")
+        ):
+            try:
+                snapshot[fn.parent] = func(
+                    fn.parent,
+                    exclude_suffixes=EXCLUDE_SUFFIXES,
+                    exclude_filenames=EXCLUDE_FILENAMES
+                )
+
+            except (OSError, ValueError):
+                # directory removed in the meantime
+                continue
+
+        return snapshot
+
+    def read(self, timeout: float) -> set:
+        """
+        wait for the given time and return the changed plugin directories
+
+        :param timeout: time to wait in seconds
+        :type timeout: float
+        :return: changed paths
+        :rtype: set
+        """
+        if timeout > 0:
+            self._wakeup.wait(timeout)
+
+        if self._wakeup.is_set():
+            # watcher is stopping
+            return set()
+
+        snapshot = self._take_snapshot()
+        changed = {
+            directory
+            for directory in set(snapshot) | set(self._snapshot)
+            if snapshot.get(directory) != self._snapshot.get(directory)
+        }
+        self._snapshot = snapshot
+
+        return changed
+
+    def wakeup(self) -> None:
+        """
+        stop waiting in read()
+        """
+        self._wakeup.set()
+
+    def close(self) -> None:
+        """
+        close the backend
+        """
+        self._wakeup.set()
+
+
+class InotifyBackend:
+    """
+    Linux backend that receives changes of the plugins directories from
+    inotify, i.e., without scanning the directories
+    """
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+
+    MASK = (
+        IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+        IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF |
+        IN_MOVE_SELF
+    )
+
+    # struct inotify_event without name
+    EVENT = struct.Struct("iIII")
+
+    _libc = None
+
+    @classmethod
+    def _get_libc(cls):
+        """
+        returns the C library, if it provides inotify, otherwise None
+        """
+        if cls._libc is None:
+            try:
+                libc = ctypes.CDLL(
+                    ctypes.util.find_library("c") or "libc.so.6",
+                    use_errno=True
+                )
+                libc.inotify_init1
+                libc.inotify_add_watch
+                cls._libc = libc
+
+            except (OSError, AttributeError):
+                cls._libc = False
+
+        return cls._libc or None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """
+        returns True, if inotify is supported
+
+        :return: True, if inotify is supported
+        :rtype: bool
+        """
+        return sys.platform.startswith("linux") and (
+            cls._get_libc() is not None
+        )
+
+    def __init__(self, directories: list):
+        """
+        initialize the inotify backend
+
+        :param directories: plugins directories
+        :type directories: list
+        :raises OSError: if inotify cannot be initialized
+        """
+        self.directories = directories
+        self._libc = self._get_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+
+        # pipe to wake up a waiting read()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._watches = {}
+        for directory in directories:
+            self._add_watches(directory)
+
+    def _add_watches(self, directory: Path) -> None:
+        """
+        watch the given directory and all its subdirectories
+
+        :param directory: directory to watch
+        :type directory: Path
+        """
+        for path in directory.glob("**"):
+            if not path.is_dir() or is_excluded(path):
+                continue
+
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(str(path)), self.MASK
+            )
+            if wd < 0:
+                # directory removed in the meantime
+                log.debug(f"cannot watch '{path}': {ctypes.get_errno()}")
+                continue
+
+            self._watches[wd] = path
+
+    def read(self, timeout: float) -> set:
+        """
+        wait up to the given time for changes and return changed paths
+
+        :param timeout: time to wait in seconds
+        :type timeout: float
+        :return: changed paths
+        :rtype: set
+        """
+        if self._fd < 0:
+            return set()
+
+        r, _, _ = select.select(
+            [self._fd, self._wakeup_r], [], [], timeout
+        )
+        if self._fd not in r:
+            return set()
+
+        try:
+            data = os.read(self._fd, 65536)
+
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EBADF):
+                return set()
+
+            raise
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # events have been lost => everything might have changed
+                changed.update(self.directories)
+                continue
+
+            if mask & self.IN_IGNORED:
+                # watch has been removed
+                self._watches.pop(wd, None)
+                continue
+
+            path = self._watches.get(wd)
+            if path is None:
+                continue
+
+            if name:
+                path = path.joinpath(os.fsdecode(name))
+
+            if is_excluded(path):
+                continue
+
+            if (
+                (mask & self.IN_ISDIR) and
+                (mask & (self.IN_CREATE | self.IN_MOVED_TO))
+            ):
+                # watch new directories, e.g., installed plugins
+                self._add_watches(path)
+
+            changed.add(path)
+
+        return changed
+
+    def wakeup(self) -> None:
+        """
+        stop waiting in read()
+        """
+        os.write(self._wakeup_w, b"\0")
+
+    def close(self) -> None:
+        """
+        close the inotify file descriptor
+        """
+        if self._fd >= 0:
+            for fd in (self._fd, self._wakeup_r, self._wakeup_w):
+                os.close(fd)
+
+            self._fd = -1
+
+
+class PluginWatcher:
+    """
+    watcher that subscribes to changes of all plugins directories and
+    incrementally refreshes only the plugins that have changed, i.e.,
+    changed plugins are reloaded, new plugins are loaded and removed
+    plugins are dropped
+    """
+    def __init__(
+        self,
+        plugin_manager: "PluginManager",
+        interval: float = 1.0,
+        use_hash: bool = False,
+        backend: str = None,
+        debounce: float = 0.1
+    ):
+        """
+        initialize the plugin watcher
+
+        :param plugin_manager: plugin manager whose plugins are watched
+        :type plugin_manager: PluginManager
+        :param interval: polling interval in seconds, defaults to 1.0
+        :type interval: float, optional
+        :param use_hash: if True, the polling backend detects changes by
+                         the hash of the files' content instead of their
+                         modification time and size, defaults to False
+        :type use_hash: bool, optional
+        :param backend: "inotify" or "polling", defaults to inotify, if
+                        available
+        :type backend: str, optional
+        :param debounce: time in seconds without further changes until
+                         changes are processed, defaults to 0.1
+        :type debounce: float, optional
+        """
+        assert backend in (None, "inotify", "polling")
+
+        self.plugin_manager = plugin_manager
+        self.interval = interval
+        self.use_hash = use_hash
+        self.debounce = debounce
+
+        if backend is None:
+            backend = (
+                "inotify"
+                if InotifyBackend.is_available() and not use_hash else
+                "polling"
+            )
+
+        self.backend_name = backend
+        self.backend = self._create_backend()
+        self._closed = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _create_backend(self):
+        """
+        returns a new backend watching the plugins directories
+
+        :return: inotify or polling backend
+        :rtype: Union[InotifyBackend, PollingBackend]
+        """
+        directories = self.plugin_manager.plugins_directories
+
+        return (
+            InotifyBackend(directories)
+            if self.backend_name == "inotify" else
+            PollingBackend(directories, self.use_hash)
+        )
+
+    def get_plugin_directories(self, paths: set) -> set:
+        """
+        map the changed paths to the plugin directories they belong to
+
+        :param paths: changed paths
+        :type paths: set
+        :return: affected plugin directories
+        :rtype: set
+        """
+        directories = self.plugin_manager.plugins_directories
+        known = {entry.directory for entry in self.plugin_manager.plugins}
+        known.update(self.plugin_manager.shadowed)
+        plugin_directories = set()
+        for path in paths:
+            # nearest plugin directory containing the path
+            for candidate in [path, *path.parents]:
+                if (candidate in directories) or not any(
+                    directory in candidate.parents
+                    for directory in directories
+                ):
+                    break
+
+                if (candidate in known) or candidate.joinpath(
+                    Metadata.METADATA_FILENAME
+                ).exists():
+                    plugin_directories.add(candidate)
+                    break
+
+            # plugin directories below the path, e.g., removed category
+            plugin_directories.update(
+                d for d in known if (path == d) or (path in d.parents)
+            )
+            if path.is_dir():
+                plugin_directories.update(
+                    fn.parent
+                    for fn in path.glob(f"**/{Metadata.METADATA_FILENAME}")
+                )
+
+        return plugin_directories
+
+    def _process(self, paths: set) -> list:
+        """
+        refresh the plugins affected by the changed paths
+
+        :param paths: changed paths
+        :type paths: set
+        :return: names of the refreshed plugins
+        :rtype: list
+        """
+        plugin_directories = self.get_plugin_directories(paths)
+        if not plugin_directories:
+            return []
+
+        log.debug(
+            f"Refreshing {len(plugin_directories)} changed plugins..."
+        )
+
+        return self.plugin_manager.refresh(plugin_directories)
+
+    def check(self) -> list:
+        """
+        refresh the plugins that have changed since the last check
+
+        :return: names of the refreshed plugins
+        :rtype: list
+        """
+        return self._process(self.backend.read(0))
+
+    def _run(self) -> None:
+        """
+        wait for changes until the watcher is stopped
+        """
+        while not self._stop.is_set():
+            try:
+                paths = self.backend.read(self.interval)
+                if not paths:
+                    continue
+
+                # debounce, i.e., wait until changes have settled
+                while not self._stop.is_set():
+                    more = self.backend.read(self.debounce)
+                    if not more:
+                        break
+
+                    paths |= more
+
+                self._process(paths)
+
+            except Exception as e:
+                log.error(f"Refreshing plugins failed: {e!r}")
+
+    def start(self) -> "PluginWatcher":
+        """
+        start watching in a background thread; a stopped watcher watches
+        with a new backend, i.e., changes while it was stopped are not
+        detected
+
+        :return: the started watcher
+        :rtype: PluginWatcher
+        """
+        if self._thread is not None:
+            # already started
+            return self
+
+        if self._closed:
+            # backend has been closed by stop()
+            self.backend = self._create_backend()
+            self._closed = False
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        """
+        stop watching
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self.backend.wakeup()
+            self._thread.join()
+            self._thread = None
+
+        self.backend.close()
+        self._closed = True
+
+    def __enter__(self) -> "PluginWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def __repr__(self) -> str:
+        """
+        string representation of the plugin watcher
+
+        :return: string representation of the plugin watcher
+        :rtype: str
+        """
+        return (
+            f"<PluginWatcher(plugins_directories="
+            f"{list(map(str, self.plugin_manager.plugins_directories))}, "
+            f"backend={self.backend.__class__.__name__}, "
+            f"debounce={self.debounce})>"
+        )
@@ -29,16 +29,15 @@ setup(
         "Topic :: Software Development :: Build Tools",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     keywords="powerstrip",
     packages=find_packages(
-        exclude=["contrib", "docs", "tests"]
+        exclude=["contrib", "docs", "tests", "benchmarks", "benchmarks.*"]
     ),
     install_requires=[
         "pyyaml", "cerberus"
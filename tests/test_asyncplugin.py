@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from powerstrip.models import AsyncPlugin
+from powerstrip.pluginmanager import PluginManager
+from .test_pluginmanager import create_plugin_directory
+
+
+class ExampleAsyncPlugin(AsyncPlugin):
+    async def init(self, **kwargs):
+        self.kwargs = kwargs
+
+    async def run(self, delay=0):
+        await asyncio.sleep(delay)
+        return self.kwargs
+
+    async def shutdown(self):
+        self.kwargs = None
+
+
+class TestAsyncPlugin:
+    def test_async_plugin(self, tmp_path):
+        # cannot use abstract class
+        with pytest.raises(TypeError):
+            AsyncPlugin()
+
+        pm = PluginManager(tmp_path / "plugins")
+        plugins = [
+            ExampleAsyncPlugin(auto_load_metadata=False)
+            for _ in range(10)
+        ]
+
+        async def main():
+            await pm.init_async(plugins, foo="bar")
+            results = await pm.run_async(plugins, delay=0.01)
+            assert results == [{"foo": "bar"}] * len(plugins)
+
+            # pending runs are cancelled on timeout
+            with pytest.raises(asyncio.TimeoutError):
+                await pm.run_async(plugins, delay=10, timeout=0.01)
+
+            await pm.shutdown_async(plugins)
+            assert all(plugin.kwargs is None for plugin in plugins)
+
+        asyncio.run(main())
+
+    def test_async_pluginmanager(self, tmp_path):
+        # target directory where packed plugin files will be stored
+        target_directory = tmp_path / "plugins"
+        pm = PluginManager(target_directory, plugins_repo_directory=tmp_path)
+        plugin_dir = create_plugin_directory(tmp_path, "AsyncTestPlugin")
+
+        async def main():
+            plugin_filename = await pm.pack_async(plugin_dir)
+            assert plugin_filename.exists()
+
+            metadata = await pm.info_async(plugin_filename)
+            assert metadata.name == "AsyncTestPlugin"
+
+            await pm.install_async(plugin_filename)
+            await pm.discover_async()
+
+        asyncio.run(main())
+
+        plugin_classes = pm.get_plugin_classes()
+        assert list(plugin_classes["default"]) == ["AsyncTestPlugin"]
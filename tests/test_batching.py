@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from powerstrip.models import Plugin, AsyncPlugin
+from powerstrip.exceptions import PluginManagerException
+from powerstrip.batching import BatchDispatcher
+from powerstrip.pluginmanager import PluginManager
+
+
+class DoublePlugin(Plugin):
+    def init(self):
+        pass
+
+    def run(self, item):
+        return item * 2
+
+    def shutdown(self):
+        pass
+
+
+class VectorPlugin(DoublePlugin):
+    def init(self):
+        self.batch_sizes = []
+
+    def run_batch(self, items):
+        self.batch_sizes.append(len(items))
+        if None in items:
+            raise ValueError("invalid item")
+
+        return [item * 3 for item in items]
+
+
+class TestBatching:
+    def test_run_batch(self):
+        # default implementation loops over run()
+        plugin = DoublePlugin(auto_load_metadata=False)
+        assert plugin.run_batch([1, 2, 3]) == [2, 4, 6]
+
+    def test_dispatcher(self, tmp_path):
+        pm = PluginManager(tmp_path / "plugins")
+        plugin = VectorPlugin(auto_load_metadata=False)
+        plugin.init()
+        other = DoublePlugin(auto_load_metadata=False)
+
+        with pm.create_batch_dispatcher(
+            max_batch_size=10, max_latency=10
+        ) as dispatcher:
+            # full batches are dispatched immediately
+            futures = [dispatcher.submit(plugin, i) for i in range(25)]
+            assert [f.result(5) for f in futures[:20]] == [
+                i * 3 for i in range(20)
+            ]
+            assert plugin.batch_sizes == [10, 10]
+
+            # batches are per plugin
+            future = dispatcher.submit(other, 4)
+
+            # incomplete batch is dispatched on flush
+            dispatcher.flush(5)
+            assert [f.result() for f in futures[20:]] == [
+                i * 3 for i in range(20, 25)
+            ]
+            assert future.result() == 8
+
+            # errors are set for all items of the batch
+            futures = [dispatcher.submit(plugin, i) for i in (1, None)]
+            dispatcher.flush(5)
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result()
+
+    def test_latency(self):
+        plugin = DoublePlugin(auto_load_metadata=False)
+        dispatcher = BatchDispatcher(max_batch_size=1000, max_latency=0.01)
+
+        # incomplete batch is dispatched after the latency
+        start = time.monotonic()
+        assert dispatcher.submit(plugin, 1).result(5) == 2
+        assert time.monotonic() - start < 1
+
+        # pending items are dispatched on close
+        future = dispatcher.submit(plugin, 2)
+        dispatcher.close()
+        assert future.result(0) == 4
+
+    def test_cancelled(self):
+        plugin = VectorPlugin(auto_load_metadata=False)
+        plugin.init()
+        with BatchDispatcher(max_batch_size=10, max_latency=10) as dispatcher:
+            futures = [dispatcher.submit(plugin, i) for i in range(3)]
+            assert futures[1].cancel()
+            dispatcher.flush(5)
+
+            # cancelled items are skipped, the dispatcher keeps running
+            assert futures[0].result(0) == 0
+            assert futures[2].result(0) == 6
+            assert plugin.batch_sizes == [2]
+
+            future = dispatcher.submit(plugin, 5)
+            dispatcher.flush(5)
+            assert future.result(0) == 15
+
+    def test_async_plugin(self):
+        class AsyncDoublePlugin(AsyncPlugin):
+            async def init(self):
+                pass
+
+            async def run(self, item):
+                return item * 2
+
+            async def shutdown(self):
+                pass
+
+        with BatchDispatcher() as dispatcher:
+            with pytest.raises(PluginManagerException):
+                dispatcher.submit(
+                    AsyncDoublePlugin(auto_load_metadata=False), 1
+                )
@@ -0,0 +1,41 @@
+from powerstrip.models.metadata import Metadata
+from benchmarks import generate_fleet, run_benchmarks, compare
+from benchmarks.suite import OPERATIONS
+
+
+class TestBenchmarks:
+    def test_generate_fleet(self, tmp_path):
+        plugin_dirs = generate_fleet(
+            tmp_path, 5, files=2, file_size=256, categories=2
+        )
+        assert len(plugin_dirs) == 5
+        assert len(list(plugin_dirs[0].glob("*.py"))) == 3
+
+        # generated metadata is valid
+        categories = {
+            Metadata.create_from_directory(d).category for d in plugin_dirs
+        }
+        assert categories == {"category0", "category1"}
+
+    def test_run_and_compare(self, tmp_path):
+        results = run_benchmarks(scales=[2], repeat=1, directory=tmp_path)
+        assert set(results["results"]["2"]) == set(OPERATIONS)
+
+        # same results do not regress
+        comparisons = compare(results, results, threshold=0.1)
+        assert len(comparisons) == len(OPERATIONS)
+        assert not any(c["regression"] for c in comparisons)
+
+        # twice as slow as the baseline
+        baseline = {
+            "results": {
+                "2": {
+                    "pack": {
+                        "min": results["results"]["2"]["pack"]["min"] / 2
+                    }
+                }
+            }
+        }
+        comparison, = compare(results, baseline, threshold=0.5)
+        assert comparison["operation"] == "pack"
+        assert comparison["regression"]
@@ -0,0 +1,94 @@
+import multiprocessing
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.utils import FileLock, GenerationCounter
+from powerstrip.exceptions import FileLockException
+from .test_pluginmanager import create_plugin_directory
+
+
+def hold_exclusive(directory, locked, release):
+    """
+    hold the exclusive lock of the directory in another process
+    """
+    with FileLock(directory).exclusive():
+        GenerationCounter(directory).increment()
+        locked.set()
+        release.wait(10)
+
+
+class TestFileLock:
+    def test_shared(self, tmp_path):
+        # shared locks do not block each other
+        with FileLock(tmp_path).shared(), FileLock(tmp_path, 0).shared():
+            with pytest.raises(FileLockException):
+                with FileLock(tmp_path, timeout=0.05).exclusive():
+                    pass
+
+        with FileLock(tmp_path, timeout=0).exclusive():
+            pass
+
+    def test_processes(self, tmp_path):
+        locked, release = multiprocessing.Event(), multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=hold_exclusive, args=(tmp_path, locked, release)
+        )
+        process.start()
+        try:
+            assert locked.wait(10)
+            with pytest.raises(FileLockException):
+                with FileLock(tmp_path, timeout=0.05).shared():
+                    pass
+
+        finally:
+            release.set()
+            process.join()
+
+        with FileLock(tmp_path, timeout=1).shared():
+            assert GenerationCounter(tmp_path).read() == 1
+
+    def test_missing_directory(self, tmp_path):
+        with FileLock(tmp_path / "missing").exclusive():
+            pass
+
+
+class TestGenerationCounter:
+    def test_increment(self, tmp_path):
+        counter = GenerationCounter(tmp_path)
+        assert counter.read() == 0
+        assert counter.stamp() is None
+
+        stamps = set()
+        for generation in range(1, 4):
+            assert counter.increment() == generation
+            stamps.add(counter.stamp())
+
+        # every increment changes the stamp
+        assert len(stamps) == 3
+        assert counter.read() == 3
+
+    def test_has_changed(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        other = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path,
+            auto_discover=False
+        )
+        assert other.has_changed()
+        assert not pm.has_changed()
+        assert not pm.discover_if_changed()
+
+        # installed by another manager, e.g., in another process
+        other.install(other.pack(
+            create_plugin_directory(tmp_path, "LockedPlugin")
+        ))
+        assert pm.has_changed()
+        assert pm.discover_if_changed()
+        assert [entry.name for entry in pm.plugins] == ["LockedPlugin"]
+        assert not pm.has_changed()
+
+        other.uninstall("LockedPlugin")
+        assert pm.has_changed()
+        pm.unload("LockedPlugin")
@@ -0,0 +1,62 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+
+# budget of "import powerstrip" in microseconds, including the standard
+# library modules it imports
+IMPORT_BUDGET = int(os.environ.get("POWERSTRIP_IMPORT_BUDGET", 100000))
+
+# modules that must not be imported by "import powerstrip"
+LAZY_MODULES = [
+    "yaml", "cerberus", "zipfile", "shutil", "multiprocessing", "asyncio",
+    "ctypes", "powerstrip.pluginmanager", "powerstrip.models.pluginpackage"
+]
+
+
+def run_python(code: str, *options) -> subprocess.CompletedProcess:
+    """
+    run the code in a fresh interpreter
+    """
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+
+
+def get_import_time() -> int:
+    """
+    returns the cumulative import time of powerstrip in microseconds
+    """
+    res = run_python("import powerstrip", "-X", "importtime")
+    for line in res.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == "powerstrip":
+            return int(cumulative)
+
+
+class TestImport:
+    def test_lazy_modules(self):
+        res = run_python(
+            "import sys, powerstrip; "
+            f"print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+        )
+        assert res.stdout.strip() == "[]"
+
+    def test_lazy_plugin_manager(self):
+        res = run_python(
+            "import powerstrip; "
+            "print(powerstrip.PluginManager.__name__)"
+        )
+        assert res.stdout.strip() == "PluginManager"
+
+        with pytest.raises(subprocess.CalledProcessError):
+            run_python("import powerstrip; powerstrip.unknown")
+
+    def test_import_time(self):
+        # best of three to reduce noise
+        import_time = min(get_import_time() for _ in range(3))
+        assert import_time < IMPORT_BUDGET
@@ -1,3 +1,4 @@
+import json
 import tempfile
 from pathlib import Path
 
@@ -211,6 +212,13 @@ class TestMetadata:
         ):
             assert field in md.dict
 
+        # capabilities are only written, if given
+        assert "provides" not in md.dict
+        assert "requires" not in md.dict
+        md.provides = "exporter:csv"
+        assert md.dict["provides"] == "exporter:csv"
+        assert "requires" not in md.dict
+
     def test_from_dict(self, md: Metadata):
         # invalid parameter type
         with pytest.raises(AssertionError):
@@ -300,3 +308,34 @@ class TestMetadata:
         with TEMP_FILE.open("r") as f:
             md = Metadata.create_from_f(f)
             assert isinstance(md, Metadata)
+
+    def test_sidecar(self, tmp_path):
+        md = Metadata.create_from_dict(METADATA_VALUES)
+        md.save_to_directory(tmp_path)
+        data = md.get_filename(tmp_path).read_bytes()
+        assert Metadata.load_sidecar(tmp_path, data) is None
+
+        md.save_sidecar(tmp_path)
+        assert Metadata.load_sidecar(tmp_path, data) == md.dict
+
+        # sidecar is preferred, i.e., its values are not parsed again
+        sidecar_file = tmp_path / Metadata.SIDECAR_FILENAME
+        sidecar = json.loads(sidecar_file.read_text())
+        sidecar["metadata"]["description"] = "From sidecar."
+        sidecar_file.write_text(json.dumps(sidecar))
+        md2 = Metadata.create_from_directory(tmp_path)
+        assert md2.description == "From sidecar."
+        assert md2.dict == {**md.dict, "description": "From sidecar."}
+        md3 = Metadata.create_from_directory(tmp_path, use_sidecar=False)
+        assert md3.dict == md.dict
+
+        # stale sidecar is ignored after metadata file changed
+        md.description = "Changed."
+        md.save_to_directory(tmp_path)
+        assert Metadata.create_from_directory(tmp_path).description == (
+            "Changed."
+        )
+
+        # broken sidecar is ignored
+        sidecar_file.write_text("{broken")
+        assert Metadata.create_from_directory(tmp_path).dict == md.dict
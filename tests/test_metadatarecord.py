@@ -0,0 +1,43 @@
+import pickle
+
+import pytest
+
+from powerstrip.models import Metadata, MetadataRecord
+from .test_metadata import METADATA_VALUES
+
+
+class TestMetadataRecord:
+    def test_conversion(self):
+        md = Metadata.create_from_dict(METADATA_VALUES)
+        record = MetadataRecord.from_metadata(md)
+        assert record.name == "MyPlugin"
+        assert record.version == "1.2.3"
+        assert str(record.semver) == "1.2.3"
+        assert record.tags == frozenset(["bla", "blup"])
+        assert record.plugin_name == md.plugin_name
+
+        # round trip to the Metadata API
+        assert record.to_metadata().dict == md.dict
+        assert MetadataRecord.from_dict(md.dict) == record
+        assert hash(MetadataRecord.from_dict(md.dict)) == hash(record)
+        assert pickle.loads(pickle.dumps(record)) == record
+
+    def test_immutable(self):
+        record = MetadataRecord.from_dict(METADATA_VALUES)
+        with pytest.raises(AttributeError):
+            record.name = "Other"
+
+        with pytest.raises(AttributeError):
+            record.other = 1
+
+        # no instance dictionary
+        assert not hasattr(record, "__dict__")
+
+    def test_interned(self):
+        values = {**METADATA_VALUES, "tags": "Blup, bla"}
+        record1 = MetadataRecord.from_dict(METADATA_VALUES)
+        record2 = MetadataRecord.from_dict(dict(values))
+
+        # category and tags are shared
+        assert record1.category is record2.category
+        assert record1.tags is record2.tags
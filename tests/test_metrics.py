@@ -0,0 +1,120 @@
+import json
+import asyncio
+
+import pytest
+
+from powerstrip.models import Plugin, AsyncPlugin
+from powerstrip.metrics import Histogram, MetricsRegistry
+from powerstrip.pluginmanager import PluginManager
+from .test_pluginmanager import create_plugin_directory
+
+
+# plugin failing for negative items
+FAILING_PLUGIN_PYTHON = """
+from powerstrip import Plugin
+
+class {PluginName}(Plugin):
+    def init(self):
+        pass
+
+    def run(self, item):
+        if item < 0:
+            raise ValueError("negative item")
+
+        return item
+
+    def shutdown(self):
+        pass
+"""
+
+
+class EchoPlugin(AsyncPlugin):
+    async def init(self):
+        pass
+
+    async def run(self, item):
+        return item
+
+    async def shutdown(self):
+        pass
+
+
+class TestMetrics:
+    def test_histogram(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        assert histogram.quantile(0.5) is None
+
+        for value in (0.05, 0.5, 0.5, 2.0):
+            histogram.observe(value)
+
+        assert histogram.count == 4
+        assert histogram.cumulative() == [
+            (0.1, 1), (1.0, 3), (float("inf"), 4)
+        ]
+        assert histogram.quantile(0.5) == 1.0
+        assert histogram.quantile(1.0) == float("inf")
+
+    def test_disabled(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        assert pm.metrics is None
+
+        plugin_dir = create_plugin_directory(
+            tmp_path, "PlainMetricsPlugin", source=FAILING_PLUGIN_PYTHON
+        )
+        pm.install(pm.pack(plugin_dir))
+        pm.discover()
+
+        # methods are not wrapped
+        plugin = pm.get_plugin("PlainMetricsPlugin")
+        assert "run" not in vars(plugin)
+
+    def test_instrument(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path,
+            metrics=True
+        )
+        plugin_dir = create_plugin_directory(
+            tmp_path, "MetricsPlugin", source=FAILING_PLUGIN_PYTHON
+        )
+        pm.install(pm.pack(plugin_dir))
+        pm.discover()
+
+        plugin = pm.get_plugin("MetricsPlugin")
+        assert isinstance(plugin, Plugin)
+        assert plugin.run(1) == 1
+        assert plugin.run_batch([2, 3]) == [2, 3]
+        with pytest.raises(ValueError):
+            plugin.run(-1)
+
+        snapshot = pm.metrics.snapshot()
+        json.dumps(snapshot)
+        run = snapshot["category"]["MetricsPlugin"]["run"]
+        assert run["calls"] == 4
+        assert run["errors"] == 1
+        assert run["error_rate"] == 0.25
+        assert run["latency"]["count"] == 4
+        assert snapshot["category"]["MetricsPlugin"]["init"]["calls"] == 1
+        batch = snapshot["category"]["MetricsPlugin"]["run_batch"]
+        assert batch["calls"] == 1
+
+        text = pm.metrics.to_prometheus()
+        assert (
+            'powerstrip_plugin_calls_total{plugin="MetricsPlugin",'
+            'category="category",method="run"} 4'
+        ) in text
+        assert (
+            'powerstrip_plugin_errors_total{plugin="MetricsPlugin",'
+            'category="category",method="run"} 1'
+        ) in text
+        assert (
+            'powerstrip_plugin_latency_seconds_bucket{plugin="MetricsPlugin",'
+            'category="category",method="run",le="+Inf"} 4'
+        ) in text
+
+    def test_instrument_async(self):
+        metrics = MetricsRegistry()
+        plugin = metrics.instrument(EchoPlugin(auto_load_metadata=False))
+        assert asyncio.run(plugin.run(1)) == 1
+        assert metrics.snapshot()["default"]["EchoPlugin"]["run"]["calls"] == 1
@@ -0,0 +1,177 @@
+import asyncio
+import itertools
+
+import pytest
+
+from powerstrip.models import Plugin, AsyncPlugin
+from powerstrip.pipeline import Pipeline
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.exceptions import PluginManagerException
+from .test_pluginmanager import create_plugin_directory
+
+
+class SplitPlugin(Plugin):
+    def init(self):
+        pass
+
+    def run(self, item):
+        # emit multiple items per input item
+        for word in item.split():
+            yield word
+
+    def shutdown(self):
+        pass
+
+
+class UpperPlugin(SplitPlugin):
+    def run(self, item):
+        if item == "fail":
+            raise ValueError("invalid item")
+
+        # drop empty items
+        return item.upper() if item != "skip" else None
+
+
+class AsyncLengthPlugin(AsyncPlugin):
+    async def init(self):
+        pass
+
+    async def run(self, item):
+        await asyncio.sleep(0)
+        return len(item)
+
+    async def shutdown(self):
+        pass
+
+
+# dummy plugin file that appends its name
+PLUGIN_PYTHON = """
+from powerstrip import Plugin
+
+class {PluginName}(Plugin):
+    def init(self):
+        pass
+
+    def run(self, item):
+        return item + [self.metadata.name]
+
+    def shutdown(self):
+        self.is_shutdown = True
+"""
+
+
+def plugin(cls):
+    return cls(auto_load_metadata=False)
+
+
+class TestPipeline:
+    def test_process(self):
+        pipeline = Pipeline(
+            [plugin(SplitPlugin), plugin(UpperPlugin)], maxsize=2
+        )
+        assert list(pipeline.process(["a b", "skip c", "d"])) == [
+            "A", "B", "C", "D"
+        ]
+
+        # parallel stages do not keep the order
+        pipeline = Pipeline(
+            [plugin(SplitPlugin), plugin(UpperPlugin)],
+            parallelism=[2, 3]
+        )
+        words = [f"w{i}" for i in range(100)]
+        assert sorted(pipeline.process(words)) == sorted(
+            w.upper() for w in words
+        )
+
+        # exceptions of stages are raised to the consumer
+        with pytest.raises(ValueError):
+            list(pipeline.process(["a fail b"]))
+
+    def test_backpressure(self):
+        pulled = []
+
+        def source():
+            for i in itertools.count():
+                pulled.append(i)
+                yield f"w{i}"
+
+        pipeline = Pipeline(
+            [plugin(SplitPlugin), plugin(UpperPlugin)], maxsize=4
+        )
+
+        # infinite input is bounded by the queues between the stages
+        for i, item in enumerate(pipeline.process(source())):
+            if i == 100:
+                break
+
+        assert len(pulled) < 100 + 4 * 3 + 4
+
+    def test_process_async(self):
+        pipeline = Pipeline([
+            plugin(SplitPlugin), plugin(UpperPlugin),
+            plugin(AsyncLengthPlugin)
+        ], parallelism=[1, 2, 3])
+
+        async def source():
+            for i in range(10):
+                yield "a bb"
+
+        async def main():
+            return [item async for item in pipeline.process_async(source())]
+
+        assert sorted(asyncio.run(main())) == [1] * 10 + [2] * 10
+
+        # coroutines of async stages are not passed on as items
+        with pytest.raises(PluginManagerException):
+            pipeline.process(["a bb"])
+
+    def test_create_pipeline(self, tmp_path, monkeypatch):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        for name, category in (
+            ("PipelineParse", "parse"),
+            ("PipelineEnrichB", "enrich"),
+            ("PipelineEnrichA", "enrich"),
+            ("PipelineSink", "sink"),
+        ):
+            plugin_dir = create_plugin_directory(
+                tmp_path, name, source=PLUGIN_PYTHON, category=category
+            )
+            pm.install(pm.pack(plugin_dir))
+
+        pm.discover()
+
+        # stages ordered by category and name
+        pipeline = pm.create_pipeline(
+            categories=["parse", "enrich", "sink"]
+        )
+        assert list(pipeline.process([[]])) == [[
+            "PipelineParse", "PipelineEnrichA", "PipelineEnrichB",
+            "PipelineSink"
+        ]]
+
+        # created stages are shut down on close
+        pipeline.close()
+        assert all(stage.is_shutdown for stage in pipeline.stages)
+
+        # explicit stages, given instances are not shut down
+        given = pm.get_plugin_classes()["default"]["PipelineEnrichA"]()
+        with pm.create_pipeline(
+            stages=["PipelineSink", given, "PipelineParse"]
+        ) as pipeline:
+            assert list(pipeline.process([[]])) == [[
+                "PipelineSink", "PipelineEnrichA", "PipelineParse"
+            ]]
+
+        assert not hasattr(given, "is_shutdown")
+        assert pipeline.stages[0].is_shutdown
+
+        # created stages are shut down, if a later stage fails
+        shutdown = []
+        sink = pm.get_plugin_classes()["default"]["PipelineSink"]
+        monkeypatch.setattr(sink, "shutdown", lambda self: shutdown.append(1))
+        with pytest.raises(PluginManagerException):
+            pm.create_pipeline(stages=["PipelineSink", "unknown"])
+
+        assert len(shutdown) == 1
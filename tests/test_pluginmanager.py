@@ -2,6 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import sys
+import shutil
+import threading
+import collections
 
 import pytest
 
@@ -25,6 +28,43 @@ class {PluginName}(Plugin):
         pass
 """
 
+# dummy plugin file with version returned by run()
+VERSIONED_PLUGIN_PYTHON = """
+from powerstrip import Plugin
+
+class {PluginName}(Plugin):
+    def init(self):
+        self.is_shutdown = False
+
+    def run(self):
+        return %d
+
+    def shutdown(self):
+        self.is_shutdown = True
+"""
+
+
+def create_plugin_directory(
+    directory, name, source=PLUGIN_PYTHON, **values
+):
+    """
+    create a plugin source directory with metadata.yml and plugin.py
+    """
+    plugin_dir = directory / name
+    plugin_dir.mkdir()
+
+    # create metadata.yml file
+    plugin_dir.joinpath("metadata.yml").write_text(
+        METADATA.format(**{**METADATA_VALUES, "name": name, **values})
+    )
+
+    # create plugin file
+    plugin_dir.joinpath("plugin.py").write_text(
+        source.format(PluginName=name)
+    )
+
+    return plugin_dir
+
 
 class TestPluginManager:
     """
@@ -122,3 +162,338 @@ class TestPluginManager:
             category=METADATA_VALUES["category"]
         )
 
+    def test_reload(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        plugin_dir = create_plugin_directory(
+            tmp_path, "ReloadPlugin", source=VERSIONED_PLUGIN_PYTHON % 1
+        )
+        pm.install(pm.pack(plugin_dir))
+        pm.discover()
+
+        # managed instance is created once
+        plugin = pm.get_plugin("ReloadPlugin")
+        assert pm.get_plugin("ReloadPlugin") is plugin
+        assert plugin.run() == 1
+
+        # unknown plugin
+        with pytest.raises(PluginManagerException):
+            pm.get_plugin("unknown")
+
+        # install new version and reload it
+        plugin_dir.joinpath("plugin.py").write_text(
+            VERSIONED_PLUGIN_PYTHON.format(PluginName="ReloadPlugin") % 2
+        )
+        pm.install(pm.pack(plugin_dir, force=True))
+        pm.reload("ReloadPlugin")
+
+        # old instance keeps old code and is used until it is released
+        assert plugin.run() == 1
+        assert not plugin.is_shutdown
+        assert pm.get_plugin("ReloadPlugin").run() == 2
+
+        # old instance is shut down once it has been released by all
+        # callers of get_plugin()
+        pm.release(plugin)
+        assert not plugin.is_shutdown
+        pm.release(plugin)
+        assert plugin.is_shutdown
+        assert not pm._retired
+        assert len(pm.get_plugin_classes()["default"]) == 1
+
+        # broken version keeps the old version
+        pm.plugins_directory.joinpath("ReloadPlugin", "plugin.py").write_text(
+            "syntax error"
+        )
+        with pytest.raises(SyntaxError):
+            pm.reload("ReloadPlugin")
+
+        assert pm.get_plugin("ReloadPlugin").run() == 2
+
+    def test_reload_running(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path,
+            scope="pool"
+        )
+        plugin_dir = create_plugin_directory(
+            tmp_path, "RunningPlugin", source=VERSIONED_PLUGIN_PYTHON % 1
+        )
+        pm.install(pm.pack(plugin_dir))
+        pm.discover()
+
+        running, reloaded = threading.Event(), threading.Event()
+        results = []
+
+        def call():
+            with pm.checkout("RunningPlugin") as plugin:
+                running.set()
+                reloaded.wait(10)
+                results.append((plugin.run(), plugin.is_shutdown))
+
+            results.append(plugin.is_shutdown)
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        assert running.wait(10)
+
+        # reload while the call is running
+        plugin_dir.joinpath("plugin.py").write_text(
+            VERSIONED_PLUGIN_PYTHON.format(PluginName="RunningPlugin") % 2
+        )
+        pm.install(pm.pack(plugin_dir, force=True))
+        pm.reload("RunningPlugin")
+        with pm.checkout("RunningPlugin") as plugin:
+            assert plugin.run() == 2
+
+        reloaded.set()
+        thread.join()
+
+        # old instance is shut down once it has been returned
+        assert results == [(1, False), True]
+
+    def test_unload(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        plugin_dir = create_plugin_directory(
+            tmp_path, "UnloadPlugin", source=VERSIONED_PLUGIN_PYTHON % 1
+        )
+        pm.install(pm.pack(plugin_dir))
+        pm.discover()
+
+        plugin = pm.get_plugin("UnloadPlugin")
+        assert "UnloadPlugin.plugin" in sys.modules
+        pm.release(plugin)
+        del plugin
+
+        report = pm.unload("UnloadPlugin")
+        assert report["name"] == "UnloadPlugin"
+        assert report["modules"] == 1
+        assert report["classes"] == 1
+        assert report["collected"]
+        assert report["leaked"] == []
+        assert report["bytes_reclaimed"] > 0
+
+        # modules, classes and registry entry are gone
+        assert "UnloadPlugin.plugin" not in sys.modules
+        assert pm.get_plugin_classes() == {}
+        with pytest.raises(PluginManagerException):
+            pm.unload("UnloadPlugin")
+
+        # plugin can be discovered again
+        pm.discover()
+        plugin = pm.get_plugin("UnloadPlugin")
+        assert plugin.run() == 1
+
+        # used instance is shut down once it has been released
+        report = pm.unload("UnloadPlugin")
+        assert not report["collected"]
+        assert not plugin.is_shutdown
+        pm.release(plugin)
+        assert plugin.is_shutdown
+        del plugin
+
+        pm.discover()
+
+        # uninstall also unloads the plugin
+        pm.uninstall("UnloadPlugin")
+        assert "UnloadPlugin.plugin" not in sys.modules
+        assert pm.plugins == []
+
+    def test_discover_removed(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        plugin_dir = create_plugin_directory(
+            tmp_path, "RemovedPlugin", source=VERSIONED_PLUGIN_PYTHON % 1
+        )
+        pm.install(pm.pack(plugin_dir))
+        pm.discover()
+        plugin = pm.get_plugin("RemovedPlugin")
+        pm.release(plugin)
+        assert "RemovedPlugin.plugin" in sys.modules
+
+        # removed plugin directory => instances are shut down and modules
+        # are evicted
+        shutil.rmtree(pm.plugins_directory / "RemovedPlugin")
+        pm.discover()
+        assert pm.plugins == []
+        assert plugin.is_shutdown
+        assert "RemovedPlugin.plugin" not in sys.modules
+
+    def test_plugins_directories(self, tmp_path):
+        (tmp_path / "src1").mkdir()
+        (tmp_path / "src2").mkdir()
+
+        # system plugins: the shared plugin and a system-only plugin
+        system = PluginManager(
+            tmp_path / "system", plugins_repo_directory=tmp_path / "repo"
+        )
+        for name in ("SharedPlugin", "SystemPlugin"):
+            system.install(system.pack(create_plugin_directory(
+                tmp_path / "src1", name, source=VERSIONED_PLUGIN_PYTHON % 1
+            )))
+
+        # tenant plugins shadow the system plugins
+        pm = PluginManager(
+            [tmp_path / "tenant", tmp_path / "system"],
+            plugins_repo_directory=tmp_path / "repo2", auto_discover=False
+        )
+        assert pm.plugins_directory == tmp_path / "tenant"
+        package = pm.pack(create_plugin_directory(
+            tmp_path / "src2", "SharedPlugin",
+            source=VERSIONED_PLUGIN_PYTHON % 2
+        ))
+        pm.install(package)
+        pm.discover()
+
+        assert sorted(entry.name for entry in pm.plugins) == [
+            "SharedPlugin", "SystemPlugin"
+        ]
+        assert pm.get_plugin("SharedPlugin").run() == 2
+        assert pm.get_plugin("SystemPlugin").run() == 1
+        assert pm.shadowed == {
+            tmp_path / "system" / "SharedPlugin":
+                tmp_path / "tenant" / "SharedPlugin"
+        }
+        assert sorted(pm.get_plugin_classes()["default"]) == [
+            "SharedPlugin", "SystemPlugin"
+        ]
+
+        # without the tenant plugin the system plugin is refreshed
+        pm.uninstall("SharedPlugin")
+        assert pm.refresh([tmp_path / "tenant" / "SharedPlugin"]) == [
+            "SharedPlugin"
+        ]
+        assert pm.get_plugin("SharedPlugin").run() == 1
+        assert pm.shadowed == {}
+
+        # refreshed tenant plugin shadows the system plugin again
+        pm.install(package)
+        pm.refresh([tmp_path / "tenant" / "SharedPlugin"])
+        assert pm.get_plugin("SharedPlugin").run() == 2
+        assert list(pm.shadowed) == [tmp_path / "system" / "SharedPlugin"]
+        assert sorted(entry.name for entry in pm.plugins) == [
+            "SharedPlugin", "SystemPlugin"
+        ]
+
+        # without the tenant plugin the system plugin is discovered
+        pm.uninstall("SharedPlugin")
+        pm.discover()
+        assert pm.get_plugin("SharedPlugin").run() == 1
+        assert pm.shadowed == {}
+
+        # plugins with the same name in the same plugins directory
+        shutil.copytree(
+            tmp_path / "system" / "SystemPlugin",
+            tmp_path / "system" / "DuplicatePlugin"
+        )
+        pm.refresh([tmp_path / "system" / "DuplicatePlugin"])
+        assert len(pm.plugins) == 3
+        with pytest.raises(PluginManagerException):
+            pm.get_plugin_classes()
+
+        for entry in pm.plugins:
+            pm.unload(entry.name)
+
+        with pytest.raises(PluginManagerException):
+            PluginManager([], auto_discover=False)
+
+    def test_upgrade_all(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path / "repo"
+        )
+
+        def pack(name, version, value):
+            source = tmp_path / f"{name}-{version}"
+            source.mkdir()
+            return pm.pack(create_plugin_directory(
+                source, name, version=version,
+                source=VERSIONED_PLUGIN_PYTHON % value
+            ))
+
+        for name in ("UpgradePlugin", "PinnedPlugin"):
+            pm.install(pack(name, "1.0.0", 1))
+
+        pm.discover()
+        assert pm.get_plugin("UpgradePlugin").run() == 1
+        assert pm.outdated() == {}
+
+        pack("UpgradePlugin", "1.1.0", 2)
+        pack("UpgradePlugin", "1.0.5", 3)
+        pack("PinnedPlugin", "2.0.0-rc.1", 4)
+        pack("NotInstalledPlugin", "1.0.0", 5)
+
+        # prereleases are skipped by default
+        outdated = pm.outdated()
+        assert list(outdated) == ["UpgradePlugin"]
+        installed, latest, filename = outdated["UpgradePlugin"]
+        assert (str(installed), str(latest)) == ("1.0.0", "1.1.0")
+        assert filename == "upgradeplugin-1.1.0.psp"
+        assert sorted(pm.outdated(prereleases=True)) == [
+            "PinnedPlugin", "UpgradePlugin"
+        ]
+
+        upgraded = pm.upgrade_all(jobs=2)
+        assert upgraded == {
+            "UpgradePlugin": pm.plugins_directory / "UpgradePlugin"
+        }
+        assert pm.get_plugin("UpgradePlugin").run() == 2
+        assert pm.get_plugin("PinnedPlugin").run() == 1
+        assert pm.outdated() == {}
+        assert pm.upgrade_all() == {}
+
+        for entry in pm.plugins:
+            pm.unload(entry.name)
+
+    def test_concurrency(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        for name in ("StablePlugin", "StressPlugin"):
+            pm.pack(create_plugin_directory(tmp_path, name))
+
+        pm.install("stableplugin-1.2.3")
+        pm.discover()
+
+        done = threading.Event()
+        errors, reads = [], collections.Counter()
+
+        def read():
+            try:
+                while not done.is_set():
+                    plugin_classes = pm.get_plugin_classes()["default"]
+                    assert "StablePlugin" in plugin_classes
+                    reads[len(plugin_classes)] += 1
+
+                    # the snapshot is consistent in itself
+                    snapshot = pm.snapshot
+                    assert sorted(snapshot.names) == sorted(
+                        entry.name for entry in snapshot.registry.values()
+                    )
+                    assert len(pm.select(name="St*Plugin")) in (1, 2)
+
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+
+        try:
+            for _ in range(10):
+                pm.install("stressplugin-1.2.3")
+                pm.discover()
+                pm.uninstall("StressPlugin")
+                pm.discover()
+
+        finally:
+            done.set()
+            for reader in readers:
+                reader.join()
+
+        assert errors == []
+        assert reads[1] > 0
+        assert [entry.name for entry in pm.plugins] == ["StablePlugin"]
+        pm.unload("StablePlugin")
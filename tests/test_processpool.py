@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.processpool import PluginProcessPool
+from powerstrip.exceptions import PluginProcessPoolException
+from .test_pluginmanager import create_plugin_directory
+
+
+# dummy plugin file that returns the worker's pid
+PLUGIN_PYTHON = """
+import os
+import time
+
+from powerstrip import Plugin
+
+class {PluginName}(Plugin):
+    def init(self, factor=1):
+        self.factor = factor
+
+    def run(self, value, delay=0):
+        if value is None:
+            raise ValueError("invalid value")
+
+        time.sleep(delay)
+        return os.getpid(), value * self.factor
+
+    def shutdown(self):
+        pass
+"""
+
+
+@pytest.fixture(scope="module")
+def pm(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("processpool")
+    pm = PluginManager(tmp_path / "plugins", plugins_repo_directory=tmp_path)
+    for name in ("PoolPluginA", "PoolPluginB"):
+        plugin_dir = create_plugin_directory(
+            tmp_path, name, source=PLUGIN_PYTHON
+        )
+        pm.install(pm.pack(plugin_dir))
+
+    pm.discover()
+
+    return pm
+
+
+class TestPluginProcessPool:
+    def test_run(self, pm: PluginManager):
+        with pm.create_process_pool(
+            size=2, init_kwargs={"PoolPluginA": {"factor": 2}}
+        ) as pool:
+            # calls are executed in the worker processes
+            pids = set()
+            for i in range(10):
+                pid, value = pool.run("PoolPluginA", i)
+                assert value == 2 * i
+                pids.add(pid)
+
+            assert os.getpid() not in pids
+
+            # futures of concurrent calls
+            futures = [pool.submit("PoolPluginB", i) for i in range(10)]
+            assert [f.result()[1] for f in futures] == list(range(10))
+
+            # exceptions are raised in the host process
+            with pytest.raises(ValueError):
+                pool.run("PoolPluginA", None)
+
+            # unknown plugin
+            with pytest.raises(PluginProcessPoolException):
+                pool.run("unknown", 1)
+
+    def test_affinity(self, pm: PluginManager):
+        # invalid worker index
+        with pytest.raises(PluginProcessPoolException):
+            PluginProcessPool(
+                pm.plugins_directory, ["PoolPluginA"], size=2,
+                affinity={"PoolPluginA": 2}
+            )
+
+        with pm.create_process_pool(
+            size=2, affinity={"PoolPluginA": 0, "PoolPluginB": [1]}
+        ) as pool:
+            pids_a = {pool.run("PoolPluginA", 1)[0] for _ in range(5)}
+            pids_b = {pool.run("PoolPluginB", 1)[0] for _ in range(5)}
+            assert len(pids_a) == len(pids_b) == 1
+            assert pids_a != pids_b
+
+    def test_start_failure(self, pm: PluginManager):
+        # worker cannot initialize unknown plugin
+        with pytest.raises(PluginProcessPoolException):
+            pm.create_process_pool(plugin_names=["unknown"], size=1)
+
+    def test_cancelled(self, pm: PluginManager):
+        with pm.create_process_pool(
+            plugin_names=["PoolPluginA"], size=1
+        ) as pool:
+            # calls are queued behind the slow call
+            futures = [pool.submit("PoolPluginA", 0, delay=0.2)]
+            futures += [pool.submit("PoolPluginA", i) for i in range(1, 10)]
+            assert futures[5].cancel()
+
+            # the reader thread keeps resolving the other calls
+            assert [
+                f.result(10)[1] for i, f in enumerate(futures) if i != 5
+            ] == [i for i in range(10) if i != 5]
+            assert pool.run("PoolPluginA", 3)[1] == 3
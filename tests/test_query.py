@@ -0,0 +1,171 @@
+import sys
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.query import PluginQuery, VersionRange
+from powerstrip.exceptions import PluginQueryException
+from .test_pluginmanager import create_plugin_directory
+
+
+# name, category, version, author and tags of the plugins
+PLUGINS = [
+    ("QueryCsv", "export", "1.0.0", "Jane <jane@example.com>", "csv, text"),
+    ("QueryJson", "export", "2.1.0", "Joe <joe@example.org>", "json, text"),
+    ("QueryXml", "import", "1.5.0-rc.1", "Jane <jane@example.com>", "xml"),
+    ("QueryPng", "image", "0.3.0", "Joe <joe@example.org>", '""'),
+]
+
+
+@pytest.fixture(scope="module")
+def pm(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("query")
+    pm = PluginManager(
+        tmp_path / "plugins", plugins_repo_directory=tmp_path,
+        auto_discover=False
+    )
+    for name, category, version, author, tags in PLUGINS:
+        pm.install(pm.pack(create_plugin_directory(
+            tmp_path, name, category=category, version=version,
+            author=author, tags=tags
+        )))
+
+    pm.discover()
+    return pm
+
+
+def select(pm: PluginManager, **criteria) -> list:
+    return sorted(entry.name for entry in pm.select(**criteria))
+
+
+class TestVersionRange:
+    def test_contains(self):
+        version_range = VersionRange(">=1.0.0, <2.0.0")
+        assert "1.0.0" in version_range
+        assert "1.9.9" in version_range
+        assert "2.0.0-rc.1" in version_range
+        assert "2.0.0" not in version_range
+        assert "1.0.0-rc.1" not in version_range
+
+        assert "1.2.3" in VersionRange("1.2.3")
+        assert "1.2.3" not in VersionRange("!=1.2.3")
+
+    def test_invalid(self):
+        with pytest.raises(PluginQueryException):
+            VersionRange(">=1.0")
+
+        with pytest.raises(PluginQueryException):
+            VersionRange("~>1.0.0")
+
+
+class TestPluginQuery:
+    def test_categories(self, pm: PluginManager):
+        assert select(pm, categories=["export", "image"]) == [
+            "QueryCsv", "QueryJson", "QueryPng"
+        ]
+        assert select(pm, categories="import") == ["QueryXml"]
+        assert select(pm, categories=[]) == []
+
+    def test_tags(self, pm: PluginManager):
+        # plugins without tags do not match any tag
+        assert select(pm, tags_any=["csv", "XML"]) == ["QueryCsv", "QueryXml"]
+        assert select(pm, tags_all=["json", "text"]) == ["QueryJson"]
+        assert select(pm, tags_none=["text"]) == ["QueryPng", "QueryXml"]
+        assert select(pm, tags_any=["text"], tags_none=["csv"]) == [
+            "QueryJson"
+        ]
+
+    def test_version(self, pm: PluginManager):
+        assert select(pm, version=">=1.0.0") == [
+            "QueryCsv", "QueryJson", "QueryXml"
+        ]
+        assert select(pm, version=">1.0.0, <2.0.0") == ["QueryXml"]
+        assert select(pm, version="<=1.0.0, !=0.3.0") == ["QueryCsv"]
+        assert select(pm, version="==2.1.0") == ["QueryJson"]
+
+    def test_globs(self, pm: PluginManager):
+        assert select(pm, author="*@example.com>") == [
+            "QueryCsv", "QueryXml"
+        ]
+        assert select(pm, name="Query?sv") == ["QueryCsv"]
+        assert select(pm, name="QueryPng") == ["QueryPng"]
+        assert select(pm, name="QueryPng", author="Jane*") == []
+
+    def test_get_plugin_classes(self, pm: PluginManager):
+        query = PluginQuery(categories=["export"], version="<2.0.0")
+        plugin_classes = pm.get_plugin_classes(query=query)
+        assert list(plugin_classes["default"]) == ["QueryCsv"]
+
+        # query and keyword criteria are exclusive
+        with pytest.raises(AssertionError):
+            pm.select(query, name="QueryCsv")
+
+
+# name, provided and required capabilities of the plugins
+CAPABILITY_PLUGINS = [
+    ("CapCsv", "exporter:csv, reader:csv", ""),
+    ("CapJson", "exporter:json", "reader:csv"),
+    ("CapPdf", "exporter:pdf", "renderer:pdf"),
+]
+
+
+@pytest.fixture
+def lazy_pm(tmp_path):
+    pm = PluginManager(
+        tmp_path / "plugins", plugins_repo_directory=tmp_path,
+        auto_discover=False, lazy=True
+    )
+    for name, provides, requires in CAPABILITY_PLUGINS:
+        plugin_dir = create_plugin_directory(tmp_path, name)
+        with plugin_dir.joinpath("metadata.yml").open("a") as f:
+            f.write(f"provides: {provides}\nrequires: '{requires}'\n")
+
+        pm.install(pm.pack(plugin_dir))
+
+    pm.discover()
+    yield pm
+
+    for entry in pm.plugins:
+        pm.unload(entry.name)
+
+
+class TestCapabilities:
+    def test_metadata(self, lazy_pm: PluginManager):
+        entry, = lazy_pm.select(name="CapCsv")
+        assert entry.metadata.provides == ["exporter:csv", "reader:csv"]
+        assert entry.metadata.requires == []
+        assert entry.metadata.dict["provides"] == "exporter:csv, reader:csv"
+
+    def test_find_providers(self, lazy_pm: PluginManager):
+        # discovery does not import the plugins
+        assert not any(entry.loaded for entry in lazy_pm.plugins)
+        assert "CapCsv.plugin" not in sys.modules
+
+        providers = lazy_pm.find_providers("exporter:csv")
+        assert [entry.name for entry in providers] == ["CapCsv"]
+        assert sorted(
+            entry.name for entry in lazy_pm.find_providers("Exporter:*")
+        ) == ["CapCsv", "CapJson", "CapPdf"]
+        assert lazy_pm.find_providers("exporter:xml") == []
+
+        # only the classes of the providers are imported
+        plugin_classes = lazy_pm.get_plugin_classes(capability="exporter:json")
+        assert list(plugin_classes["default"]) == ["CapJson"]
+        assert "CapJson.plugin" in sys.modules
+        assert "CapCsv.plugin" not in sys.modules
+        assert "CapPdf.plugin" not in sys.modules
+
+        # the given query is not changed
+        query = PluginQuery(name="Cap*")
+        plugin_classes = lazy_pm.get_plugin_classes(
+            query=query, capability="exporter:json"
+        )
+        assert list(plugin_classes["default"]) == ["CapJson"]
+        assert query.provides is None
+
+        # plugins are loaded on first use
+        assert lazy_pm.get_plugin("CapPdf").run() is None
+        assert "CapPdf.plugin" in sys.modules
+
+    def test_unmet_requirements(self, lazy_pm: PluginManager):
+        assert lazy_pm.unmet_requirements() == {"CapPdf": ["renderer:pdf"]}
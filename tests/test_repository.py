@@ -0,0 +1,433 @@
+import os
+import time
+import shutil
+import zipfile
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.models import MetadataRecord
+from powerstrip.repository import (
+    RepositoryIndex, SearchIndex, RepositoryServer, RepositoryClient,
+    RepositoryMirror
+)
+from powerstrip.repository.client import RangeFile
+from powerstrip.exceptions import RepositoryException
+from .test_metadata import METADATA_VALUES
+from .test_pluginmanager import create_plugin_directory
+
+
+def create_record(**values) -> MetadataRecord:
+    return MetadataRecord.from_dict({**METADATA_VALUES, **values})
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add("csv-1.0.0.psp", create_record(
+        name="CsvExport", version="1.0.0", category="export",
+        description="Export tables as CSV.", tags="csv, tables"
+    ))
+    index.add("csv-1.2.0.psp", create_record(
+        name="CsvExport", version="1.2.0", category="export",
+        description="Export tables as CSV.", tags="csv, tables"
+    ))
+    index.add("json-2.0.0-rc.1.psp", create_record(
+        name="JsonExport", version="2.0.0-rc.1", category="export",
+        description="Export documents as JSON.", tags="json"
+    ))
+    index.add("csv-import-0.1.0.psp", create_record(
+        name="CsvImport", version="0.1.0", category="import",
+        description="Import CSV files.", tags="csv",
+        author="Jane Doe <jane@example.com>"
+    ))
+
+    return index
+
+
+class TestSearchIndex:
+    def test_term(self, index: SearchIndex):
+        res = index.search("csv")
+        assert res.total == 3
+        # ranked by version, latest first
+        assert [key for key, _ in res] == [
+            "csv-1.2.0.psp", "csv-1.0.0.psp", "csv-import-0.1.0.psp"
+        ]
+
+        # all terms must match
+        assert index.search("csv import").total == 1
+        assert index.search("csv xml").total == 0
+
+        # terms are case insensitive
+        assert index.search("JSON").total == 1
+
+    def test_field(self, index: SearchIndex):
+        assert index.search("author:jane").total == 1
+        assert index.search("name:csvexport").total == 2
+        assert index.search("description:documents").total == 1
+        assert index.search("tags:tables").total == 2
+        assert index.search("tags:json name:csvexport").total == 0
+
+        with pytest.raises(ValueError):
+            index.search("unknown:csv")
+
+    def test_prefix(self, index: SearchIndex):
+        assert index.search("doc*").total == 1
+        assert index.search("name:csv*").total == 3
+        assert index.search("ex*").total == 4
+        assert index.search("xyz*").total == 0
+
+    def test_facets(self, index: SearchIndex):
+        res = index.search()
+        assert res.total == 4
+        assert res.facets["category"] == {"export": 3, "import": 1}
+        assert res.facets["tags"] == {"csv": 3, "tables": 2, "json": 1}
+
+        res = index.search("csv", category="export")
+        assert res.total == 2
+        assert res.facets["category"] == {"export": 2}
+
+        res = index.search(tags=["csv", "tables"])
+        assert res.total == 2
+
+    def test_limit(self, index: SearchIndex):
+        res = index.search("export", limit=2)
+        assert res.total == 3
+        assert [key for key, _ in res] == [
+            "json-2.0.0-rc.1.psp", "csv-1.2.0.psp"
+        ]
+
+    def test_remove(self, index: SearchIndex):
+        index.remove("json-2.0.0-rc.1.psp")
+        assert "json-2.0.0-rc.1.psp" not in index
+        assert index.search("json").total == 0
+        assert index.search("doc*").total == 0
+        assert "json" not in index.search().facets["tags"]
+
+        # removing twice is ignored
+        index.remove("json-2.0.0-rc.1.psp")
+        assert len(index) == 3
+
+
+class TestRepositoryIndex:
+    def test_update(self, tmp_path):
+        repo_directory = tmp_path / "repo"
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=repo_directory
+        )
+        for name in ("SearchPlugin", "OtherPlugin"):
+            pm.pack(create_plugin_directory(
+                tmp_path, name, description=f"{name} description"
+            ))
+
+        repository = RepositoryIndex(repo_directory)
+        assert repository.update() == 2
+        assert repository.filename.exists()
+
+        # packages have not been modified
+        assert repository.update() == 0
+
+        res = repository.search("searchplugin")
+        assert res.total == 1
+        assert res.hits[0][1].name == "SearchPlugin"
+
+        # index is loaded from the persisted file
+        repository = RepositoryIndex(repo_directory)
+        repository.load()
+        assert len(repository) == 2
+        assert repository.update(force=True) == 0
+
+        # package rewritten in place, i.e., the directory is not modified
+        digest = repository.get_package("otherplugin-1.2.3.psp")["digest"]
+        shutil.copyfile(
+            repo_directory / "searchplugin-1.2.3.psp",
+            repo_directory / "otherplugin-1.2.3.psp"
+        )
+        assert repository.update() == 1
+        assert repository.get_package(
+            "otherplugin-1.2.3.psp"
+        )["digest"] != digest
+
+        # only the directory is stat'ed, if it has not been modified
+        os.utime(repo_directory / "otherplugin-1.2.3.psp", ns=(0, 0))
+        assert repository.update_if_modified() == 0
+
+        # removed packages are removed from the index
+        os.remove(repo_directory / "otherplugin-1.2.3.psp")
+        assert repository.update_if_modified() == 1
+        assert repository.update() == 0
+        os.remove(repo_directory / "searchplugin-1.2.3.psp")
+        assert repository.search("search*", update=False).total == 1
+        assert repository.search("search*").total == 0
+        assert repository.update() == 0
+        assert repository.search("other*").total == 0
+
+    def test_plugin_manager(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path / "repo"
+        )
+        assert pm.search().total == 0
+
+        # packed plugins are added to the index
+        pm.pack(create_plugin_directory(
+            tmp_path, "IndexedPlugin", tags="indexed, search"
+        ))
+        res = pm.search("tags:index*")
+        assert res.total == 1
+        assert res.facets["tags"] == {"indexed": 1, "search": 1}
+
+        # broken packages are skipped
+        (tmp_path / "repo" / "Broken-1.0.0.psp").write_text("broken")
+        assert pm.search().total == 1
+
+        # packages with invalid metadata are skipped
+        for name, metadata in (
+            ("Invalid-1.0.0.psp", "name: Invalid\nhash: ''\n"),
+            ("Unparsable-1.0.0.psp", "name: [Unparsable\n"),
+        ):
+            with zipfile.ZipFile(tmp_path / "repo" / name, "w") as zf:
+                zf.writestr("metadata.yml", metadata)
+
+        assert pm.search().total == 1
+
+        # skipped packages are not read again, until they are changed
+        assert pm.repository.update() == 0
+        (tmp_path / "repo" / "Broken-1.0.0.psp").write_text("changed")
+        assert pm.repository.update() == 1
+
+
+@pytest.fixture
+def server(tmp_path):
+    pm = PluginManager(
+        tmp_path / "build", plugins_repo_directory=tmp_path / "repo",
+        auto_discover=False
+    )
+    for name in ("RemotePlugin", "OtherRemotePlugin"):
+        plugin_dir = create_plugin_directory(tmp_path, name)
+        # padding, so that the package spans several blocks
+        plugin_dir.joinpath("data.bin").write_bytes(os.urandom(64 * 1024))
+        pm.pack(plugin_dir)
+
+    with RepositoryServer(tmp_path / "repo") as server:
+        yield server
+
+
+class TestRepositoryServer:
+    def test_index(self, server: RepositoryServer, tmp_path):
+        with RepositoryClient(server.url, tmp_path / "cache") as client:
+            packages = client.index()
+            assert sorted(packages) == [
+                "otherremoteplugin-1.2.3.psp", "remoteplugin-1.2.3.psp"
+            ]
+            etag = client._etag
+
+            # not modified => the index is not transferred again
+            status, _, body = client.request(
+                "GET", client.INDEX_PATH, {"If-None-Match": etag}
+            )
+            assert (status, body) == (304, b"")
+            assert client.index() == packages
+
+            # the connection is kept alive
+            assert len(client._pool) == 1
+
+        # the index is cached for other processes, e.g., if offline
+        client = RepositoryClient(server.url, tmp_path / "cache")
+        client._load_index()
+        assert client._etag == etag
+        assert client.get_package("remoteplugin-1.2.3.psp")["size"] > 0
+
+    def test_range(self, server: RepositoryServer, tmp_path):
+        client = RepositoryClient(server.url, tmp_path / "cache")
+        path = client.PACKAGES_PATH + "remoteplugin-1.2.3.psp"
+        content = server.repository.directory.joinpath(
+            "remoteplugin-1.2.3.psp"
+        ).read_bytes()
+        assert client.get_range(path, 10, 19) == content[10:20]
+
+        status, headers, body = client.request(
+            "GET", path, {"Range": "bytes=-22"}
+        )
+        assert status == 206
+        assert body == content[-22:]
+        assert headers["Content-Range"] == (
+            f"bytes {len(content) - 22}-{len(content) - 1}/{len(content)}"
+        )
+
+        status, _, _ = client.request(
+            "GET", path, {"Range": f"bytes={len(content)}-"}
+        )
+        assert status == 416
+
+        # only packages are served
+        for path in ("/packages/.index.json", "/packages/../x.psp", "/x"):
+            assert client.request("GET", path)[0] == 404
+
+    def test_info(self, server: RepositoryServer, tmp_path):
+        client = RepositoryClient(server.url, tmp_path / "cache")
+        filename = "remoteplugin-1.2.3.psp"
+        metadata = client.info(filename)
+        assert metadata.name == "RemotePlugin"
+        assert not client.cache_directory.joinpath(filename).exists()
+
+        # only the central directory and the metadata file are read
+        size = client.get_package(filename)["size"]
+        f = RangeFile(client, client.PACKAGES_PATH + filename, size)
+        import zipfile
+
+        with zipfile.ZipFile(f) as zf:
+            zf.read("metadata.yml")
+
+        fetched = sum(map(len, f._blocks.values()))
+        assert f.requests <= 3
+        assert fetched < size
+
+        with pytest.raises(RepositoryException):
+            client.info("missing-1.0.0.psp")
+
+    def test_download(self, server: RepositoryServer, tmp_path):
+        client = RepositoryClient(server.url, tmp_path / "cache")
+        fn = client.download("remoteplugin-1.2.3.psp")
+        assert fn.read_bytes() == server.repository.directory.joinpath(
+            "remoteplugin-1.2.3.psp"
+        ).read_bytes()
+        mtime_ns = fn.stat().st_mtime_ns
+
+        # cached package is not fetched again
+        assert client.download("remoteplugin-1.2.3.psp") == fn
+        assert fn.stat().st_mtime_ns == mtime_ns
+
+        # changed cached package is fetched again
+        fn.write_bytes(b"x" * fn.stat().st_size)
+        assert client.get_cached("remoteplugin-1.2.3.psp") is None
+        client.download("remoteplugin-1.2.3.psp")
+        assert client.get_cached("remoteplugin-1.2.3.psp") == fn
+
+        with pytest.raises(RepositoryException):
+            client.download("missing-1.0.0.psp")
+
+    def test_plugin_manager(self, server: RepositoryServer, tmp_path):
+        pm = PluginManager(
+            tmp_path / "node", plugins_repo_directory=tmp_path / "node_repo",
+            plugins_repo_url=server.url
+        )
+        assert pm.info("remoteplugin-1.2.3").name == "RemotePlugin"
+
+        # packages not found locally are downloaded from the server
+        pm.install("remoteplugin-1.2.3")
+        pm.discover()
+        assert [entry.name for entry in pm.plugins] == ["RemotePlugin"]
+        assert pm.remote.get_cached("remoteplugin-1.2.3.psp") is not None
+        assert pm.outdated() == {}
+
+        # newer versions on the server are found and downloaded
+        source = tmp_path / "newer"
+        source.mkdir()
+        PluginManager(
+            tmp_path / "build", plugins_repo_directory=tmp_path / "repo",
+            auto_discover=False
+        ).pack(create_plugin_directory(
+            source, "RemotePlugin", version="1.3.0"
+        ))
+        assert pm.outdated()["RemotePlugin"][2] == "remoteplugin-1.3.0.psp"
+        pm.upgrade_all()
+        assert str(pm.plugins[0].metadata.version) == "1.3.0"
+        pm.unload("RemotePlugin")
+
+
+class TestRepositoryMirror:
+    def test_local(self, server: RepositoryServer, tmp_path):
+        source = server.repository.directory
+        destination = tmp_path / "mirror"
+        result = RepositoryMirror(source, destination).run(dry_run=True)
+        assert result.transferred == [
+            "otherremoteplugin-1.2.3.psp", "remoteplugin-1.2.3.psp"
+        ]
+        assert not destination.exists()
+
+        result = RepositoryMirror(source, destination, jobs=2).run()
+        assert len(result.transferred) == 2
+        assert result.size > 0
+        for filename in result.transferred:
+            assert destination.joinpath(filename).read_bytes() == (
+                source.joinpath(filename).read_bytes()
+            )
+
+        # the index of the destination is up to date without reading
+        # the packages again
+        index = RepositoryIndex(destination)
+        assert index.update() == 0
+        assert index.search("remoteplugin").total == 1
+
+        # nothing to transfer
+        result = RepositoryMirror(source, destination).run()
+        assert (result.transferred, result.unchanged) == ([], 2)
+
+        # only the changed package is transferred, extra packages are
+        # only removed on request
+        destination.joinpath("remoteplugin-1.2.3.psp").write_bytes(b"old")
+        destination.joinpath("extra-1.0.0.psp").write_bytes(
+            source.joinpath("remoteplugin-1.2.3.psp").read_bytes()
+        )
+        result = RepositoryMirror(source, destination, delete=True).run()
+        assert result.transferred == ["remoteplugin-1.2.3.psp"]
+        assert result.removed == ["extra-1.0.0.psp"]
+        assert sorted(
+            fn.name for fn in destination.glob("*.psp")
+        ) == ["otherremoteplugin-1.2.3.psp", "remoteplugin-1.2.3.psp"]
+
+    def test_remote(self, server: RepositoryServer, tmp_path):
+        pm = PluginManager(
+            tmp_path / "node", plugins_repo_directory=tmp_path / "node_repo"
+        )
+        result = pm.mirror(server.url)
+        assert len(result.transferred) == 2
+        assert result.failed == {}
+        assert pm.search("remoteplugin").total == 1
+        assert pm.mirror(server.url).transferred == []
+
+
+class TestGarbageCollection:
+    def test_collect_garbage(self, tmp_path):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path / "repo"
+        )
+        versions = ["1.0.0", "1.1.0", "2.0.0-rc.1", "2.0.0"]
+        for version in versions:
+            source = tmp_path / version
+            source.mkdir()
+            pm.pack(create_plugin_directory(
+                source, "GcPlugin", version=version
+            ))
+
+        source = tmp_path / "other"
+        source.mkdir()
+        pm.pack(create_plugin_directory(source, "GcOther", version="0.1.0"))
+        pm.install("gcplugin-1.0.0")
+
+        # old packages, except for the latest ones
+        old = time.time() - 3600
+        for version in versions[:-1]:
+            os.utime(tmp_path / "repo" / f"gcplugin-{version}.psp", (old, old))
+
+        # dry run by default
+        assert pm.collect_garbage(keep_last=2) == ["gcplugin-1.1.0.psp"]
+        assert (tmp_path / "repo" / "gcplugin-1.1.0.psp").exists()
+
+        # installed plugins and recent packages are kept
+        assert pm.collect_garbage(keep_last=0, max_age=60) == [
+            "gcplugin-1.1.0.psp", "gcplugin-2.0.0-rc.1.psp"
+        ]
+
+        removed = pm.collect_garbage(keep_last=2, dry_run=False)
+        assert removed == ["gcplugin-1.1.0.psp"]
+        assert not (tmp_path / "repo" / "gcplugin-1.1.0.psp").exists()
+        assert pm.search("gcplugin").total == 3
+
+        # the persisted index has been updated in the same step
+        index = RepositoryIndex(tmp_path / "repo")
+        index.load()
+        assert sorted(index.packages) == [
+            "gcother-0.1.0.psp", "gcplugin-1.0.0.psp",
+            "gcplugin-2.0.0-rc.1.psp", "gcplugin-2.0.0.psp"
+        ]
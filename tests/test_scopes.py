@@ -0,0 +1,137 @@
+import gc
+import asyncio
+import threading
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.exceptions import PluginManagerException
+from .test_pluginmanager import create_plugin_directory
+
+
+# plugin counting its init() calls
+COUNTING_PLUGIN_PYTHON = """
+from powerstrip import Plugin
+
+class {PluginName}(Plugin):
+    def init(self, value=0):
+        self.value = value
+        self.init_calls = getattr(self, "init_calls", 0) + 1
+        self.is_shutdown = False
+
+    def run(self):
+        return self.value
+
+    def shutdown(self):
+        self.is_shutdown = True
+"""
+
+
+@pytest.fixture
+def pm(tmp_path):
+    pm = PluginManager(tmp_path / "plugins", plugins_repo_directory=tmp_path)
+    plugin_dir = create_plugin_directory(
+        tmp_path, "ScopedPlugin", source=COUNTING_PLUGIN_PYTHON
+    )
+    pm.install(pm.pack(plugin_dir))
+    pm.discover()
+
+    return pm
+
+
+class TestScopes:
+    def test_singleton(self, pm):
+        plugin = pm.get_plugin("ScopedPlugin", value=3)
+        assert pm.get_plugin("ScopedPlugin") is plugin
+        assert plugin.run() == 3
+        assert plugin.init_calls == 1
+
+        # metadata is reused from discovery
+        entry = pm._find_entry("ScopedPlugin")
+        assert plugin.metadata is entry.metadata
+
+    def test_thread(self, pm):
+        plugins = []
+
+        def get():
+            for _ in range(2):
+                plugin = pm.get_plugin("ScopedPlugin", scope="thread")
+                plugins.append(plugin)
+                pm.release(plugin)
+
+        threads = [threading.Thread(target=get) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        assert len({id(plugin) for plugin in plugins}) == 3
+        assert all(plugin.init_calls == 1 for plugin in plugins)
+
+        # instances of exited threads are shut down and forgotten
+        gc.collect()
+        assert all(plugin.is_shutdown for plugin in plugins)
+        plugin = pm.get_plugin("ScopedPlugin", scope="thread")
+        assert pm._find_entry("ScopedPlugin").instances == [plugin]
+
+        pm.release(plugin)
+        pm.unload("ScopedPlugin")
+        assert plugin.is_shutdown
+
+    def test_context(self, pm):
+        async def get():
+            plugin = pm.get_plugin("ScopedPlugin", scope="context")
+            await asyncio.sleep(0)
+            assert pm.get_plugin("ScopedPlugin", scope="context") is plugin
+
+            return plugin
+
+        async def main():
+            return await asyncio.gather(get(), get())
+
+        plugins = asyncio.run(main())
+        assert plugins[0] is not plugins[1]
+
+        # instances of collected contexts are shut down and forgotten
+        gc.collect()
+        assert all(plugin.is_shutdown for plugin in plugins)
+        assert pm._find_entry("ScopedPlugin").instances == []
+
+        async def run():
+            plugin = pm.get_plugin("ScopedPlugin", scope="context")
+            pm.release(plugin)
+
+        async def many():
+            await asyncio.gather(*(run() for _ in range(100)))
+
+        asyncio.run(many())
+        gc.collect()
+        assert pm._find_entry("ScopedPlugin").instances == []
+
+    def test_pool(self, pm):
+        pm.pool_size = 2
+        with pytest.raises(PluginManagerException):
+            pm.get_plugin("ScopedPlugin", scope="pool")
+
+        with pm.checkout("ScopedPlugin", scope="pool") as plugin1:
+            with pm.checkout("ScopedPlugin", scope="pool") as plugin2:
+                assert plugin1 is not plugin2
+
+                # pool is exhausted
+                with pytest.raises(PluginManagerException):
+                    with pm.checkout(
+                        "ScopedPlugin", scope="pool", timeout=0.01
+                    ):
+                        pass
+
+        # returned instance is used again
+        with pm.checkout("ScopedPlugin", scope="pool") as plugin3:
+            assert plugin3 in (plugin1, plugin2)
+
+        entry = pm._find_entry("ScopedPlugin")
+        assert len(entry.instances) == 2
+
+        # instances of all scopes are shut down on unload
+        pm.unload("ScopedPlugin")
+        assert plugin1.is_shutdown and plugin2.is_shutdown
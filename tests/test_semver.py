@@ -106,3 +106,21 @@ class TestSemVer:
             "0.2.1+002", "3.2.0-beta", "4.5.92-rc2+20220208"
         ):
             SemVer.create_from_str(value)
+
+    def test_ordering(self):
+        # precedence example of https://semver.org
+        versions = [
+            "1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta",
+            "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0-rc.1", "1.0.0", "1.2.0",
+            "2.0.0"
+        ]
+        semvers = [SemVer.create_from_str(v) for v in reversed(versions)]
+        assert [str(sv) for sv in sorted(semvers)] == versions
+
+        # build metadata is ignored
+        assert SemVer.create_from_str("1.0.0+1") == (
+            SemVer.create_from_str("1.0.0+2")
+        )
+        assert (
+            SemVer.create_from_str("1.0.1") > SemVer.create_from_str("1.0.0")
+        )
@@ -0,0 +1,174 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.sharedmemory import (
+    SharedBuffer, SharedMemoryPool, SharedMemoryAttachments, encode, decode
+)
+from .test_pluginmanager import create_plugin_directory
+
+
+# dummy plugin file that reverses the given buffer
+PLUGIN_PYTHON = """
+from powerstrip import Plugin
+
+class {PluginName}(Plugin):
+    def init(self):
+        pass
+
+    def run(self, data, small=None):
+        return type(data).__name__, bytes(data)[::-1], small
+
+    def shutdown(self):
+        pass
+"""
+
+
+@pytest.fixture(scope="module")
+def pm(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("sharedmemory")
+    pm = PluginManager(tmp_path / "plugins", plugins_repo_directory=tmp_path)
+    plugin_dir = create_plugin_directory(
+        tmp_path, "ShmPlugin", source=PLUGIN_PYTHON
+    )
+    pm.install(pm.pack(plugin_dir))
+    pm.discover()
+
+    return pm
+
+
+class TestSharedMemory:
+    def test_pool(self):
+        pool = SharedMemoryPool(min_size=1024)
+
+        # segments are reused for payloads of similar size
+        buffer = pool.lease(1000)
+        buffer.buf[:] = b"x" * 1000
+        name = buffer.name
+        buffer.release()
+        buffer = pool.lease(900)
+        assert buffer.name == name
+        assert len(pool) == 1
+
+        # larger payloads get new segments
+        other = pool.lease(5000)
+        assert other.name != name
+        assert len(pool) == 2
+
+        pool.close()
+        assert len(pool) == 0
+
+    def test_attachments(self):
+        destroyed = []
+        pool = SharedMemoryPool(max_free=1, on_destroy=destroyed.append)
+        attachments = SharedMemoryAttachments(1024, max_attached=2)
+        buffers = [pool.lease(100) for _ in range(3)]
+        for buffer in buffers:
+            attachments.attach(buffer.name)
+
+        # least recently used segment is detached
+        assert len(attachments) == 2
+        assert set(attachments._segments) == {
+            buffers[1].name, buffers[2].name
+        }
+
+        # segments unlinked by the pool are reported
+        names = [buffer.name for buffer in buffers]
+        for buffer in buffers:
+            buffer.release()
+
+        assert destroyed == names[1:]
+        for name in destroyed:
+            attachments.detach(name)
+
+        assert len(attachments) == 0
+
+        attachments.close()
+        pool.close()
+
+    def test_encode_decode(self):
+        pool = SharedMemoryPool()
+        leases = []
+
+        def lease(size):
+            leases.append(pool.lease(size))
+            return leases[-1]
+
+        payload = bytes(range(256)) * 100
+        obj = encode(
+            ([payload, b"small"], {"key": bytearray(payload)}), lease, 1024
+        )
+
+        # only large payloads are moved to shared memory
+        assert isinstance(obj[0][0], SharedBuffer)
+        assert obj[0][1] == b"small"
+        assert len(leases) == 2
+
+        res = decode(obj, lambda buffer: buffer.tobytes())
+        assert res == ([payload, b"small"], {"key": payload})
+
+        pool.close()
+
+    def test_process_pool(self, pm: PluginManager):
+        payload = bytes(range(256)) * 1024
+
+        with pm.create_process_pool(
+            size=1, shared_memory=True, shared_memory_threshold=1024
+        ) as pool:
+            for _ in range(3):
+                # large payload is passed as memoryview to the plugin
+                name, data, small = pool.run("ShmPlugin", payload, small=1)
+                assert name == "memoryview"
+                assert data == payload[::-1]
+                assert small == 1
+
+            # segments are reused between calls
+            assert len(pool._shm_pool) == 2
+
+            # zero-copy input via leased buffer
+            buffer = pool.lease(len(payload))
+            buffer.buf[:] = payload
+            name, data, _ = pool.run("ShmPlugin", buffer)
+            assert data == payload[::-1]
+            buffer.release()
+
+            # small payloads are pickled
+            name, data, _ = pool.run("ShmPlugin", b"abc")
+            assert (name, data) == ("bytes", b"cba")
+
+            # unlinked segments are detached by the worker with the next
+            # call
+            worker = pool._workers[0]
+            pool._shm_pool.max_free = 0
+            pool.run("ShmPlugin", payload)
+            assert worker.detached and not worker.attached
+            _, data, _ = pool.run("ShmPlugin", payload + b"x")
+            assert data == (payload + b"x")[::-1]
+
+    @pytest.mark.parametrize("mp_context", ["fork", "spawn"])
+    def test_process_pool_cleanup(self, pm: PluginManager, mp_context):
+        # segments are neither reported as leaked by the resource tracker
+        # nor closed while the payloads are still referenced
+        code = (
+            "from powerstrip.pluginmanager import PluginManager\n"
+            "if __name__ == '__main__':\n"
+            f"    pm = PluginManager({str(pm.plugins_directory)!r})\n"
+            "    with pm.create_process_pool(\n"
+            "        size=1, shared_memory=True,\n"
+            "        shared_memory_threshold=1024,\n"
+            f"        mp_context={mp_context!r}\n"
+            "    ) as pool:\n"
+            "        pool._shm_pool.max_free = 0\n"
+            "        for size in (4096, 8192, 16384):\n"
+            "            pool.run('ShmPlugin', bytes(size))\n"
+        )
+        res = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        assert "leaked" not in res.stderr
+        assert "BufferError" not in res.stderr
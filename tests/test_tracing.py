@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.tracing import (
+    tracer, Tracer, InMemoryExporter, JSONFileExporter, NOOP_SPAN
+)
+from .test_pluginmanager import create_plugin_directory
+
+
+@pytest.fixture
+def exporter():
+    exporter = tracer.add_exporter(InMemoryExporter())
+    yield exporter
+    tracer.remove_exporter(exporter)
+
+
+class TestTracing:
+    def test_disabled(self):
+        t = Tracer()
+        assert not t.enabled
+        with t.span("operation") as span:
+            assert span is NOOP_SPAN
+
+    def test_nested(self):
+        t = Tracer()
+        exporter = t.add_exporter(InMemoryExporter())
+        with t.span("outer", key="value") as outer:
+            with t.span("inner") as inner:
+                assert inner.parent is outer
+
+        with pytest.raises(ValueError):
+            with t.span("failing"):
+                raise ValueError("failed")
+
+        inner, outer, failing = exporter.spans
+        assert inner.depth == 1
+        assert outer.attributes == {"key": "value"}
+        assert outer.start <= inner.start <= inner.end <= outer.end
+        assert "ValueError" in failing.attributes["error"]
+
+        event = outer.to_trace_event()
+        assert event["ph"] == "X"
+        assert event["dur"] >= 0
+
+    def test_manager(self, tmp_path, exporter):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        plugin_dir = create_plugin_directory(tmp_path, "TracedPlugin")
+        pm.install(pm.pack(plugin_dir))
+        pm.discover()
+
+        spans = {span.name: span for span in exporter.spans}
+        for name in (
+            "PluginManager.pack", "PluginPackage.pack", "hash_directory",
+            "zip.write", "PluginManager.install", "PluginPackage.install",
+            "zip.extractall", "PluginManager.discover", "glob",
+            "PluginManager.load_plugin", "load_module", "Metadata.load",
+            "yaml.safe_load", "Metadata.validate"
+        ):
+            assert name in spans
+
+        assert (
+            spans["PluginPackage.pack"].parent is spans["PluginManager.pack"]
+        )
+        assert spans["PluginManager.load_plugin"].attributes["plugin"] == (
+            "TracedPlugin"
+        )
+        assert spans["load_module"].parent is (
+            spans["PluginManager.load_modules"]
+        )
+        assert spans["PluginManager.load_modules"].parent is (
+            spans["PluginManager.load_plugin"]
+        )
+
+    def test_json_file(self, tmp_path):
+        t = Tracer()
+        exporter = t.add_exporter(JSONFileExporter(tmp_path / "trace.json"))
+        with t.span("operation", plugin="A"):
+            pass
+
+        t.remove_exporter(exporter)
+        assert not t.enabled
+
+        trace = json.loads(tmp_path.joinpath("trace.json").read_text())
+        event, = trace["traceEvents"]
+        assert event["name"] == "operation"
+        assert event["args"] == {"plugin": "A"}
@@ -0,0 +1,173 @@
+import time
+import shutil
+
+import pytest
+
+from powerstrip.pluginmanager import PluginManager
+from powerstrip.watcher import PluginWatcher, InotifyBackend
+from .test_pluginmanager import (
+    create_plugin_directory, VERSIONED_PLUGIN_PYTHON
+)
+
+
+BACKENDS = [
+    ("polling", False),
+    ("polling", True),
+    pytest.param(
+        "inotify", False,
+        marks=pytest.mark.skipif(
+            not InotifyBackend.is_available(),
+            reason="inotify is not available"
+        )
+    ),
+]
+
+
+class TestPluginWatcher:
+    @pytest.mark.parametrize("backend,use_hash", BACKENDS)
+    def test_check(self, tmp_path, backend, use_hash):
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path,
+            use_category=True
+        )
+        for name in ("WatchedPlugin", "UnchangedPlugin"):
+            plugin_dir = create_plugin_directory(
+                tmp_path, f"{name}{backend}{use_hash}",
+                source=VERSIONED_PLUGIN_PYTHON % 1
+            )
+            pm.install(pm.pack(plugin_dir))
+
+        pm.discover()
+        name = f"WatchedPlugin{backend}{use_hash}"
+        unchanged = pm.get_plugin(f"UnchangedPlugin{backend}{use_hash}")
+        watcher = PluginWatcher(pm, backend=backend, use_hash=use_hash)
+
+        # nothing changed
+        assert watcher.check() == []
+
+        # only the changed plugin is reloaded
+        pm.plugins_directory.joinpath(
+            "category", name, "plugin.py"
+        ).write_text(
+            VERSIONED_PLUGIN_PYTHON.format(PluginName=name) % 10
+        )
+        assert watcher.check() == [name]
+        assert pm.get_plugin(name).run() == 10
+        assert pm.get_plugin(
+            f"UnchangedPlugin{backend}{use_hash}"
+        ) is unchanged
+
+        # new plugin is loaded
+        plugin_dir = create_plugin_directory(
+            tmp_path, f"NewPlugin{backend}{use_hash}",
+            source=VERSIONED_PLUGIN_PYTHON % 1
+        )
+        pm.install(pm.pack(plugin_dir))
+        assert watcher.check() == [f"NewPlugin{backend}{use_hash}"]
+        assert len(pm.plugins) == 3
+
+        # plugin removed from the directory is dropped
+        shutil.rmtree(pm.plugins_directory / "category" / name)
+        assert watcher.check() == [name]
+        assert len(pm.plugins) == 2
+
+        watcher.stop()
+
+    @pytest.mark.parametrize("backend,use_hash", BACKENDS)
+    def test_plugins_directories(self, tmp_path, backend, use_hash):
+        (tmp_path / "src1").mkdir()
+        (tmp_path / "src2").mkdir()
+        name = f"ShadowedPlugin{backend}{use_hash}"
+        system = PluginManager(
+            tmp_path / "system", plugins_repo_directory=tmp_path / "repo"
+        )
+        pm = PluginManager(
+            [tmp_path / "tenant", tmp_path / "system"],
+            plugins_repo_directory=tmp_path / "repo2"
+        )
+        watcher = PluginWatcher(pm, backend=backend, use_hash=use_hash)
+
+        # plugin installed to the directory of lower precedence
+        system.install(system.pack(create_plugin_directory(
+            tmp_path / "src1", name, source=VERSIONED_PLUGIN_PYTHON % 1
+        )))
+        assert watcher.check() == [name]
+        assert pm.get_plugin(name).run() == 1
+
+        # plugin installed to the first directory shadows it
+        pm.install(pm.pack(create_plugin_directory(
+            tmp_path / "src2", name, source=VERSIONED_PLUGIN_PYTHON % 2
+        )))
+        assert sorted(watcher.check()) == [name, name]
+        assert pm.get_plugin(name).run() == 2
+        assert list(pm.shadowed) == [tmp_path / "system" / name]
+
+        watcher.stop()
+
+    @pytest.mark.parametrize("backend", ["polling", "inotify"])
+    def test_watch(self, tmp_path, backend):
+        if (backend == "inotify") and not InotifyBackend.is_available():
+            pytest.skip("inotify is not available")
+
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+
+        with pm.watch(interval=0.01, backend=backend, debounce=0.01):
+            plugin_dir = create_plugin_directory(
+                tmp_path, f"WatchedPlugin{backend}",
+                source=VERSIONED_PLUGIN_PYTHON % 1
+            )
+            pm.install(pm.pack(plugin_dir))
+
+            # new plugin is discovered in the background
+            for _ in range(500):
+                if pm.plugins:
+                    break
+
+                time.sleep(0.01)
+
+        assert [entry.name for entry in pm.plugins] == [
+            f"WatchedPlugin{backend}"
+        ]
+
+    @pytest.mark.parametrize("backend", ["polling", "inotify"])
+    def test_restart(self, tmp_path, backend):
+        if (backend == "inotify") and not InotifyBackend.is_available():
+            pytest.skip("inotify is not available")
+
+        pm = PluginManager(
+            tmp_path / "plugins", plugins_repo_directory=tmp_path
+        )
+        watcher = pm.watch(interval=0.05, backend=backend, debounce=0.01)
+        watcher.stop()
+
+        # stopped watcher is started again with a new backend, which
+        # waits for changes instead of returning at once
+        watcher.start()
+        reads = []
+        read = watcher.backend.read
+
+        def counting_read(timeout):
+            reads.append(timeout)
+            return read(timeout)
+
+        watcher.backend.read = counting_read
+        time.sleep(0.2)
+        assert len(reads) < 10
+
+        plugin_dir = create_plugin_directory(
+            tmp_path, f"RestartedPlugin{backend}",
+            source=VERSIONED_PLUGIN_PYTHON % 1
+        )
+        pm.install(pm.pack(plugin_dir))
+        for _ in range(500):
+            if pm.plugins:
+                break
+
+            time.sleep(0.01)
+
+        watcher.stop()
+        assert [entry.name for entry in pm.plugins] == [
+            f"RestartedPlugin{backend}"
+        ]